@@ -0,0 +1,64 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse
+from typing import List, Optional, Union
+import os
+import secrets
+
+from app.api.proposition import config
+from app.core.profiler import SampledProfile
+from app.schemas.profile import ProfileDetail, ProfileSummary
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """
+    管理者トークンを検証する
+
+    環境変数 ADMIN_TOKEN が未設定の場合、管理用エンドポイントは無効になる
+
+    Raises:
+        HTTPException: 管理用エンドポイントが無効、またはトークンが一致しない場合
+    """
+    token = os.getenv("ADMIN_TOKEN")
+    if not token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+@router.get("/profiles", response_model=List[ProfileSummary])
+async def list_profiles_route(
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    min_duration_ms: float = Query(0.0, ge=0)
+) -> List[ProfileSummary]:
+    """
+    保存済みプロファイルの一覧エンドポイント（新しい順）
+    """
+    rows = config.profile_store.list(limit=limit, offset=offset, min_duration_ms=min_duration_ms)
+    return [ProfileSummary(**row) for row in rows]
+
+@router.get("/profiles/{profile_id}", response_model=ProfileDetail)
+async def get_profile_route(
+    profile_id: int,
+    format: str = Query("json", regex="^(json|collapsed|speedscope)$")
+) -> Union[ProfileDetail, PlainTextResponse, JSONResponse]:
+    """
+    プロファイルの取得エンドポイント
+
+    format=collapsed で collapsed stack 形式のテキストを、format=speedscope で
+    speedscope で開けるJSONを返す
+    """
+    row = config.profile_store.get(profile_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "collapsed":
+        return PlainTextResponse(row["stacks"])
+    if format == "speedscope":
+        profile = SampledProfile.from_collapsed(row["stacks"], row["interval_ms"] / 1000, row["duration_ms"] / 1000)
+        return JSONResponse(
+            profile.to_speedscope(name=f"{row['stage']} #{profile_id}"),
+            headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.speedscope.json"'}
+        )
+    return ProfileDetail(**row)
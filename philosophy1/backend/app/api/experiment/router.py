@@ -3,6 +3,7 @@ from typing import List
 from ..services import experiment_service
 from ..schemas import experiment
 from ..core.auth import get_current_user
+from app.core.template_registry import get_template_registry
 
 router = APIRouter(
     prefix="/experiments",
@@ -48,8 +49,8 @@ class ExperimentController:
             テンプレートのリスト
         """
         try:
-            templates = await experiment_service.get_experiment_templates()
-            return templates
+            # テンプレート一覧はレジストリで構築済みのものを返す
+            return get_template_registry().list_templates()
         except Exception as e:
             raise HTTPException(
                 status_code=500,
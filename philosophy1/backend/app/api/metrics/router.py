@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Response
+
+from app.api.proposition import config
+from app.core.metrics import registry
+
+router = APIRouter(tags=["metrics"])
+
+# Prometheus テキスト形式のコンテンツタイプ
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _parse_cache_stats():
+    """読み込み済みのNLPエンジンのキャッシュ統計（プロセスプールのワーカー分は含まない）"""
+    engine = config._nlp_engine
+    if engine is None or engine.cache is None:
+        return []
+    return [((name,), value) for name, value in engine.cache.stats().items()]
+
+
+registry.gauge(
+    'logiclens_resource_load_seconds',
+    'Time taken to load each analysis resource (models, concept database, warm-up).',
+    ('resource',),
+    lambda: [((name,), seconds) for name, seconds in config.load_times.items()]
+)
+registry.gauge(
+    'logiclens_parse_cache',
+    'Parse cache statistics of the in-process NLP engine.',
+    ('stat',),
+    _parse_cache_stats
+)
+
+
+@router.get("/metrics")
+async def metrics_route() -> Response:
+    """
+    メトリクスエンドポイント（Prometheus テキスト形式）
+    """
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
@@ -1,10 +1,17 @@
 from fastapi import APIRouter, HTTPException
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Mapping, Optional
 import json
+import logging
 import os
+import threading
+import time
 
 from app.core.nlp_engine import NLPEngine
+from app.core.concept_store import ConceptStore, convert_json
+from app.core.parse_cache import ParseCache
+from app.core.nlp_pool import NLPWorkerPool, AsyncNLPEngine
 from app.core.logic_analyzer import LogicAnalyzer
+from app.core.profiler import ProfileStore, SampledProfile
 
 # APIルーター初期化
 router = APIRouter()
@@ -13,20 +20,136 @@ class PropositionConfig:
     """命題解析の設定を管理するクラス"""
     
     def __init__(self):
-        self.nlp_engine: Optional[NLPEngine] = None
-        self.logic_analyzer: Optional[LogicAnalyzer] = None
-        self.concepts_db: Dict = {}
+        self.logger = logging.getLogger(__name__)
+        self._nlp_engine: Optional[NLPEngine] = None
+        self._logic_analyzer: Optional[LogicAnalyzer] = None
+        self._concepts_db: Optional[Mapping[str, Any]] = None
+        self._async_nlp_engine: Optional[AsyncNLPEngine] = None
+        self._profile_store: Optional[ProfileStore] = None
         self.validation_rules: List[Dict] = []
+        self.nlp_config_path = "config/nlp_config.json"
+        self.concepts_path = "data/concepts.json"
+        # 各リソースの読み込み所要時間（秒）
+        self.load_times: Dict[str, float] = {}
+        self._lock = threading.RLock()
         
     def initialize(self, 
                   nlp_config_path: str = "config/nlp_config.json",
                   concepts_path: str = "data/concepts.json"):
-        """設定の初期化"""
-        self.nlp_engine = NLPEngine()
-        self.logic_analyzer = LogicAnalyzer()
-        self.concepts_db = self.load_concepts(concepts_path)
+        """
+        設定の初期化
+
+        パスの記録と軽量な設定の読み込みのみを行う。
+        NLPエンジン・論理解析エンジン・概念データベースは初回アクセス時に読み込まれる
+        """
+        self.nlp_config_path = nlp_config_path
+        self.concepts_path = concepts_path
         self._load_validation_rules()
 
+    @property
+    def nlp_engine(self) -> NLPEngine:
+        """
+        プロセス内のNLPエンジン（初回アクセス時にスレッドセーフに生成）
+
+        APIのリクエスト処理では使わず、spaCyモデルはプロセスプールのワーカーでのみ読み込む。
+        CLIやベンチマークなど、プールを使わない呼び出し元のためのもの
+        """
+        if self._nlp_engine is None:
+            with self._lock:
+                if self._nlp_engine is None:
+                    self._nlp_engine = self._timed(
+                        "nlp_engine",
+                        lambda: NLPEngine(cache=ParseCache(db_path=os.getenv("PARSE_CACHE_PATH")))
+                    )
+        return self._nlp_engine
+
+    @property
+    def async_nlp_engine(self) -> AsyncNLPEngine:
+        """プロセスプールで処理を行う非同期NLPエンジン（初回アクセス時に生成）"""
+        if self._async_nlp_engine is None:
+            with self._lock:
+                if self._async_nlp_engine is None:
+                    pool = NLPWorkerPool(
+                        max_workers=int(os.getenv("NLP_POOL_WORKERS", "0")) or None,
+                        max_pending=int(os.getenv("NLP_POOL_MAX_PENDING", "64")),
+                        task_timeout=float(os.getenv("NLP_POOL_TASK_TIMEOUT", "30")),
+                        max_tasks_per_worker=int(os.getenv("NLP_POOL_MAX_TASKS", "1000")),
+                        max_batch_pending=int(os.getenv("NLP_POOL_MAX_BATCH_PENDING", "0")) or None
+                    )
+                    pool.profile_sink = self._store_slow_profile
+                    self._async_nlp_engine = AsyncNLPEngine(pool)
+        return self._async_nlp_engine
+
+    @property
+    def profile_store(self) -> ProfileStore:
+        """採取したプロファイルの保存先（初回アクセス時に開く）"""
+        if self._profile_store is None:
+            with self._lock:
+                if self._profile_store is None:
+                    self._profile_store = ProfileStore(
+                        os.getenv("PROFILE_STORE_PATH", "data/profiles.db"),
+                        max_entries=int(os.getenv("PROFILE_STORE_MAX_ENTRIES", "1000"))
+                    )
+        return self._profile_store
+
+    def _store_slow_profile(self, method: str, text: str, profile: SampledProfile) -> None:
+        """処理時間の閾値を超えたNLPタスクのプロファイルを保存する"""
+        profile_id = self.profile_store.add(text, stage=f"nlp.{method}", trigger="threshold", profile=profile)
+        self.logger.warning(f"遅いNLPタスクのプロファイルを保存しました: id={profile_id}, "
+                            f"{method} {profile.duration * 1000:.1f}ms")
+
+    def shutdown(self) -> None:
+        """プロセスプールなどのリソースを解放する"""
+        if self._async_nlp_engine is not None:
+            self._async_nlp_engine.pool.shutdown()
+            self._async_nlp_engine = None
+
+    @property
+    def logic_analyzer(self) -> LogicAnalyzer:
+        """プロセス内の論理解析エンジン（nlp_engine と同様、APIのリクエスト処理では使わない）"""
+        if self._logic_analyzer is None:
+            with self._lock:
+                if self._logic_analyzer is None:
+                    self._logic_analyzer = self._timed(
+                        "logic_analyzer",
+                        lambda: LogicAnalyzer(nlp=self.nlp_engine.nlp)
+                    )
+        return self._logic_analyzer
+
+    @property
+    def concepts_db(self) -> Mapping[str, Any]:
+        """概念データベース（初回アクセス時にメモリマップで開く）"""
+        if self._concepts_db is None:
+            with self._lock:
+                if self._concepts_db is None:
+                    self._concepts_db = self._timed(
+                        "concepts_db",
+                        lambda: load_concepts(self.concepts_path)
+                    )
+        return self._concepts_db
+
+    def warm_up(self) -> Dict[str, float]:
+        """
+        APIプロセスで使うリソースを事前に読み込む
+
+        アプリケーション起動イベントなどから明示的に呼び出す。
+        spaCyモデルはプロセスプールの各ワーカーが起動時に読み込み、ウォームアップする
+
+        Returns:
+            Dict[str, float]: 各リソースの読み込み所要時間（秒）
+        """
+        self.concepts_db
+        self._timed("nlp_pool", lambda: self.async_nlp_engine.pool.executors)
+        self.logger.info(f"命題解析リソースのウォームアップ完了: {self.load_times}")
+        return dict(self.load_times)
+
+    def _timed(self, name: str, factory):
+        """リソースを生成し、所要時間を記録する"""
+        started = time.perf_counter()
+        resource = factory()
+        self.load_times[name] = time.perf_counter() - started
+        return resource
+
     def _load_validation_rules(self):
         """バリデーションルールの読み込み"""
         rules_path = "config/validation_rules.json"
@@ -37,24 +160,26 @@ class PropositionConfig:
 # グローバル設定インスタンス
 config = PropositionConfig()
 
-def load_concepts(concepts_path: str = "data/concepts.json") -> Dict:
+def load_concepts(concepts_path: str = "data/concepts.json") -> Mapping[str, Any]:
     """
-    概念データベースを読み込む
+    概念データベースを開く
+
+    バイナリ形式（拡張子 .bin）のファイルをメモリマップで開き、名称で参照する。
+    JSONの方が新しい場合は先にバイナリ形式へ変換する
     
     Args:
-        concepts_path: 概念データベースのパス
+        concepts_path: 概念データベースのパス（.json または .bin）
         
     Returns:
-        Dict: 読み込まれた概念データ
-        
-    Raises:
-        FileNotFoundError: データベースファイルが存在しない場合
+        Mapping[str, Any]: 名称をキーとする概念データ（ファイルが無い場合は空）
     """
-    try:
-        with open(concepts_path, 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
+    store_path = os.path.splitext(concepts_path)[0] + '.bin'
+    if concepts_path != store_path and os.path.exists(concepts_path):
+        if not os.path.exists(store_path) or os.path.getmtime(concepts_path) > os.path.getmtime(store_path):
+            convert_json(concepts_path, store_path)
+    if not os.path.exists(store_path):
         return {}
+    return ConceptStore(store_path)
 
 def validate_input(proposition: str) -> bool:
     """
@@ -91,7 +216,7 @@ def validate_input(proposition: str) -> bool:
     
     return True
 
-# 初期化時に設定を読み込む
+# 初期化時に設定を読み込む（重いリソースは遅延読み込み）
 config.initialize()
 
 # エクスポートするオブジェクト
@@ -0,0 +1,199 @@
+from fastapi import HTTPException
+from typing import Any, AsyncIterator, Dict, Iterable, List, Tuple
+from datetime import datetime
+import asyncio
+import json
+import os
+import uuid
+
+from app.core.metrics import timed
+from app.core.nlp_pool import AsyncNLPEngine
+from app.core.logic_analyzer import ValidationResult as LogicValidationResult, build_logical_proposition
+from app.schemas.proposition import (
+    AnalysisResponse,
+    BatchAnalysisItem,
+    Concept,
+    Issue,
+    LogicalStructure,
+    ValidationResult
+)
+from . import validate_input
+
+# 一括分析で受け付ける本文の最大バイト数と最大件数
+MAX_BATCH_BYTES = int(os.getenv("BATCH_MAX_BYTES", str(5 * 1024 * 1024)))
+MAX_BATCH_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+# 一括分析で1つのワーカータスク（nlp.pipe の呼び出し）にまとめる件数
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", "16"))
+
+
+def parse_batch_payload(payload: bytes, max_items: int = MAX_BATCH_ITEMS) -> List[str]:
+    """
+    一括分析の入力を命題テキストのリストに変換する
+
+    JSON配列（文字列または {"text": ...} オブジェクト）の場合はその要素を、
+    それ以外の場合は空でない各行を1つの命題として扱う
+
+    Args:
+        payload: アップロードされたファイルまたはリクエスト本文
+        max_items: 受け付ける最大件数
+
+    Returns:
+        List[str]: 命題テキストのリスト
+
+    Raises:
+        HTTPException: UTF-8やJSONとして不正な場合、要素が文字列でない場合（400）、
+            件数が上限を超えた場合（413）
+    """
+    try:
+        content = payload.decode('utf-8-sig')
+    except UnicodeDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Payload is not valid UTF-8: {str(e)}")
+    if content.lstrip().startswith('['):
+        try:
+            items = json.loads(content)
+        except json.JSONDecodeError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON array: {str(e)}")
+        texts = [item.get('text') if isinstance(item, dict) else item for item in items]
+        for index, text in enumerate(texts):
+            if not isinstance(text, str):
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Item {index} must be a string or an object with a string 'text' field"
+                )
+    else:
+        texts = [line for line in content.splitlines() if line.strip()]
+    if len(texts) > max_items:
+        raise HTTPException(status_code=413, detail=f"Too many propositions (max {max_items})")
+    return texts
+
+
+@timed('build_response')
+def build_analysis_response(text: str,
+                            analysis: Dict[str, Any],
+                            validation: LogicValidationResult) -> AnalysisResponse:
+    """
+    NLP解析結果と論理検証の結果から、APIレスポンスを組み立てる
+
+    論理検証（spaCyの Matcher を使う誤謬検出を含む）は呼び出し側で済ませておき、
+    ここでは組み立てのみを行う
+
+    Args:
+        text: 元の命題テキスト
+        analysis: NLPEngine.analyze の戻り値
+        validation: build_logical_proposition(analysis) に対する LogicAnalyzer.validate_logic の結果
+
+    Returns:
+        AnalysisResponse: 分析結果
+    """
+    proposition = build_logical_proposition(analysis)
+    issues = [Issue(type="consistency", description=issue, severity="error")
+              for issue in validation.issues]
+    issues += [Issue(type="fallacy", description=fallacy.value, severity="warning")
+               for fallacy in validation.fallacies]
+    issues += [Issue(type="consistency", description=note, severity="info")
+               for note in validation.undetermined]
+
+    return AnalysisResponse(
+        id=f"analysis_{uuid.uuid4().hex}",
+        original_text=text,
+        structure=LogicalStructure(
+            subject=proposition.subject,
+            predicate=proposition.predicate,
+            modifiers=proposition.modifiers,
+            relations=analysis['structure']['main_verbs']
+        ),
+        concepts=[
+            Concept(
+                id=f"concept_{i + 1}",
+                name=node.name,
+                definition="",
+                related_concepts=list(node.related_concepts)
+            )
+            for i, node in enumerate(analysis['concepts'])
+        ],
+        validity=ValidationResult(
+            is_valid=validation.is_valid,
+            issues=issues,
+            suggestions=validation.suggestions
+        ),
+        timestamp=datetime.utcnow().isoformat() + "Z"
+    )
+
+
+async def read_limited(chunks: AsyncIterator[bytes], limit: int = MAX_BATCH_BYTES) -> bytes:
+    """
+    リクエスト本文を上限のバイト数まで読み込む
+
+    Args:
+        chunks: request.stream() などの本文の断片
+        limit: 受け付ける最大バイト数
+
+    Returns:
+        bytes: 本文
+
+    Raises:
+        HTTPException: 本文が上限を超えた場合（413）
+    """
+    body = bytearray()
+    async for chunk in chunks:
+        body += chunk
+        if len(body) > limit:
+            raise HTTPException(status_code=413, detail=f"Request body too large (max {limit} bytes)")
+    return bytes(body)
+
+
+async def analyze_batch_ndjson(texts: Iterable[str],
+                               nlp_engine: AsyncNLPEngine,
+                               chunk_size: int = BATCH_CHUNK_SIZE) -> AsyncIterator[str]:
+    """
+    命題を一括分析し、1件ごとの結果をNDJSONの行として完了した順に返す
+
+    入力検証を通った命題を chunk_size 件ずつ1つのタスクにまとめ、ワーカーの nlp.pipe で解析する。
+    チャンクはプールの一括分析の枠が空くまで待って投入されるため、単発のリクエストの処理枠は
+    消費しない。行の順序は入力順と異なるため、各行には入力中の位置（index）を含める。
+    入力検証や分析に失敗した命題（タイムアウトを含む）はエラー行として返し、バッチ全体は中断しない
+
+    Args:
+        texts: 命題テキスト群
+        nlp_engine: プロセスプールで処理する非同期NLPエンジン
+        chunk_size: 1つのタスクで解析する件数
+
+    Yields:
+        str: BatchAnalysisItem をJSON化した行（改行付き）
+    """
+    async def analyze(chunk: List[Tuple[int, str]]) -> List[BatchAnalysisItem]:
+        try:
+            results = await nlp_engine.analyze_and_validate_batch([text for _, text in chunk])
+        except asyncio.TimeoutError:
+            return [BatchAnalysisItem(index=index, error="Analysis timed out") for index, _ in chunk]
+        except Exception as e:
+            return [BatchAnalysisItem(index=index, error=str(e)) for index, _ in chunk]
+        items = []
+        for (index, text), result in zip(chunk, results):
+            if isinstance(result, str):
+                items.append(BatchAnalysisItem(index=index, error=result))
+            else:
+                items.append(BatchAnalysisItem(index=index, result=build_analysis_response(text, *result)))
+        return items
+
+    rejected: List[BatchAnalysisItem] = []
+    accepted: List[Tuple[int, str]] = []
+    for index, text in enumerate(texts):
+        try:
+            validate_input(text)
+        except HTTPException as e:
+            rejected.append(BatchAnalysisItem(index=index, error=str(e.detail)))
+        else:
+            accepted.append((index, text))
+    tasks = [asyncio.create_task(analyze(accepted[start:start + chunk_size]))
+             for start in range(0, len(accepted), chunk_size)]
+    try:
+        for item in rejected:
+            yield item.json() + "\n"
+        for completed in asyncio.as_completed(tasks):
+            for item in await completed:
+                yield item.json() + "\n"
+    finally:
+        # クライアントが切断した場合は未完了の分析を取り消す
+        for task in tasks:
+            task.cancel()
@@ -1,12 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+import asyncio
 
 from app.services.proposition_service import PropositionService
+from app.core.nlp_pool import PoolOverloadedError
+from app.api.proposition import config
+from app.api.proposition.batch import analyze_batch_ndjson, parse_batch_payload, read_limited
 from app.schemas.proposition import (
     PropositionAnalysis,
     Concept,
+    ConceptNeighborhood,
+    ConceptPath,
     ValidationResult,
     PropositionRequest,
+    PropositionSearchHit,
+    StoredProposition,
     ValidationRequest
 )
 
@@ -16,18 +25,27 @@ class PropositionController:
     def __init__(self, proposition_service: PropositionService = Depends(PropositionService)):
         self.proposition_service = proposition_service
 
-    async def analyze_proposition(self, text: str) -> PropositionAnalysis:
+    async def analyze_proposition(self,
+                                  text: str,
+                                  reuse_duplicates: bool = True,
+                                  profile: bool = False) -> PropositionAnalysis:
         """
         命題のテキストを解析し、論理構造を抽出する
         
         Args:
             text (str): 解析する命題のテキスト
+            reuse_duplicates (bool): 近似重複の命題の分析結果を再利用するかどうか
+            profile (bool): このリクエストのプロファイルを採取するかどうか
             
         Returns:
             PropositionAnalysis: 解析結果を含むオブジェクト
         """
         try:
-            return await self.proposition_service.analyze(text)
+            return await self.proposition_service.analyze(text, reuse_duplicates=reuse_duplicates, profile=profile)
+        except PoolOverloadedError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail="Analysis timed out")
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
 
@@ -43,6 +61,103 @@ class PropositionController:
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
+    async def search_propositions(self, query: str, limit: int, match_all: bool) -> List[PropositionSearchHit]:
+        """
+        保存済みの命題を検索する
+
+        Args:
+            query (str): 検索文
+            limit (int): 返す最大件数
+            match_all (bool): 全ての語を含む命題のみを返すかどうか
+
+        Returns:
+            List[PropositionSearchHit]: 検索結果
+        """
+        try:
+            return await self.proposition_service.search(query, limit=limit, match_all=match_all)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    async def list_propositions(self, limit: int, offset: int) -> List[StoredProposition]:
+        """
+        保存済みの命題を一覧取得する
+
+        Args:
+            limit (int): 取得する最大件数
+            offset (int): 読み飛ばす件数
+
+        Returns:
+            List[StoredProposition]: 命題のリスト
+        """
+        try:
+            return await self.proposition_service.list_propositions(limit=limit, offset=offset)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    async def get_proposition(self, proposition_id: str) -> StoredProposition:
+        """
+        保存済みの命題を取得する
+
+        Args:
+            proposition_id (str): 命題のID
+
+        Returns:
+            StoredProposition: 命題
+        """
+        proposition = await self.proposition_service.get_proposition(proposition_id)
+        if proposition is None:
+            raise HTTPException(status_code=404, detail="Proposition not found")
+        return proposition
+
+    async def save_concept(self, concept: Concept) -> Concept:
+        """
+        概念を追加・更新する
+
+        Args:
+            concept (Concept): 保存する概念
+
+        Returns:
+            Concept: 保存された概念
+        """
+        try:
+            return await self.proposition_service.save_concept(concept)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    async def get_concept_neighborhood(self, concept_id: str, k: int, direction: str) -> ConceptNeighborhood:
+        """
+        概念グラフ上の近傍を取得する
+
+        Args:
+            concept_id (str): 起点の概念ID
+            k (int): 最大ホップ数
+            direction (str): 辿る方向
+
+        Returns:
+            ConceptNeighborhood: 近傍の概念と距離
+        """
+        try:
+            return await self.proposition_service.concept_neighborhood(concept_id, k, direction)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    async def get_concept_path(self, source: str, target: str, direction: str) -> ConceptPath:
+        """
+        概念グラフ上の最短経路を取得する
+
+        Args:
+            source (str): 始点の概念ID
+            target (str): 終点の概念ID
+            direction (str): 辿る方向
+
+        Returns:
+            ConceptPath: 最短経路
+        """
+        try:
+            return await self.proposition_service.concept_path(source, target, direction)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
     async def validate_logic(self, analysis: PropositionAnalysis) -> ValidationResult:
         """
         命題の論理的妥当性を検証する
@@ -62,12 +177,47 @@ class PropositionController:
 @router.post("/analyze", response_model=PropositionAnalysis)
 async def analyze_proposition_route(
     request: PropositionRequest,
+    reuse_duplicates: bool = Query(True),
+    profile: bool = Query(False),
+    x_profile: Optional[str] = Header(None),
     controller: PropositionController = Depends()
 ) -> PropositionAnalysis:
     """
     命題解析エンドポイント
+
+    クエリ profile=true または X-Profile ヘッダを付けると、このリクエストのプロファイルを採取する
+    """
+    profile = profile or (x_profile or "").lower() in ("1", "true", "yes")
+    return await controller.analyze_proposition(request.text, reuse_duplicates, profile)
+
+@router.post("/analyze/batch")
+async def analyze_batch_route(request: Request) -> StreamingResponse:
+    """
+    命題一括解析エンドポイント
+
+    JSON配列、またはmultipartでアップロードされたファイル（field名: file）を受け付け、
+    1件ごとの結果をNDJSONでストリーミングする。
+    本文は BATCH_MAX_BYTES、件数は BATCH_MAX_ITEMS までに制限し、分析はプロセスプールで行う
     """
-    return await controller.analyze_proposition(request.text)
+    body = await read_limited(request.stream())
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        # 上限内で読み込んだ本文を改めてフォームとして解析する
+        async def replay() -> dict:
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        form = await Request(request.scope, replay).form()
+        upload = form.get("file")
+        if upload is None:
+            raise HTTPException(status_code=400, detail="File field 'file' is required")
+        payload = await upload.read()
+    else:
+        payload = body
+
+    texts = parse_batch_payload(payload)
+    return StreamingResponse(
+        analyze_batch_ndjson(texts, config.async_nlp_engine),
+        media_type="application/x-ndjson"
+    )
 
 @router.get("/concepts", response_model=List[Concept])
 async def get_concepts_route(
@@ -78,6 +228,40 @@ async def get_concepts_route(
     """
     return await controller.get_concepts()
 
+@router.post("/concepts", response_model=Concept)
+async def save_concept_route(
+    concept: Concept,
+    controller: PropositionController = Depends()
+) -> Concept:
+    """
+    概念の追加・更新エンドポイント（概念グラフにも差分を反映）
+    """
+    return await controller.save_concept(concept)
+
+@router.get("/concepts/path", response_model=ConceptPath)
+async def get_concept_path_route(
+    source: str,
+    target: str,
+    direction: str = Query("both", regex="^(out|in|both)$"),
+    controller: PropositionController = Depends()
+) -> ConceptPath:
+    """
+    概念間の最短経路エンドポイント
+    """
+    return await controller.get_concept_path(source, target, direction)
+
+@router.get("/concepts/{concept_id}/neighborhood", response_model=ConceptNeighborhood)
+async def get_concept_neighborhood_route(
+    concept_id: str,
+    k: int = Query(1, ge=1, le=6),
+    direction: str = Query("both", regex="^(out|in|both)$"),
+    controller: PropositionController = Depends()
+) -> ConceptNeighborhood:
+    """
+    概念の k ホップ近傍エンドポイント（概念マップの描画用）
+    """
+    return await controller.get_concept_neighborhood(concept_id, k, direction)
+
 @router.post("/validate", response_model=ValidationResult)
 async def validate_logic_route(
     request: ValidationRequest,
@@ -87,3 +271,36 @@ async def validate_logic_route(
     論理検証エンドポイント
     """
     return await controller.validate_logic(request.analysis)
+
+@router.get("/search", response_model=List[PropositionSearchHit])
+async def search_propositions_route(
+    q: str = Query(..., min_length=1, max_length=1000),
+    limit: int = Query(20, ge=1, le=200),
+    match_all: bool = False,
+    controller: PropositionController = Depends()
+) -> List[PropositionSearchHit]:
+    """
+    保存済み命題の検索エンドポイント（見出し語のBM25順位付き検索）
+    """
+    return await controller.search_propositions(q, limit, match_all)
+
+@router.get("/list", response_model=List[StoredProposition])
+async def list_propositions_route(
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    controller: PropositionController = Depends()
+) -> List[StoredProposition]:
+    """
+    保存済み命題の一覧取得エンドポイント（件数にかかわらず2回のクエリで取得）
+    """
+    return await controller.list_propositions(limit, offset)
+
+@router.get("/{proposition_id}", response_model=StoredProposition)
+async def get_proposition_route(
+    proposition_id: str,
+    controller: PropositionController = Depends()
+) -> StoredProposition:
+    """
+    保存済み命題の取得エンドポイント
+    """
+    return await controller.get_proposition(proposition_id)
@@ -0,0 +1,315 @@
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import logging
+
+import numpy as np
+
+# 走査方向
+OUT = 'out'
+IN = 'in'
+BOTH = 'both'
+
+
+def _build_csr(num_nodes: int, sources: np.ndarray, targets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """辺のリストからCSR形式の隣接配列（indptr, indices）を構築する（重複辺は除く）"""
+    if len(sources):
+        # 始点・終点を1つの整数にまとめて整列し、重複を除く
+        keys = np.unique(sources.astype(np.int64) * max(num_nodes, 1) + targets)
+        sources, targets = np.divmod(keys, max(num_nodes, 1))
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=num_nodes), out=indptr[1:])
+    return indptr, targets.astype(np.int32)
+
+
+class _Adjacency:
+    """
+    一方向の隣接関係
+
+    CSR配列に加え、構築後に変更されたノードの隣接ノードを上書き用の辞書で保持する
+    """
+
+    def __init__(self, num_nodes: int, sources: np.ndarray, targets: np.ndarray):
+        self.indptr, self.indices = _build_csr(num_nodes, sources, targets)
+        self.overlay: Dict[int, np.ndarray] = {}
+        # CSR配列の範囲内で上書きされたノード
+        self._overridden = np.zeros(num_nodes, dtype=bool)
+
+    @property
+    def num_csr_nodes(self) -> int:
+        return len(self.indptr) - 1
+
+    def neighbors(self, node: int) -> np.ndarray:
+        overlay = self.overlay.get(node)
+        if overlay is not None:
+            return overlay
+        if node >= self.num_csr_nodes:
+            return self.indices[:0]
+        return self.indices[self.indptr[node]:self.indptr[node + 1]]
+
+    def set_neighbors(self, node: int, neighbors: Iterable[int]) -> None:
+        self.overlay[node] = np.unique(np.fromiter(neighbors, dtype=np.int32))
+        if node < self.num_csr_nodes:
+            self._overridden[node] = True
+
+    def expand(self, frontier: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        ノード群の隣接ノードをまとめて求める
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: 辺の始点と終点
+        """
+        is_csr = frontier < self.num_csr_nodes
+        in_csr = frontier[is_csr]
+        if self.overlay:
+            overridden = self._overridden[in_csr]
+            in_csr = in_csr[~overridden]
+        starts = self.indptr[in_csr]
+        lengths = self.indptr[in_csr + 1] - starts
+        total = int(lengths.sum())
+        # 各ノードの隣接範囲を連結した添字を1回の演算で作る
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        sources = [np.repeat(in_csr, lengths)]
+        targets = [self.indices[offsets + np.arange(total)]]
+        if self.overlay:
+            for node in np.concatenate([frontier[is_csr][overridden], frontier[~is_csr]]):
+                overlay = self.overlay.get(int(node))
+                if overlay is not None and len(overlay):
+                    sources.append(np.full(len(overlay), node, dtype=frontier.dtype))
+                    targets.append(overlay)
+        return np.concatenate(sources), np.concatenate(targets)
+
+    def degrees(self, num_nodes: int) -> np.ndarray:
+        degrees = np.zeros(num_nodes, dtype=np.int64)
+        degrees[:self.num_csr_nodes] = np.diff(self.indptr)
+        for node, neighbors in self.overlay.items():
+            degrees[node] = len(neighbors)
+        return degrees
+
+
+class ConceptGraph:
+    """
+    概念の関連を表すグラフ
+
+    概念IDを連番の整数に対応付け、関連（related_concepts）をCSR形式の
+    NumPy配列で保持する。順方向と逆方向の隣接配列を持つため、関連元・関連先の
+    いずれの方向にも辿れる。概念の編集は上書き用の辞書に反映し、
+    変更が一定量を超えた時点でCSR配列を再構築する
+    """
+
+    def __init__(self, compact_ratio: float = 0.05):
+        """
+        Args:
+            compact_ratio: 変更ノード数がノード数に占める割合がこれを超えたら再構築する
+        """
+        self.logger = logging.getLogger(__name__)
+        self.compact_ratio = compact_ratio
+        self.ids: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._removed: set = set()
+        empty = np.zeros(0, dtype=np.int32)
+        self._out = _Adjacency(0, empty, empty)
+        self._in = _Adjacency(0, empty, empty)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[str, Optional[Sequence[str]]]], **kwargs) -> 'ConceptGraph':
+        """
+        概念IDと関連概念IDの組からグラフを構築する
+
+        Args:
+            rows: (概念ID, 関連概念IDのリスト) の組（Conceptテーブルの行）
+
+        Returns:
+            ConceptGraph: 構築されたグラフ
+        """
+        graph = cls(**kwargs)
+        sources: List[int] = []
+        targets: List[int] = []
+        for concept_id, related in rows:
+            source = graph._intern(concept_id)
+            for related_id in related or ():
+                sources.append(source)
+                targets.append(graph._intern(related_id))
+        graph._rebuild(np.array(sources, dtype=np.int32), np.array(targets, dtype=np.int32))
+        return graph
+
+    def __len__(self) -> int:
+        return len(self.ids) - len(self._removed)
+
+    def __contains__(self, concept_id: str) -> bool:
+        index = self._index.get(concept_id)
+        return index is not None and index not in self._removed
+
+    @property
+    def num_edges(self) -> int:
+        return int(self._out.degrees(len(self.ids)).sum())
+
+    def update_concept(self, concept_id: str, related: Sequence[str]) -> None:
+        """
+        概念の関連を置き換える（概念の追加・編集時に呼び出す）
+
+        Args:
+            concept_id: 概念ID
+            related: 関連概念IDのリスト
+        """
+        node = self._intern(concept_id)
+        self._removed.discard(node)
+        old = set(self._out.neighbors(node).tolist())
+        new = {self._intern(related_id) for related_id in related}
+        self._out.set_neighbors(node, new)
+        for target in old - new:
+            self._in.set_neighbors(target, (n for n in self._in.neighbors(target).tolist() if n != node))
+        for target in new - old:
+            self._in.set_neighbors(target, list(self._in.neighbors(target).tolist()) + [node])
+        self._maybe_compact()
+
+    def remove_concept(self, concept_id: str) -> None:
+        """概念とその関連を取り除く"""
+        node = self._index.get(concept_id)
+        if node is None or node in self._removed:
+            return
+        for target in self._out.neighbors(node).tolist():
+            self._in.set_neighbors(target, (n for n in self._in.neighbors(target).tolist() if n != node))
+        for source in self._in.neighbors(node).tolist():
+            self._out.set_neighbors(source, (n for n in self._out.neighbors(source).tolist() if n != node))
+        self._out.set_neighbors(node, ())
+        self._in.set_neighbors(node, ())
+        self._removed.add(node)
+        self._maybe_compact()
+
+    def neighbors(self, concept_id: str, direction: str = BOTH) -> List[str]:
+        """
+        隣接する概念を取得する
+
+        Args:
+            concept_id: 概念ID
+            direction: 'out'（関連先）・'in'（関連元）・'both'
+
+        Returns:
+            List[str]: 隣接する概念ID
+        """
+        node = self._node(concept_id)
+        if node is None:
+            return []
+        neighbors = np.concatenate([a.neighbors(node) for a in self._adjacencies(direction)])
+        return [self.ids[i] for i in np.unique(neighbors)]
+
+    def degree(self, concept_id: str, direction: str = BOTH) -> int:
+        """概念の次数（'both' の場合は重複を除いた隣接概念数）"""
+        node = self._node(concept_id)
+        if node is None:
+            return 0
+        if direction == BOTH:
+            return len(np.union1d(self._out.neighbors(node), self._in.neighbors(node)))
+        return len(self._adjacencies(direction)[0].neighbors(node))
+
+    def degrees(self, direction: str = OUT) -> Dict[str, int]:
+        """全概念の次数（'out' または 'in'）"""
+        degrees = self._adjacencies(direction)[0].degrees(len(self.ids))
+        return {concept_id: int(degrees[i]) for i, concept_id in enumerate(self.ids)
+                if i not in self._removed}
+
+    def k_hop(self, concept_id: str, k: int = 1, direction: str = BOTH) -> Dict[str, int]:
+        """
+        k ホップ以内の概念を幅優先探索で求める
+
+        各段の展開はフロンティア全体に対する配列演算で行う
+
+        Args:
+            concept_id: 起点の概念ID
+            k: 最大ホップ数
+            direction: 辿る方向
+
+        Returns:
+            Dict[str, int]: 到達した概念IDと起点からの距離（起点自身は0）
+        """
+        node = self._node(concept_id)
+        if node is None:
+            return {}
+        distances = self._bfs(node, k, direction)[0]
+        reached = np.flatnonzero(distances >= 0)
+        return {self.ids[i]: int(distances[i]) for i in reached}
+
+    def shortest_path(self, source_id: str, target_id: str, direction: str = BOTH,
+                      max_depth: Optional[int] = None) -> Optional[List[str]]:
+        """
+        2つの概念を結ぶ最短経路を求める
+
+        Args:
+            source_id: 始点の概念ID
+            target_id: 終点の概念ID
+            direction: 辿る方向
+            max_depth: 探索する最大ホップ数
+
+        Returns:
+            Optional[List[str]]: 始点から終点までの概念ID（到達できない場合はNone）
+        """
+        source, target = self._node(source_id), self._node(target_id)
+        if source is None or target is None:
+            return None
+        distances, parents = self._bfs(source, max_depth, direction, target)
+        if distances[target] < 0:
+            return None
+        path = [target]
+        while path[-1] != source:
+            path.append(int(parents[path[-1]]))
+        return [self.ids[i] for i in reversed(path)]
+
+    def _bfs(self, start: int, max_depth: Optional[int], direction: str,
+             target: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """段ごとに配列演算で展開する幅優先探索（距離と親ノードの配列を返す）"""
+        num_nodes = len(self.ids)
+        distances = np.full(num_nodes, -1, dtype=np.int32)
+        parents = np.full(num_nodes, -1, dtype=np.int32)
+        distances[start] = 0
+        frontier = np.array([start], dtype=np.int32)
+        adjacencies = self._adjacencies(direction)
+        depth = 0
+        while len(frontier) and (max_depth is None or depth < max_depth):
+            if target is not None and distances[target] >= 0:
+                break
+            depth += 1
+            expanded = [a.expand(frontier) for a in adjacencies]
+            sources = np.concatenate([e[0] for e in expanded])
+            targets = np.concatenate([e[1] for e in expanded])
+            unseen = distances[targets] < 0
+            targets, first = np.unique(targets[unseen], return_index=True)
+            distances[targets] = depth
+            parents[targets] = sources[unseen][first]
+            frontier = targets.astype(np.int32)
+        return distances, parents
+
+    def _adjacencies(self, direction: str) -> List[_Adjacency]:
+        if direction == OUT:
+            return [self._out]
+        if direction == IN:
+            return [self._in]
+        if direction == BOTH:
+            return [self._out, self._in]
+        raise ValueError(f"Unknown direction: {direction}")
+
+    def _node(self, concept_id: str) -> Optional[int]:
+        node = self._index.get(concept_id)
+        return None if node is None or node in self._removed else node
+
+    def _intern(self, concept_id: str) -> int:
+        node = self._index.get(concept_id)
+        if node is None:
+            node = len(self.ids)
+            self.ids.append(concept_id)
+            self._index[concept_id] = node
+        return node
+
+    def _edge_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """現在の全ての辺（上書き分を含む）を配列で取り出す"""
+        nodes = np.arange(len(self.ids), dtype=np.int32)
+        return self._out.expand(nodes)
+
+    def _rebuild(self, sources: np.ndarray, targets: np.ndarray) -> None:
+        num_nodes = len(self.ids)
+        self._out = _Adjacency(num_nodes, sources, targets)
+        self._in = _Adjacency(num_nodes, targets, sources)
+
+    def _maybe_compact(self) -> None:
+        changed = len(self._out.overlay) + len(self._in.overlay)
+        if changed > max(64, self.compact_ratio * len(self.ids)):
+            self._rebuild(*self._edge_arrays())
+            self.logger.debug(f"概念グラフを再構築しました: {len(self)}ノード, {self.num_edges}辺")
@@ -0,0 +1,404 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+import json
+import logging
+import os
+import shutil
+import tempfile
+import uuid
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# 保存時のファイル名（ベクトル・重心・割り当ては meta.json が指す版ディレクトリに置く）
+_VECTORS_FILE = 'vectors.f32'
+_META_FILE = 'meta.json'
+_CENTROIDS_FILE = 'centroids.npy'
+_ASSIGNMENTS_FILE = 'assignments.npy'
+_VERSION_PREFIX = 'v-'
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """行ごとにL2正規化する（ゼロベクトルはそのまま）"""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+def _kmeans(vectors: np.ndarray, num_clusters: int, iterations: int, rng: np.random.Generator) -> np.ndarray:
+    """正規化済みベクトルに対する球面k-means（重心も正規化する）"""
+    centroids = vectors[rng.choice(len(vectors), num_clusters, replace=False)].copy()
+    for _ in range(iterations):
+        labels = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, vectors)
+        counts = np.bincount(labels, minlength=num_clusters)
+        # 空のクラスタは重心を維持する
+        empty = counts == 0
+        sums[empty] = centroids[empty]
+        centroids = _normalize(sums)
+    return centroids
+
+
+class IndexLock:
+    """
+    保存先ごとのファイルロック（fcntl.flock）
+
+    複数のワーカープロセスが同じ保存先を構築・更新する場合に、読み込み・追加・保存を
+    直列化する。fcntl の無い環境ではロックしない
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: インデックスの保存先ディレクトリ（ロックファイルは path + '.lock'）
+        """
+        self.path = path + '.lock'
+        self._file = None
+
+    def __enter__(self) -> 'IndexLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+    def acquire(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, 'a+')
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+
+    def release(self) -> None:
+        if self._file is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
+
+
+class ConceptVectorIndex:
+    """
+    概念の埋め込みベクトルに対する近似最近傍探索インデックス（IVF）
+
+    ベクトルは正規化したfloat32の行列として保持し、保存済みのインデックスを開いた場合は
+    ファイルをコピーオンライトでメモリマップする。k-meansの重心でベクトルをリストに分け、
+    検索時はクエリに近い nprobe 個のリストの中だけをコサイン類似度で比較する。
+    構築後に追加したベクトルは再構築まで保留リストとして同時に検索する。
+
+    保存のたびに新しい版ディレクトリへ書き出してから meta.json を置き換えるため、
+    他のプロセスが開いている版は書き換わらない。複数のプロセスで共有する場合は
+    IndexLock の下で changed_on_disk を確認してから追加・保存する
+    """
+
+    def __init__(self,
+                 dim: int,
+                 path: Optional[str] = None,
+                 nlist: Optional[int] = None,
+                 nprobe: int = 8,
+                 train_threshold: int = 1024,
+                 seed: int = 0):
+        """
+        Args:
+            dim: ベクトルの次元数
+            path: 保存先ディレクトリ（Noneの場合はメモリ上のみ）
+            nlist: リスト数（Noneの場合はベクトル数の平方根）
+            nprobe: 検索時に調べるリスト数
+            train_threshold: この件数に達するまでは全件を比較する
+            seed: 学習用の乱数シード
+        """
+        self.logger = logging.getLogger(__name__)
+        self.dim = dim
+        self.path = path
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_threshold = train_threshold
+        self._rng = np.random.default_rng(seed)
+        self._row_of: Dict[str, int] = {}
+        self._row_ids: List[str] = []
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        self._count = 0
+        self._centroids: Optional[np.ndarray] = None
+        # 行ごとのリスト番号（-1 は削除済み、未学習時は0）。容量はベクトル行列と同じ
+        self._assignments = np.zeros(0, dtype=np.int32)
+        # 学習時点の行をリスト順に並べたCSR配列と、それ以降に追加された行
+        self._list_rows = np.zeros(0, dtype=np.int64)
+        self._list_offsets = np.zeros(1, dtype=np.int64)
+        self._pending: List[int] = []
+        self._trained_count = 0
+        # 重心を学習した時点の件数（大きく増えたら学習し直す）
+        self._train_size = 0
+        # 最後に開いた・保存した meta.json の (inode, 更新時刻)
+        self._meta_stamp: Optional[Tuple[int, int]] = None
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def __contains__(self, concept_id: str) -> bool:
+        return concept_id in self._row_of
+
+    @property
+    def ids(self) -> List[str]:
+        """格納済みの概念ID"""
+        return list(self._row_of)
+
+    @property
+    def is_trained(self) -> bool:
+        return self._centroids is not None
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """格納済みの正規化ベクトル（削除済みの行を含む）"""
+        return self._vectors[:self._count]
+
+    def add(self, ids: Sequence[str], vectors: np.ndarray) -> None:
+        """
+        ベクトルを追加する（既存のIDは古いベクトルを削除して置き換える）
+
+        Args:
+            ids: 概念ID
+            vectors: 各概念の埋め込み（形状は (len(ids), dim)）
+        """
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dim))
+        start = self._count
+        self._reserve(start + len(ids))
+        self._vectors[start:start + len(ids)] = vectors
+        if self.is_trained:
+            self._assignments[start:start + len(ids)] = self._assign(vectors)
+        else:
+            self._assignments[start:start + len(ids)] = 0
+        self._count += len(ids)
+
+        for row, concept_id in enumerate(ids, start):
+            old = self._row_of.get(concept_id)
+            if old is not None:
+                self._assignments[old] = -1
+            self._row_of[concept_id] = row
+            self._row_ids.append(concept_id)
+        self._pending.extend(range(start, self._count))
+
+        if (not self.is_trained and len(self) >= self.train_threshold) or \
+                (self.is_trained and len(self) > 4 * self._train_size):
+            self.train()
+        elif self.is_trained and len(self._pending) > max(256, self._trained_count // 32):
+            self._rebuild_lists()
+
+    def remove(self, concept_id: str) -> None:
+        """概念のベクトルを削除する"""
+        row = self._row_of.pop(concept_id, None)
+        if row is not None:
+            self._assignments[row] = -1
+
+    def train(self, iterations: int = 10) -> None:
+        """k-meansで重心を学習し、全ベクトルをリストに割り当て直す"""
+        live = np.flatnonzero(self._assignments[:self._count] >= 0)
+        if len(live) == 0:
+            return
+        nlist = self.nlist or max(1, int(np.sqrt(len(live))))
+        nlist = min(nlist, len(live))
+        # 学習には最大 256 * nlist 件の標本を使う
+        sample = live if len(live) <= 256 * nlist else self._rng.choice(live, 256 * nlist, replace=False)
+        self._centroids = _kmeans(np.asarray(self._vectors[sample]), nlist, iterations, self._rng)
+        self._assignments[live] = self._assign(self._vectors[live])
+        self._train_size = len(live)
+        self._rebuild_lists()
+        self.logger.info(f"概念ベクトルインデックスを学習しました: {len(live)}件, {nlist}リスト")
+
+    def search(self, vector: np.ndarray, k: int = 5) -> List[Tuple[str, float]]:
+        """
+        クエリに近い概念を検索する
+
+        Args:
+            vector: クエリの埋め込み
+            k: 返す件数
+
+        Returns:
+            List[Tuple[str, float]]: 概念IDとコサイン類似度（類似度の高い順）
+        """
+        return self.search_batch(np.asarray(vector, dtype=np.float32).reshape(1, self.dim), k)[0]
+
+    def search_batch(self, vectors: np.ndarray, k: int = 5) -> List[List[Tuple[str, float]]]:
+        """複数のクエリをまとめて検索する"""
+        queries = _normalize(np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim))
+        probes = None
+        if self.is_trained:
+            nprobe = min(self.nprobe, len(self._centroids))
+            scores = queries @ self._centroids.T
+            probes = np.argpartition(-scores, nprobe - 1, axis=1)[:, :nprobe]
+
+        # メモリマップのサブクラスを介さずに行を集める
+        matrix = self._vectors.view(np.ndarray)
+        results = []
+        for i, query in enumerate(queries):
+            rows = self._candidates(None if probes is None else probes[i])
+            if len(rows) == 0:
+                results.append([])
+                continue
+            similarities = matrix[rows] @ query
+            top = min(k, len(rows))
+            best = np.argpartition(-similarities, top - 1)[:top]
+            best = best[np.argsort(-similarities[best])]
+            results.append([(self._row_ids[rows[j]], float(similarities[j])) for j in best])
+        return results
+
+    def save(self) -> None:
+        """
+        インデックスを保存先ディレクトリに書き出す
+
+        プロセスごとの一時ディレクトリに書き出して版ディレクトリに改名し、
+        meta.json を置き換えた後に置き換えられた版を削除する
+        """
+        if self.path is None:
+            raise ValueError("No path configured for the concept index")
+        building = tempfile.mkdtemp(dir=self.path, prefix=f'.tmp-{os.getpid()}-')
+        try:
+            np.ascontiguousarray(self._vectors[:self._count]).tofile(os.path.join(building, _VECTORS_FILE))
+            np.save(os.path.join(building, _ASSIGNMENTS_FILE), self._assignments[:self._count])
+            if self._centroids is not None:
+                np.save(os.path.join(building, _CENTROIDS_FILE), self._centroids)
+            version = f"{_VERSION_PREFIX}{uuid.uuid4().hex}"
+            os.rename(building, os.path.join(self.path, version))
+        except BaseException:
+            shutil.rmtree(building, ignore_errors=True)
+            raise
+        meta = {
+            "dim": self.dim,
+            "count": self._count,
+            "nlist": self.nlist,
+            "nprobe": self.nprobe,
+            "version": version,
+            "row_ids": self._row_ids,
+        }
+        meta_path = os.path.join(self.path, _META_FILE)
+        replaced = self._read_meta(self.path) if os.path.exists(meta_path) else None
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=self.path, prefix=f'.{_META_FILE}.',
+                                         suffix='.tmp', delete=False) as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(f.name, meta_path)
+        self._meta_stamp = self._stamp(self.path)
+        if replaced is not None:
+            self._remove_version(self.path, replaced.get("version"))
+
+    def changed_on_disk(self) -> bool:
+        """開いた・保存した後に他のプロセスが保存先を更新したかどうか"""
+        if self.path is None:
+            return False
+        try:
+            return self._stamp(self.path) != self._meta_stamp
+        except FileNotFoundError:
+            return self._meta_stamp is not None
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        """保存済みのインデックスがあるかどうか"""
+        return os.path.exists(os.path.join(path, _META_FILE))
+
+    @classmethod
+    def open(cls, path: str, **kwargs) -> 'ConceptVectorIndex':
+        """
+        保存済みのインデックスを開く（ベクトルはコピーオンライトのメモリマップで参照する）
+
+        Args:
+            path: 保存先ディレクトリ
+
+        Returns:
+            ConceptVectorIndex: 読み込まれたインデックス
+        """
+        stamp = cls._stamp(path)
+        meta = cls._read_meta(path)
+        index = cls(dim=meta["dim"], path=path, nlist=meta.get("nlist"), nprobe=meta.get("nprobe", 8), **kwargs)
+        index._meta_stamp = stamp
+        # 版ディレクトリの無い meta.json は以前の形式（保存先の直下にファイルを置く）
+        directory = os.path.join(path, meta["version"]) if meta.get("version") else path
+        filename = os.path.join(directory, _VECTORS_FILE)
+        capacity = os.path.getsize(filename) // (index.dim * 4)
+        index._count = meta["count"]
+        if capacity > 0:
+            # 書き込みはこのプロセスのメモリにのみ反映され、ファイルは変更しない
+            index._vectors = np.memmap(filename, dtype=np.float32, mode='c', shape=(capacity, index.dim))
+        index._assignments = np.full(capacity, -1, dtype=np.int32)
+        index._assignments[:index._count] = np.load(os.path.join(directory, _ASSIGNMENTS_FILE))
+        index._row_ids = meta["row_ids"]
+        for row, concept_id in enumerate(index._row_ids):
+            if index._assignments[row] >= 0:
+                index._row_of[concept_id] = row
+        centroids_path = os.path.join(directory, _CENTROIDS_FILE)
+        if os.path.exists(centroids_path):
+            index._centroids = np.load(centroids_path)
+            index._train_size = len(index)
+            index._rebuild_lists()
+        else:
+            index._pending = np.flatnonzero(index._assignments[:index._count] >= 0).tolist()
+        return index
+
+    @staticmethod
+    def _read_meta(path: str) -> dict:
+        with open(os.path.join(path, _META_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    @staticmethod
+    def _stamp(path: str) -> Tuple[int, int]:
+        """meta.json の (inode, 更新時刻)（置き換えると inode が変わる）"""
+        stat = os.stat(os.path.join(path, _META_FILE))
+        return stat.st_ino, stat.st_mtime_ns
+
+    @staticmethod
+    def _remove_version(path: str, version: Optional[str]) -> None:
+        """置き換えられた版を削除する（開いているプロセスのメモリマップは削除後も有効）"""
+        if version:
+            shutil.rmtree(os.path.join(path, version), ignore_errors=True)
+            return
+        for name in (_VECTORS_FILE, _ASSIGNMENTS_FILE, _CENTROIDS_FILE):
+            try:
+                os.remove(os.path.join(path, name))
+            except FileNotFoundError:
+                pass
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ self._centroids.T, axis=1).astype(np.int32)
+
+    def _candidates(self, probes: Optional[np.ndarray]) -> np.ndarray:
+        """調べるリストに属する行（保留中の行を含む）"""
+        pending = np.asarray(self._pending, dtype=np.int64)
+        if probes is None:
+            rows = pending
+        else:
+            listed = [self._list_rows[self._list_offsets[p]:self._list_offsets[p + 1]] for p in probes]
+            if len(pending):
+                listed.append(pending[np.isin(self._assignments[pending], probes)])
+            rows = np.concatenate(listed)
+        rows = rows[self._assignments[rows] >= 0]
+        # ファイル上の位置順に読むことでページの局所性を高める
+        rows.sort()
+        return rows
+
+    def _rebuild_lists(self) -> None:
+        """全ての行をリスト順に並べ直してCSR配列を作る"""
+        assignments = self._assignments[:self._count]
+        live = np.flatnonzero(assignments >= 0)
+        order = live[np.argsort(assignments[live], kind='stable')]
+        self._list_rows = order
+        self._list_offsets = np.zeros(len(self._centroids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignments[live], minlength=len(self._centroids)), out=self._list_offsets[1:])
+        self._pending = []
+        self._trained_count = len(live)
+
+    def _reserve(self, count: int) -> None:
+        """ベクトル行列の容量を確保する（メモリマップしたファイルは拡張せずメモリ上に移す）"""
+        capacity = len(self._vectors)
+        if count <= capacity:
+            return
+        new_capacity = max(count, 2 * capacity, 1024)
+        assignments = np.full(new_capacity, -1, dtype=np.int32)
+        assignments[:self._count] = self._assignments[:self._count]
+        self._assignments = assignments
+        grown = np.zeros((new_capacity, self.dim), dtype=np.float32)
+        grown[:self._count] = self._vectors[:self._count]
+        self._vectors = grown
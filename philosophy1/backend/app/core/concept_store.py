@@ -0,0 +1,184 @@
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+import json
+import mmap
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+# ファイル形式
+#   ヘッダ: マジック・バージョン・件数・索引の開始位置・文字列表の開始位置
+#   索引:   名称のUTF-8バイト列の昇順に並べた (名称の位置, 名称の長さ, 値の位置, 値の長さ)
+#   文字列表: 名称とJSONで符号化した値を連結したもの
+MAGIC = b'LLCD'
+VERSION = 1
+_HEADER = struct.Struct('<4sIQQQ')
+_INDEX_DTYPE = np.dtype([
+    ('name_offset', '<u8'),
+    ('name_length', '<u4'),
+    ('value_offset', '<u8'),
+    ('value_length', '<u4'),
+])
+
+
+def _iter_entries(concepts: Union[Mapping[str, Any], Iterable[Dict[str, Any]]]) -> Iterator[Tuple[str, Any]]:
+    """名称をキーとする辞書、または name を持つオブジェクトのリストから (名称, 値) を取り出す"""
+    if isinstance(concepts, Mapping):
+        yield from concepts.items()
+    else:
+        for concept in concepts:
+            yield concept['name'], concept
+
+
+def write_concept_store(concepts: Union[Mapping[str, Any], Iterable[Dict[str, Any]]], path: str) -> int:
+    """
+    概念データをバイナリ形式で書き出す
+
+    Args:
+        concepts: 名称をキーとする辞書、または name を持つオブジェクトのリスト
+        path: 出力先のパス
+
+    Returns:
+        int: 書き出した概念の数
+    """
+    entries = sorted(
+        ((name.encode('utf-8'), json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+         for name, value in _iter_entries(concepts)),
+        key=lambda entry: entry[0]
+    )
+    index_offset = _HEADER.size
+    strings_offset = index_offset + len(entries) * _INDEX_DTYPE.itemsize
+
+    name_lengths = np.fromiter((len(name) for name, _ in entries), dtype=np.int64, count=len(entries))
+    value_lengths = np.fromiter((len(value) for _, value in entries), dtype=np.int64, count=len(entries))
+    ends = strings_offset + np.cumsum(name_lengths + value_lengths)
+    index = np.zeros(len(entries), dtype=_INDEX_DTYPE)
+    index['name_offset'] = ends - value_lengths - name_lengths
+    index['name_length'] = name_lengths
+    index['value_offset'] = ends - value_lengths
+    index['value_length'] = value_lengths
+
+    # 複数のワーカーが同時に変換しても互いの書きかけを置き換えないよう、
+    # 同じディレクトリの一意な一時ファイルに書いてから置き換える
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path) or '.', prefix=os.path.basename(path) + '.',
+                                     suffix='.tmp', delete=False) as f:
+        try:
+            f.write(_HEADER.pack(MAGIC, VERSION, len(entries), index_offset, strings_offset))
+            f.write(index.tobytes())
+            f.write(b''.join(part for entry in entries for part in entry))
+        except BaseException:
+            f.close()
+            os.unlink(f.name)
+            raise
+    os.replace(f.name, path)
+    return len(entries)
+
+
+def convert_json(json_path: str, store_path: Optional[str] = None) -> str:
+    """
+    JSON形式の概念データベースをバイナリ形式に変換する
+
+    Args:
+        json_path: 変換元のJSONファイル
+        store_path: 出力先（Noneの場合は拡張子を .bin に置き換えたパス）
+
+    Returns:
+        str: 出力先のパス
+    """
+    store_path = store_path or os.path.splitext(json_path)[0] + '.bin'
+    with open(json_path, 'r', encoding='utf-8') as f:
+        write_concept_store(json.load(f), store_path)
+    return store_path
+
+
+class ConceptStore(Mapping):
+    """
+    メモリマップしたバイナリ形式の概念データベース
+
+    ファイル全体を解析せずに開き、名称の索引を二分探索して O(log n) で参照する。
+    ページは読み取り専用でマップされるため、複数のワーカープロセス間で共有される
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: バイナリ形式のファイル
+
+        Raises:
+            ValueError: 形式が不正な場合
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, index_offset, _ = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mmap.close()
+            raise ValueError(f"Not a concept store file: {path}")
+        self._index = np.frombuffer(self._mmap, dtype=_INDEX_DTYPE, count=count, offset=index_offset)
+        # 索引の列ごとのビュー（コピーせずにマップしたページを参照する）
+        self._name_offsets = self._index['name_offset']
+        self._name_lengths = self._index['name_length']
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __getitem__(self, name: str) -> Any:
+        position = self._find(name.encode('utf-8'))
+        if position is None:
+            raise KeyError(name)
+        return self._value(position)
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and self._find(name.encode('utf-8')) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        for position in range(len(self._index)):
+            yield self._name(position).decode('utf-8')
+
+    def with_prefix(self, prefix: str) -> List[str]:
+        """名称が接頭辞に一致する概念の名称（名称順）"""
+        key = prefix.encode('utf-8')
+        names = []
+        for position in range(self._lower_bound(key), len(self._index)):
+            name = self._name(position)
+            if not name.startswith(key):
+                break
+            names.append(name.decode('utf-8'))
+        return names
+
+    def close(self) -> None:
+        # 索引のビューを解放してからマップを閉じる
+        self._index = self._index[:0].copy()
+        self._name_offsets = self._index['name_offset']
+        self._name_lengths = self._index['name_length']
+        self._mmap.close()
+
+    def _name(self, position: int) -> bytes:
+        start = self._name_offsets.item(position)
+        return self._mmap[start:start + self._name_lengths.item(position)]
+
+    def _value(self, position: int) -> Any:
+        start = self._index['value_offset'].item(position)
+        return json.loads(self._mmap[start:start + self._index['value_length'].item(position)])
+
+    def _lower_bound(self, key: bytes) -> int:
+        low, high = 0, len(self._index)
+        while low < high:
+            middle = (low + high) // 2
+            if self._name(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _find(self, key: bytes) -> Optional[int]:
+        position = self._lower_bound(key)
+        if position < len(self._index) and self._name(position) == key:
+            return position
+        return None
+
+
+if __name__ == '__main__':
+    import sys
+    print(convert_json(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None))
@@ -0,0 +1,108 @@
+from typing import Any, AsyncIterator, Dict, Optional
+import logging
+import os
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.models.proposition import Base
+
+DEFAULT_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./logiclens.db")
+
+# プロセス内で共有するエンジンとセッションファクトリ（URLごと）
+_engines: Dict[str, AsyncEngine] = {}
+_sessionmakers: Dict[str, async_sessionmaker] = {}
+_engines_lock = threading.Lock()
+
+
+def _engine_options(url: str) -> Dict[str, Any]:
+    """接続先に応じたコネクションプールの設定"""
+    if url.startswith("sqlite") and (":memory:" in url or url.rstrip("/").endswith(":")):
+        # インメモリDBは接続ごとに別のDBになるため、1つの接続を共有する
+        return {"poolclass": StaticPool, "connect_args": {"check_same_thread": False}}
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": True,
+    }
+
+
+def _configure_sqlite(dbapi_connection, connection_record) -> None:
+    """SQLiteの接続設定（WALにより読み込みが書き込みを待たないようにする）"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def get_engine(url: Optional[str] = None) -> AsyncEngine:
+    """
+    非同期エンジンを取得する（URLごとにプロセス内で1つだけ生成）
+
+    Args:
+        url: データベースURL（Noneの場合は環境変数 DATABASE_URL）
+
+    Returns:
+        AsyncEngine: 共有エンジン
+    """
+    url = url or DEFAULT_DATABASE_URL
+    engine = _engines.get(url)
+    if engine is None:
+        with _engines_lock:
+            if url not in _engines:
+                engine = create_async_engine(url, **_engine_options(url))
+                if url.startswith("sqlite"):
+                    event.listen(engine.sync_engine, "connect", _configure_sqlite)
+                _engines[url] = engine
+                _sessionmakers[url] = async_sessionmaker(engine, expire_on_commit=False)
+                logging.info(f"データベースエンジンを作成しました: {engine.url.render_as_string(hide_password=True)}")
+            engine = _engines[url]
+    return engine
+
+
+def get_sessionmaker(url: Optional[str] = None) -> async_sessionmaker:
+    """エンジンに対応するセッションファクトリを取得する"""
+    url = url or DEFAULT_DATABASE_URL
+    get_engine(url)
+    return _sessionmakers[url]
+
+
+async def get_session() -> AsyncIterator[AsyncSession]:
+    """
+    リクエストごとのセッションを提供する（FastAPIの依存関係として使用）
+
+    Yields:
+        AsyncSession: 非同期セッション
+    """
+    async with get_sessionmaker()() as session:
+        yield session
+
+
+def _create_indexes(connection) -> None:
+    """既存のテーブルに後から追加した索引を作成する（create_all はテーブル作成時にしか索引を作らない）"""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+async def init_models(url: Optional[str] = None) -> None:
+    """テーブルと索引が存在しない場合に作成する"""
+    async with get_engine(url).begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+        await connection.run_sync(_create_indexes)
+
+
+async def dispose_engines() -> None:
+    """全てのエンジンの接続を解放する"""
+    with _engines_lock:
+        engines = list(_engines.values())
+        _engines.clear()
+        _sessionmakers.clear()
+    for engine in engines:
+        await engine.dispose()
@@ -0,0 +1,354 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from array import array
+from dataclasses import dataclass
+import sys
+
+import numpy as np
+
+from app.core.experiment_engine import EvaluationResult, ExperimentEngine, ExperimentScenario
+
+
+@dataclass
+class ScenarioColumns:
+    """
+    複数シナリオの評価に必要な情報を列ごとの配列にまとめた構造（Struct of Arrays）
+
+    変数ごとの値は全シナリオ分を連結し、offsets で各シナリオの範囲を表す
+    """
+    condition_counts: np.ndarray
+    contradiction_counts: np.ndarray
+    variable_counts: np.ndarray
+    variable_valid: np.ndarray
+    variable_offsets: np.ndarray
+    outcome_counts: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.condition_counts)
+
+    @classmethod
+    def from_scenarios(cls,
+                       scenarios: Sequence[ExperimentScenario],
+                       engine: ExperimentEngine,
+                       consistency_issues: Optional[List[List[str]]] = None) -> 'ScenarioColumns':
+        """
+        シナリオ群から列データを構築する
+
+        条件間の矛盾は文字列の解析が必要なため、エンジンの索引付き検出で件数のみを求める
+
+        Args:
+            scenarios: 評価対象のシナリオ
+            engine: 矛盾検出に使う思考実験エンジン
+            consistency_issues: 検出済みの矛盾（省略時はここで検出する）
+
+        Returns:
+            ScenarioColumns: 列データ
+        """
+        if consistency_issues is None:
+            consistency_issues = find_contradictions(engine, scenarios)
+        variable_counts = np.fromiter((len(s.variables) for s in scenarios),
+                                      dtype=np.int64, count=len(scenarios))
+        name_lengths = np.fromiter((len(name) for s in scenarios for name in s.variables),
+                                   dtype=np.int64, count=int(variable_counts.sum()))
+        value_lengths = np.fromiter((len(value) for s in scenarios for value in s.variables.values()),
+                                    dtype=np.int64, count=int(variable_counts.sum()))
+        return cls(
+            condition_counts=np.fromiter((len(s.conditions) for s in scenarios),
+                                         dtype=np.int64, count=len(scenarios)),
+            contradiction_counts=np.fromiter((len(issues) for issues in consistency_issues),
+                                             dtype=np.int64, count=len(scenarios)),
+            variable_counts=variable_counts,
+            variable_valid=(name_lengths > 0) & (value_lengths > 0),
+            variable_offsets=np.concatenate(([0], np.cumsum(variable_counts))),
+            outcome_counts=np.fromiter((len(s.expected_outcomes) for s in scenarios),
+                                       dtype=np.int64, count=len(scenarios))
+        )
+
+
+def score_columns(columns: ScenarioColumns) -> Dict[str, np.ndarray]:
+    """
+    列データから問題件数・整合性スコア・有効判定をまとめて計算する
+
+    ExperimentEngine.evaluate_scenario と同じ計算式を配列演算で行う
+
+    Args:
+        columns: シナリオの列データ
+
+    Returns:
+        Dict[str, np.ndarray]: 'invalid_variables', 'missing_outcomes', 'issue_counts',
+            'consistency_scores', 'is_valid' の各配列
+    """
+    # シナリオごとの無効な変数の数（変数を持たないシナリオは0）
+    invalid = np.concatenate(([0], np.cumsum(~columns.variable_valid)))
+    invalid_variables = invalid[columns.variable_offsets[1:]] - invalid[columns.variable_offsets[:-1]]
+    missing_outcomes = (columns.outcome_counts == 0).astype(np.int64)
+
+    issue_counts = columns.contradiction_counts + invalid_variables + missing_outcomes
+    scores = np.clip(1.0 - (issue_counts * 0.1), 0.0, 1.0)
+    return {
+        'invalid_variables': invalid_variables,
+        'missing_outcomes': missing_outcomes,
+        'issue_counts': issue_counts,
+        'consistency_scores': scores,
+        'is_valid': scores > 0.7
+    }
+
+
+# 条件が命題変数を含む形（肯定の単純条件・否定の単純条件・複合条件の原子）
+_POSITIVE, _NEGATIVE, _COMPOUND = 0, 1, 2
+
+
+def _pairs_within_groups(groups: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    整列済みの配列で値が等しい連続区間ごとに、区間内の全ての組 (a, b)（a < b）の位置を列挙する
+
+    Args:
+        groups: 昇順に整列された区間の値
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: 組の前側・後側の位置
+    """
+    size = len(groups)
+    if size == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    starts = np.flatnonzero(np.concatenate(([True], groups[1:] != groups[:-1])))
+    ends = np.concatenate((starts[1:], [size]))
+    end_of = np.repeat(ends, np.diff(np.concatenate((starts, [size]))))
+    partners = end_of - np.arange(size) - 1
+    left = np.repeat(np.arange(size), partners)
+    first = np.cumsum(partners) - partners
+    right = left + 1 + np.arange(len(left)) - np.repeat(first, partners)
+    return left, right
+
+
+def find_contradictions(engine: ExperimentEngine, scenarios: Sequence[ExperimentScenario]) -> List[List[str]]:
+    """
+    複数シナリオの条件間の矛盾をまとめて検出する
+
+    ExperimentEngine._check_logical_consistency をシナリオごとに呼ぶ場合と同じ結果を返す。
+    異なる条件文はバッチ全体で1度だけ正規化し、(シナリオ, 命題変数) ごとの出現を配列に並べて
+    命題変数を共有する条件の組を配列演算で列挙する。単純な条件同士の組は符号の比較だけで
+    判定し、複合条件を含む組のみをソルバで判定する（同じ条件文の組の判定はバッチ内で再利用する）
+
+    Args:
+        engine: 条件の正規化と矛盾判定に使う思考実験エンジン
+        scenarios: 評価対象のシナリオ
+
+    Returns:
+        List[List[str]]: シナリオごとの矛盾の説明
+    """
+    table = StringTable()
+    occurrence_codes = np.fromiter(
+        (table.encode(condition) for scenario in scenarios for condition in scenario.conditions), dtype=np.int64
+    )
+    condition_counts = np.fromiter((len(s.conditions) for s in scenarios), dtype=np.int64, count=len(scenarios))
+    occurrence_scenarios = np.repeat(np.arange(len(scenarios)), condition_counts)
+
+    # 異なる条件文ごとの命題変数の番号と形（オフセットで条件文ごとの範囲を表す）
+    normalized = [engine._normalize_condition(condition) for condition in table.strings]
+    key_codes: Dict[str, int] = {}
+    literal_keys: List[int] = []
+    literal_kinds: List[int] = []
+    literal_counts = np.zeros(len(normalized), dtype=np.int64)
+    for code, (formula, literals) in enumerate(normalized):
+        if literals is not None:
+            items = [(key, _POSITIVE if sign else _NEGATIVE) for key, sign in literals.items()]
+        else:
+            items = [(key, _COMPOUND) for key in formula.atoms()]
+        for key, kind in items:
+            literal_keys.append(key_codes.setdefault(key, len(key_codes)))
+            literal_kinds.append(kind)
+        literal_counts[code] = len(items)
+    literal_offsets = np.concatenate(([0], np.cumsum(literal_counts)))
+    literal_keys = np.asarray(literal_keys, dtype=np.int64)
+    literal_kinds = np.asarray(literal_kinds, dtype=np.int8)
+
+    # 条件の出現ごとに命題変数を展開し、(シナリオ, 命題変数) の順に整列する
+    counts = literal_counts[occurrence_codes]
+    row_occurrences = np.repeat(np.arange(len(occurrence_codes)), counts)
+    row_literals = literal_offsets[occurrence_codes][row_occurrences] + \
+        np.arange(len(row_occurrences)) - np.repeat(np.cumsum(counts) - counts, counts)
+    groups = occurrence_scenarios[row_occurrences] * max(len(key_codes), 1) + literal_keys[row_literals]
+    order = np.argsort(groups, kind='stable')
+    left, right = _pairs_within_groups(groups[order])
+    first = row_occurrences[order[left]]
+    second = row_occurrences[order[right]]
+    first_kinds = literal_kinds[row_literals[order[left]]]
+    second_kinds = literal_kinds[row_literals[order[right]]]
+
+    # 組を出現番号（シナリオ内では条件の位置の順）の昇順の1つの整数に符号化する
+    size = max(len(occurrence_codes), 1)
+    pair_codes = np.minimum(first, second) * size + np.maximum(first, second)
+    opposite = ((first_kinds == _POSITIVE) & (second_kinds == _NEGATIVE)) | \
+        ((first_kinds == _NEGATIVE) & (second_kinds == _POSITIVE))
+    compound = (first_kinds == _COMPOUND) | (second_kinds == _COMPOUND)
+    contradictory = np.unique(pair_codes[opposite])
+    checked = np.unique(pair_codes[compound])
+    if len(checked):
+        verdicts: Dict[Tuple[int, int], bool] = {}
+        keep = np.zeros(len(checked), dtype=bool)
+        for index, (i, j) in enumerate(zip((checked // size).tolist(), (checked % size).tolist())):
+            ci, cj = int(occurrence_codes[i]), int(occurrence_codes[j])
+            verdict = verdicts.get((ci, cj))
+            if verdict is None:
+                verdict = verdicts[(ci, cj)] = engine._are_normalized_contradictory(normalized[ci], normalized[cj])
+            keep[index] = verdict
+        contradictory = np.union1d(contradictory, checked[keep])
+
+    issues: List[List[str]] = [[] for _ in scenarios]
+    strings = table.strings
+    for i, j in zip((contradictory // size).tolist(), (contradictory % size).tolist()):
+        issues[occurrence_scenarios[i]].append(
+            sys.intern(f"条件の矛盾: {strings[occurrence_codes[i]]} vs {strings[occurrence_codes[j]]}")
+        )
+    return issues
+
+
+def evaluate_batch(engine: ExperimentEngine,
+                   scenarios: Sequence[ExperimentScenario]) -> List[EvaluationResult]:
+    """
+    複数のシナリオをまとめて評価する
+
+    評価時間の大半を占める条件間の矛盾検出は find_contradictions でバッチ全体をまとめて行い
+    （条件文の正規化は異なる文ごとに1回、単純な条件同士の組は配列演算で判定）、
+    スコアと有効判定は列データに対する配列演算で求める。条件文の解析そのものは文ごとに
+    必要なため、異なる条件文が大半を占めるバッチでは解析が処理時間の大半を占め、差は小さい
+    （ベンチマークの experiment スイートの large と templated を参照）。
+    問題点・提案・推論経路の文字列はスカラー版と同じ内容を組み立てる
+
+    Args:
+        engine: 思考実験エンジン
+        scenarios: 評価対象のシナリオ
+
+    Returns:
+        List[EvaluationResult]: evaluate_scenario と同一の評価結果
+    """
+    scenarios = list(scenarios)
+    try:
+        consistency_issues = find_contradictions(engine, scenarios)
+        columns = ScenarioColumns.from_scenarios(scenarios, engine, consistency_issues)
+    except Exception:
+        # 列データを構築できない場合はスカラー版でエラー処理を含めて評価する
+        return [engine.evaluate_scenario(s) for s in scenarios]
+    scored = score_columns(columns)
+
+    results = []
+    for i, scenario in enumerate(scenarios):
+        issues = list(consistency_issues[i])
+        if scored['invalid_variables'][i]:
+            issues += [sys.intern(f"無効な変数定義: {name}") for name, value in scenario.variables.items()
+                       if not engine._is_variable_valid(name, value)]
+        if scored['missing_outcomes'][i]:
+            issues.append("期待される結果が定義されていません")
+        results.append(EvaluationResult(
+            is_valid=bool(scored['is_valid'][i]),
+            consistency_score=float(scored['consistency_scores'][i]),
+            logical_issues=issues,
+            suggestions=engine._generate_suggestions(issues),
+            reasoning_path=engine._generate_reasoning_path(scenario)
+        ))
+    return results
+
+
+class StringTable:
+    """文字列を重複なく保持し、整数の番号と相互に変換する表"""
+
+    def __init__(self):
+        self.strings: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def encode(self, value: str) -> int:
+        """文字列の番号を返す（未登録の場合は追加する）"""
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.strings)
+            value = sys.intern(value)
+            self.strings.append(value)
+            self._codes[value] = code
+        return code
+
+    def decode(self, code: int) -> str:
+        return self.strings[code]
+
+
+class EvaluationColumns:
+    """
+    大量の評価結果を列ごとの配列で保持するコンテナ
+
+    判定とスコアは型付き配列に、問題点・提案・推論経路は共有の文字列表の番号列と
+    各結果の範囲を表すオフセットに格納するため、結果1件ごとのオブジェクトを持たない。
+    要素を参照したときに EvaluationResult を組み立てて返す
+    """
+
+    _LIST_FIELDS = ('logical_issues', 'suggestions', 'reasoning_path')
+
+    def __init__(self, results: Iterable[EvaluationResult] = ()):
+        """
+        Args:
+            results: 最初に追加する評価結果
+        """
+        self.strings = StringTable()
+        self._is_valid = array('b')
+        self._scores = array('d')
+        self._codes = {name: array('i') for name in self._LIST_FIELDS}
+        self._offsets = {name: array('q', [0]) for name in self._LIST_FIELDS}
+        self.extend(results)
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def append(self, result: EvaluationResult) -> None:
+        """評価結果を追加する"""
+        self._is_valid.append(int(result.is_valid))
+        self._scores.append(result.consistency_score)
+        for name in self._LIST_FIELDS:
+            codes = self._codes[name]
+            codes.extend(self.strings.encode(value) for value in getattr(result, name))
+            self._offsets[name].append(len(codes))
+
+    def extend(self, results: Iterable[EvaluationResult]) -> None:
+        """複数の評価結果を追加する"""
+        for result in results:
+            self.append(result)
+
+    def __getitem__(self, index: int) -> EvaluationResult:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("EvaluationColumns index out of range")
+        return EvaluationResult(
+            is_valid=bool(self._is_valid[index]),
+            consistency_score=self._scores[index],
+            **{name: self._strings_at(name, index) for name in self._LIST_FIELDS}
+        )
+
+    def __iter__(self) -> Iterator[EvaluationResult]:
+        for index in range(len(self)):
+            yield self[index]
+
+    @property
+    def is_valid(self) -> np.ndarray:
+        """有効判定の配列"""
+        return np.frombuffer(self._is_valid, dtype=np.int8).astype(bool)
+
+    @property
+    def consistency_scores(self) -> np.ndarray:
+        """整合性スコアの配列（追加を妨げないようコピーを返す）"""
+        return np.frombuffer(self._scores, dtype=np.float64).copy()
+
+    def issue_counts(self) -> np.ndarray:
+        """結果ごとの問題点の数"""
+        return np.diff(np.frombuffer(self._offsets['logical_issues'], dtype=np.int64))
+
+    @property
+    def nbytes(self) -> int:
+        """配列部分の使用バイト数（文字列表を除く）"""
+        buffers = [self._is_valid, self._scores, *self._codes.values(), *self._offsets.values()]
+        return sum(buffer.itemsize * len(buffer) for buffer in buffers)
+
+    def _strings_at(self, name: str, index: int) -> List[str]:
+        offsets = self._offsets[name]
+        decode = self.strings.decode
+        return [decode(code) for code in self._codes[name][offsets[index]:offsets[index + 1]]]
@@ -1,11 +1,69 @@
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
+from collections import OrderedDict
 from datetime import datetime
-import json
+from itertools import combinations
 import logging
+import re
+import sys
 from dataclasses import dataclass
 
+from app.core.propositional import (
+    AND,
+    ATOM,
+    NOT,
+    Formula,
+    FormulaParser,
+    atom,
+    is_satisfiable,
+    map_atoms,
+    neg
+)
+from app.core.support_graph import lemma_sequence_key, simple_lemmas
+from app.core.template_registry import DEFAULT_TEMPLATES_PATH, TemplateRegistry, get_template_registry
+
+# 条件文の正規化結果を保持する最大件数
+CONDITION_CACHE_SIZE = 4096
+
+# 日本語（かな・漢字・全角文字）を含む条件文の判定
+_JA_CHARS = re.compile(r'[\u3040-\u30ff\u3400-\u9fff\uff00-\uffef]')
+
+# 日本語の条件文で否定を表す文末表現と、対応する肯定形の文末（長いものから順に照合する）
+_JA_NEGATIVE_ENDINGS = (
+    ('ではありません', ''), ('ていません', 'ている'), ('でいません', 'でいる'),
+    ('ていない', 'ている'), ('でいない', 'でいる'), ('ではない', ''), ('じゃない', ''),
+    ('しません', 'する'), ('がない', 'がある'), ('はない', 'はある'), ('もない', 'もある'),
+    ('でない', ''), ('しない', 'する'), ('こない', 'くる'), ('ません', 'ます'),
+)
+# 五段動詞の未然形（ア段）から終止形（ウ段）への対応（「持たない」→「持つ」）
+_JA_GODAN = dict(zip('かがさたなばまらわ', 'くぐすつぬぶむるう'))
+# 肯定形の文末から取り除く断定の助動詞
+_JA_COPULAS = ('である', 'です', 'だ')
+
+
+def _normalize_japanese(text: str) -> Tuple[str, bool]:
+    """
+    日本語の条件文を文末の否定表現を除いた肯定形と否定の有無に分ける
+
+    Returns:
+        Tuple[str, bool]: 肯定形の文（語順はそのまま）と、否定文かどうか
+    """
+    negated = False
+    for ending, affirmative in _JA_NEGATIVE_ENDINGS:
+        if text.endswith(ending) and len(text) > len(ending):
+            text, negated = text[:-len(ending)] + affirmative, True
+            break
+    else:
+        if text.endswith('ない') and len(text) > 2:
+            stem, last = text[:-3], text[-3]
+            text, negated = (stem + _JA_GODAN[last] if last in _JA_GODAN else text[:-2] + 'る'), True
+    for copula in _JA_COPULAS:
+        if text.endswith(copula) and len(text) > len(copula):
+            text = text[:-len(copula)]
+            break
+    return text, negated
+
 # 思考実験のシナリオを表すデータクラス
-@dataclass
+@dataclass(slots=True)
 class ExperimentScenario:
     id: str
     title: str
@@ -16,8 +74,8 @@ class ExperimentScenario:
     created_at: datetime
     updated_at: datetime
 
-# 思考実験の評価結果を表すデータクラス
-@dataclass
+# 思考実験の評価結果を表すデータクラス（問題点・提案・推論経路の文字列は intern 済み）
+@dataclass(slots=True)
 class EvaluationResult:
     is_valid: bool
     consistency_score: float
@@ -31,43 +89,49 @@ class ExperimentEngine:
     思考実験の生成、評価、分析を行うためのコアエンジン
     """
     
-    def __init__(self):
+    def __init__(self, templates_path: str = DEFAULT_TEMPLATES_PATH):
         self.logger = logging.getLogger(__name__)
-        self.template_library = {}
+        self.templates_path = templates_path
+        self.registry: Optional[TemplateRegistry] = None
+        self.parser = FormulaParser()
+        # 条件文ごとの正規化結果（論理式と、単純な場合の符号付き命題変数、最近使った順）
+        self._condition_cache: 'OrderedDict[str, Tuple[Formula, Optional[Dict[str, bool]]]]' = OrderedDict()
         self._load_templates()
 
     def _load_templates(self) -> None:
-        """定義済みの思考実験テンプレートを読み込む"""
-        try:
-            with open('templates/experiment_templates.json', 'r') as f:
-                self.template_library = json.load(f)
-        except FileNotFoundError:
-            self.logger.warning("テンプレートファイルが見つかりません")
-            self.template_library = {}
+        """定義済みの思考実験テンプレートを読み込む（プロセス内の共有レジストリを使用）"""
+        self.registry = get_template_registry(self.templates_path)
+
+    @property
+    def template_library(self) -> Dict[str, Dict[str, Any]]:
+        """カテゴリをキーとするテンプレート（ファイル更新時は自動的に再読み込みされる）"""
+        return self.registry.templates
 
     def generate_template(self, 
                         category: str, 
-                        complexity: int = 1) -> Optional[ExperimentScenario]:
+                        complexity: int = 1,
+                        variables: Optional[Dict[str, str]] = None) -> Optional[ExperimentScenario]:
         """指定されたカテゴリと複雑さに基づいてテンプレートを生成
 
         Args:
             category: 思考実験のカテゴリ（倫理、認識論、形而上学など）
             complexity: 実験の複雑さレベル（1-5）
+            variables: シナリオに割り当てる変数の値
 
         Returns:
             生成されたExperimentScenarioオブジェクト、失敗時はNone
         """
         try:
-            if category not in self.template_library:
+            template_base = self.registry.get(category)
+            if template_base is None:
                 self.logger.error(f"未知のカテゴリ: {category}")
                 return None
 
-            template_base = self.template_library[category]
             scenario = ExperimentScenario(
                 id=f"exp_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
                 title=template_base["title_template"],
                 description=template_base["description_template"],
-                variables={},
+                variables=dict(variables or {}),
                 conditions=template_base["base_conditions"][:complexity],
                 expected_outcomes=[],
                 created_at=datetime.now(),
@@ -127,13 +191,45 @@ class ExperimentEngine:
             )
 
     def _check_logical_consistency(self, scenario: ExperimentScenario) -> List[str]:
-        """論理的整合性のチェック"""
+        """
+        論理的整合性のチェック
+
+        条件を符号付き命題変数に正規化してキーごとに索引付けし、
+        キーを共有する条件の組だけを矛盾の候補として比較する
+        """
+        conditions = scenario.conditions
+        normalized = [self._normalize_condition(c) for c in conditions]
+
+        # 命題変数のキー → 肯定/否定で現れる単純条件、および複合条件
+        positive: Dict[str, List[int]] = {}
+        negative: Dict[str, List[int]] = {}
+        compound: Dict[str, List[int]] = {}
+        for i, (formula, literals) in enumerate(normalized):
+            if literals is not None:
+                for key, sign in literals.items():
+                    (positive if sign else negative).setdefault(key, []).append(i)
+            else:
+                for key in formula.atoms():
+                    compound.setdefault(key, []).append(i)
+
+        candidates: Set[Tuple[int, int]] = set()
+        for key, negatives in negative.items():
+            for i in positive.get(key, []):
+                for j in negatives:
+                    candidates.add((min(i, j), max(i, j)))
+        for key, members in compound.items():
+            simple = positive.get(key, []) + negative.get(key, [])
+            for i in members:
+                for j in simple:
+                    candidates.add((min(i, j), max(i, j)))
+            for i, j in combinations(members, 2):
+                candidates.add((i, j))
+
         issues = []
-        # 条件間の矛盾チェック
-        for i, condition1 in enumerate(scenario.conditions):
-            for condition2 in scenario.conditions[i+1:]:
-                if self._are_conditions_contradictory(condition1, condition2):
-                    issues.append(f"条件の矛盾: {condition1} vs {condition2}")
+        # 条件間の矛盾チェック（候補の組のみ）
+        for i, j in sorted(candidates):
+            if i != j and self._are_conditions_contradictory(conditions[i], conditions[j]):
+                issues.append(sys.intern(f"条件の矛盾: {conditions[i]} vs {conditions[j]}"))
         return issues
 
     def _check_variable_dependencies(self, scenario: ExperimentScenario) -> List[str]:
@@ -141,7 +237,7 @@ class ExperimentEngine:
         issues = []
         for var_name, var_value in scenario.variables.items():
             if not self._is_variable_valid(var_name, var_value):
-                issues.append(f"無効な変数定義: {var_name}")
+                issues.append(sys.intern(f"無効な変数定義: {var_name}"))
         return issues
 
     def _check_outcome_predictability(self, scenario: ExperimentScenario) -> List[str]:
@@ -166,16 +262,76 @@ class ExperimentEngine:
     def _generate_reasoning_path(self, scenario: ExperimentScenario) -> List[str]:
         """思考実験の推論経路を生成"""
         path = []
-        path.append(f"前提条件の確認: {len(scenario.conditions)}個の条件")
-        path.append(f"変数の初期化: {len(scenario.variables)}個の変数")
+        path.append(sys.intern(f"前提条件の確認: {len(scenario.conditions)}個の条件"))
+        path.append(sys.intern(f"変数の初期化: {len(scenario.variables)}個の変数"))
         path.append("論理的推論の実行")
-        path.append(f"結果の導出: {len(scenario.expected_outcomes)}個の予測")
+        path.append(sys.intern(f"結果の導出: {len(scenario.expected_outcomes)}個の予測"))
         return path
 
     def _are_conditions_contradictory(self, condition1: str, condition2: str) -> bool:
         """条件間の矛盾をチェック"""
-        # 実際の実装ではより複雑な論理チェックを行う
-        return False
+        return self._are_normalized_contradictory(self._normalize_condition(condition1),
+                                                  self._normalize_condition(condition2))
+
+    @staticmethod
+    def _are_normalized_contradictory(normalized1: Tuple[Formula, Optional[Dict[str, bool]]],
+                                      normalized2: Tuple[Formula, Optional[Dict[str, bool]]]) -> bool:
+        """正規化済みの条件（_normalize_condition の戻り値）の間の矛盾をチェック"""
+        formula1, literals1 = normalized1
+        formula2, literals2 = normalized2
+        if literals1 is not None and literals2 is not None:
+            return any(key in literals2 and literals2[key] != sign
+                       for key, sign in literals1.items())
+        # 単純な比較で判定できない場合のみソルバを使う
+        return is_satisfiable([formula1, formula2], time_budget=0.05) is False
+
+    def _normalize_condition(self, condition: str) -> Tuple[Formula, Optional[Dict[str, bool]]]:
+        """
+        条件文を見出し語キーの命題変数からなる論理式に正規化する
+
+        命題変数のキーは否定語を除いた文全体を語順を保って正規化したもので、
+        語順の異なる文（「犬が人を噛む」と「人が犬を噛む」）は別の命題変数になる
+
+        Returns:
+            Tuple[Formula, Optional[Dict[str, bool]]]: 論理式と、命題変数またはその否定の
+                論理積で表せる場合の符号付き命題変数（それ以外はNone）
+        """
+        cached = self._condition_cache.get(condition)
+        if cached is not None:
+            self._condition_cache.move_to_end(condition)
+            return cached
+
+        formula = None
+        if not _JA_CHARS.search(condition):
+            try:
+                formula = map_atoms(self.parser.parse(condition),
+                                    lambda name: lemma_sequence_key(simple_lemmas(name)) or name)
+            except ValueError:
+                pass
+        if formula is None:
+            # 英語として解析できない条件（日本語など）は文全体を1つの命題変数とし、文末の否定表現のみを扱う
+            text, negated = _normalize_japanese(condition.strip().rstrip('。.'))
+            formula = neg(atom(text)) if negated else atom(text)
+
+        literals: Optional[Dict[str, bool]] = {}
+        for part in (formula.args if formula.op == AND else (formula,)):
+            if part.op == ATOM:
+                sign, name = True, part.args[0]
+            elif part.op == NOT and part.args[0].op == ATOM:
+                sign, name = False, part.args[0].args[0]
+            else:
+                literals = None
+                break
+            if literals.get(name, sign) != sign:
+                # 条件自体が矛盾している場合は複合条件として扱う
+                literals = None
+                break
+            literals[name] = sign
+
+        self._condition_cache[condition] = (formula, literals)
+        if len(self._condition_cache) > CONDITION_CACHE_SIZE:
+            self._condition_cache.popitem(last=False)
+        return formula, literals
 
     def _is_variable_valid(self, var_name: str, var_value: str) -> bool:
         """変数の有効性をチェック"""
@@ -0,0 +1,197 @@
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice, product
+import logging
+import math
+import os
+import random
+
+from app.core.experiment_engine import EvaluationResult, ExperimentEngine
+from app.core.template_registry import DEFAULT_TEMPLATES_PATH
+
+# ワーカープロセス内で共有する思考実験エンジン
+_worker_engine: Optional[ExperimentEngine] = None
+
+
+def _init_worker(templates_path: str = DEFAULT_TEMPLATES_PATH) -> None:
+    """ワーカープロセスの初期化（テンプレートを1度だけ読み込む）"""
+    global _worker_engine
+    _worker_engine = ExperimentEngine(templates_path)
+
+
+def _evaluate_chunk(category: str,
+                    complexity: int,
+                    assignments: List[Dict[str, str]],
+                    engine: Optional[ExperimentEngine] = None) -> List[EvaluationResult]:
+    """変数割り当てのまとまりからシナリオを生成して評価する"""
+    engine = engine or _worker_engine
+    results = []
+    for variables in assignments:
+        scenario = engine.generate_template(category, complexity, variables)
+        if scenario is None:
+            results.append(EvaluationResult(
+                is_valid=False,
+                consistency_score=0.0,
+                logical_issues=[f"未知のカテゴリ: {category}"],
+                suggestions=[],
+                reasoning_path=[]
+            ))
+        else:
+            results.append(engine.evaluate_scenario(scenario))
+    return results
+
+
+@dataclass
+class SweepStatistics:
+    """スイープ全体の整合性スコアの集計（逐次更新）"""
+    count: int = 0
+    valid_count: int = 0
+    mean: float = 0.0
+    min_score: float = math.inf
+    max_score: float = -math.inf
+    _m2: float = field(default=0.0, repr=False)
+
+    def add(self, result: EvaluationResult) -> None:
+        """評価結果を集計に加える（Welfordの方法で平均と分散を更新）"""
+        score = result.consistency_score
+        self.count += 1
+        self.valid_count += int(result.is_valid)
+        delta = score - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (score - self.mean)
+        self.min_score = min(self.min_score, score)
+        self.max_score = max(self.max_score, score)
+
+    @property
+    def variance(self) -> float:
+        """整合性スコアの標本分散"""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        """集計結果を辞書形式に変換"""
+        return {
+            "count": self.count,
+            "valid_count": self.valid_count,
+            "valid_ratio": self.valid_count / self.count if self.count else 0.0,
+            "mean": self.mean,
+            "std": math.sqrt(self.variance),
+            "min": self.min_score if self.count else 0.0,
+            "max": self.max_score if self.count else 0.0
+        }
+
+
+class ScenarioSweep:
+    """
+    変数の組み合わせを網羅・標本抽出して思考実験シナリオを一括評価する
+
+    変数割り当ては遅延生成し、プロセスプールへはまとまり（チャンク）単位で
+    一定数だけ先行投入するため、大規模なスイープでも全件をメモリに保持しない
+    """
+
+    def __init__(self,
+                 category: str,
+                 grid: Dict[str, Sequence[str]],
+                 complexity: int = 1,
+                 samples: Optional[int] = None,
+                 seed: Optional[int] = None,
+                 templates_path: str = DEFAULT_TEMPLATES_PATH):
+        """
+        Args:
+            category: 思考実験のカテゴリ
+            grid: 変数名ごとの候補値
+            complexity: 実験の複雑さレベル（1-5）
+            samples: 標本抽出する組み合わせ数（Noneの場合は全組み合わせ）
+            seed: 標本抽出の乱数シード
+            templates_path: テンプレートファイルのパス（ワーカープロセスでも同じファイルを使う）
+        """
+        self.logger = logging.getLogger(__name__)
+        self.category = category
+        self.names = list(grid)
+        self.values = [list(grid[name]) for name in self.names]
+        self.complexity = complexity
+        self.samples = samples
+        self.seed = seed
+        self.templates_path = templates_path
+        self.statistics = SweepStatistics()
+
+    @property
+    def total(self) -> int:
+        """全組み合わせ数"""
+        return math.prod(len(values) for values in self.values)
+
+    def __len__(self) -> int:
+        return self.total if self.samples is None else min(self.samples, self.total)
+
+    def assignments(self) -> Iterator[Dict[str, str]]:
+        """変数割り当てを遅延生成する"""
+        if self.samples is None or self.samples >= self.total:
+            for combination in product(*self.values):
+                yield dict(zip(self.names, combination))
+            return
+        # 組み合わせ番号を重複なく抽出し、混合基数として各変数の値に復元する
+        rng = random.Random(self.seed)
+        for index in rng.sample(range(self.total), self.samples):
+            assignment = {}
+            for name, values in zip(reversed(self.names), reversed(self.values)):
+                index, position = divmod(index, len(values))
+                assignment[name] = values[position]
+            yield {name: assignment[name] for name in self.names}
+
+    def run(self,
+            max_workers: Optional[int] = None,
+            chunksize: int = 256) -> Iterator[Tuple[Dict[str, str], EvaluationResult]]:
+        """
+        スイープを実行し、変数割り当てと評価結果を入力順に返す
+
+        statistics は実行ごとに初期化され、その実行の結果のみを集計する
+
+        Args:
+            max_workers: ワーカープロセス数（1の場合はプロセスを使わずに実行）
+            chunksize: 1回の投入にまとめる割り当て数
+
+        Yields:
+            Tuple[Dict[str, str], EvaluationResult]: 変数割り当てと評価結果
+        """
+        self.statistics = SweepStatistics()
+        chunks = self._chunks(chunksize)
+        if max_workers == 1:
+            engine = ExperimentEngine(self.templates_path)
+            for chunk in chunks:
+                yield from self._collect(chunk, _evaluate_chunk(
+                    self.category, self.complexity, chunk, engine))
+            return
+
+        workers = max_workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(self.templates_path,)) as executor:
+            # 先行投入するチャンク数をワーカー数の2倍に抑える
+            in_flight = 2 * workers
+            pending: 'deque[Tuple[List[Dict[str, str]], Future]]' = deque()
+            for chunk in islice(chunks, in_flight):
+                pending.append((chunk, self._submit(executor, chunk)))
+            while pending:
+                chunk, future = pending.popleft()
+                following = next(chunks, None)
+                if following is not None:
+                    pending.append((following, self._submit(executor, following)))
+                yield from self._collect(chunk, future.result())
+
+    def _submit(self, executor: ProcessPoolExecutor, chunk: List[Dict[str, str]]) -> Future:
+        return executor.submit(_evaluate_chunk, self.category, self.complexity, chunk)
+
+    def _chunks(self, chunksize: int) -> Iterator[List[Dict[str, str]]]:
+        assignments = self.assignments()
+        while True:
+            chunk = list(islice(assignments, chunksize))
+            if not chunk:
+                return
+            yield chunk
+
+    def _collect(self,
+                 chunk: List[Dict[str, str]],
+                 results: List[EvaluationResult]) -> Iterator[Tuple[Dict[str, str], EvaluationResult]]:
+        for assignment, result in zip(chunk, results):
+            self.statistics.add(result)
+            yield assignment, result
@@ -0,0 +1,301 @@
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+from collections import deque
+from dataclasses import dataclass, field
+import logging
+
+from app.core.propositional import Formula
+from app.core.support_graph import SupportCycle
+
+# 手がかりが出現した位置の区分
+PREMISE = 'premise'
+CONCLUSION = 'conclusion'
+
+
+class AhoCorasick:
+    """
+    複数の語句を1回の走査で検出するAho-Corasickオートマトン
+
+    語句は小文字で登録し、単語境界に一致する出現のみを報告する
+    """
+
+    def __init__(self, phrases: Dict[str, str]):
+        """
+        Args:
+            phrases: 語句とその識別子の対応
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, str]]] = [[]]
+        for phrase, key in phrases.items():
+            self._insert(phrase.lower(), key)
+        self._build()
+
+    def _insert(self, phrase: str, key: str) -> None:
+        state = 0
+        for char in phrase:
+            if char not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][char] = len(self._goto) - 1
+            state = self._goto[state][char]
+        self._output[state].append((len(phrase), key))
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                if state:
+                    fallback = self._fail[state]
+                    while fallback and char not in self._goto[fallback]:
+                        fallback = self._fail[fallback]
+                    self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """
+        テキスト中の登録語句を検出する
+
+        Args:
+            text: 走査対象のテキスト
+
+        Yields:
+            Tuple[int, int, str]: 開始位置・終了位置・識別子
+        """
+        text = text.lower()
+        state = 0
+        for end, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for length, key in self._output[state]:
+                start = end - length + 1
+                before_ok = start == 0 or not text[start - 1].isalnum()
+                after_ok = end + 1 == len(text) or not text[end + 1].isalnum()
+                if before_ok and after_ok:
+                    yield start, end + 1, key
+
+
+@dataclass(frozen=True)
+class Cue:
+    """誤謬の手がかりとなるパターン"""
+    id: str
+    kind: str  # 'lexical', 'token', 'dependency'
+    patterns: Tuple[Any, ...]
+
+
+@dataclass(frozen=True)
+class FallacyRule:
+    """
+    誤謬の検出規則
+
+    requires の全ての手がかり（位置区分を指定した場合はその区分内）が出現し、
+    structural の構造条件を満たすときに fallacy を報告する
+    """
+    fallacy: str
+    requires: Tuple[Tuple[str, Optional[str]], ...] = ()
+    structural: Optional[str] = None
+
+
+@dataclass
+class ArgumentContext:
+    """構造条件の評価に使う論証の情報"""
+    premises: List[str]
+    conclusion: str
+    premise_formulas: List[Formula]
+    conclusion_formula: Optional[Formula]
+    support_cycles: List[SupportCycle] = field(default_factory=list)
+    # 前提・結論の順に並んだ各文の解析結果（spaCyの Span または Doc、無い場合はNone）
+    sentences: Optional[List[Any]] = None
+
+
+def _conclusion_restates_premise(context: ArgumentContext) -> bool:
+    """結論が前提のいずれかと同一の論理式である"""
+    return context.conclusion_formula is not None and \
+        any(f is context.conclusion_formula for f in context.premise_formulas)
+
+
+def _support_cycle(context: ArgumentContext) -> bool:
+    """前提と結論の支持関係に循環がある"""
+    return bool(context.support_cycles)
+
+
+STRUCTURAL_CHECKS: Dict[str, Callable[[ArgumentContext], bool]] = {
+    'conclusion_restates_premise': _conclusion_restates_premise,
+    'support_cycle': _support_cycle,
+}
+
+# 1語の否定・時間表現（never, none, after, once など）は普通の文にも頻出するため、
+# 誤謬の手がかりには複数語の表現のみを使う
+_QUANTIFIERS = ('all', 'every', 'everyone', 'everybody', 'always', 'nobody', 'no one',
+                'none of them', 'none of the', 'will never', 'can never', 'never ever')
+_PRONOUNS = ['you', 'he', 'she', 'they', 'opponent', 'critic', 'critics']
+_INSULTS = ['idiot', 'fool', 'stupid', 'liar', 'hypocrite', 'ignorant', 'moron',
+            'incompetent', 'biased', 'dishonest', 'corrupt', 'crazy']
+
+DEFAULT_CUES: Tuple[Cue, ...] = (
+    Cue('personal_attack', 'lexical', (
+        'what do you know', 'coming from someone who', 'you would say that',
+        'of course you would say', 'consider the source', 'you are just',
+        "you're just", 'people like you',
+    )),
+    Cue('insult_attribute', 'dependency', (
+        [
+            {'RIGHT_ID': 'verb', 'RIGHT_ATTRS': {'LEMMA': 'be'}},
+            {'LEFT_ID': 'verb', 'REL_OP': '>', 'RIGHT_ID': 'subject',
+             'RIGHT_ATTRS': {'DEP': 'nsubj', 'LOWER': {'IN': _PRONOUNS}}},
+            {'LEFT_ID': 'verb', 'REL_OP': '>>', 'RIGHT_ID': 'insult',
+             'RIGHT_ATTRS': {'LEMMA': {'IN': _INSULTS}}},
+        ],
+    )),
+    Cue('misrepresentation', 'lexical', (
+        'so you are saying', "so you're saying", 'what you really mean',
+        'what you are really saying', 'in other words, you', 'so you think',
+        'so you want', 'you basically want',
+    )),
+    Cue('restated_position', 'token', (
+        [{'LOWER': 'so'}, {'LOWER': 'you'}, {'OP': '?'},
+         {'LEMMA': {'IN': ['say', 'mean', 'claim', 'believe', 'want']}}],
+    )),
+    Cue('exclusive_options', 'lexical', (
+        'only two options', 'only two choices', 'only two possibilities',
+        'no middle ground', 'no other choice', 'no other option', 'no alternative',
+        'with us or against us', 'the only alternative',
+    )),
+    Cue('either_or', 'token', (
+        [{'LOWER': 'either'}, {'IS_PUNCT': False, 'OP': '+'}, {'LOWER': 'or'}],
+    )),
+    Cue('temporal_sequence', 'lexical', (
+        'ever since', 'since then', 'right after', 'shortly after', 'soon after',
+        'just after', 'not long after', 'after that', 'followed by', 'and then',
+    )),
+    Cue('causal_claim', 'lexical', (
+        'caused', 'causes', 'cause of', 'because of', 'led to', 'leads to',
+        'result of', 'resulted in', 'responsible for', 'due to',
+    )),
+    Cue('universal_quantifier', 'lexical', _QUANTIFIERS),
+    Cue('anecdotal_evidence', 'lexical', (
+        'i know', 'my friend', 'my neighbor', 'one time', 'i once', 'once i',
+        'a few of my', 'a few people i', 'i met', 'i saw', 'in my experience', 'someone i know',
+    )),
+)
+
+DEFAULT_RULES: Tuple[FallacyRule, ...] = (
+    FallacyRule('ad_hominem', requires=(('personal_attack', None),)),
+    FallacyRule('ad_hominem', requires=(('insult_attribute', None),)),
+    FallacyRule('straw_man', requires=(('misrepresentation', None),)),
+    FallacyRule('straw_man', requires=(('restated_position', None),)),
+    FallacyRule('false_dichotomy', requires=(('exclusive_options', None),)),
+    FallacyRule('false_dichotomy', requires=(('either_or', CONCLUSION),)),
+    FallacyRule('post_hoc', requires=(('temporal_sequence', None), ('causal_claim', CONCLUSION))),
+    FallacyRule('hasty_generalization',
+                requires=(('universal_quantifier', CONCLUSION), ('anecdotal_evidence', PREMISE))),
+    FallacyRule('circular_reasoning', structural='conclusion_restates_premise'),
+    FallacyRule('circular_reasoning', structural='support_cycle'),
+)
+
+
+class FallacyRuleEngine:
+    """
+    データ駆動の誤謬検出エンジン
+
+    語句の手がかりはAho-Corasickオートマトンに、トークン・依存構造の手がかりは
+    spaCyの Matcher / DependencyMatcher にまとめて1度だけコンパイルする。
+    検出時は論証全体を1回走査し、得られた手がかりの集合に対して全規則を評価する
+    """
+
+    def __init__(self,
+                 rules: Tuple[FallacyRule, ...] = DEFAULT_RULES,
+                 cues: Tuple[Cue, ...] = DEFAULT_CUES,
+                 nlp: Optional[Any] = None):
+        """
+        Args:
+            rules: 検出規則
+            cues: 手がかりの定義
+            nlp: spaCyモデル（Noneの場合はトークン・依存構造の手がかりを使用しない）
+        """
+        self.logger = logging.getLogger(__name__)
+        self.rules = rules
+        self.nlp = nlp
+        self._automaton = AhoCorasick({
+            phrase: cue.id for cue in cues if cue.kind == 'lexical' for phrase in cue.patterns
+        })
+        self._matcher = None
+        self._dependency_matcher = None
+        if nlp is not None:
+            from spacy.matcher import DependencyMatcher, Matcher
+            self._matcher = Matcher(nlp.vocab)
+            self._dependency_matcher = DependencyMatcher(nlp.vocab)
+            for cue in cues:
+                if cue.kind == 'token':
+                    self._matcher.add(cue.id, list(cue.patterns))
+                elif cue.kind == 'dependency':
+                    self._dependency_matcher.add(cue.id, list(cue.patterns))
+
+    def detect(self, context: ArgumentContext) -> List[str]:
+        """
+        論証に含まれる誤謬を検出する
+
+        Args:
+            context: 論証の情報
+
+        Returns:
+            List[str]: 検出された誤謬の種類（規則の定義順、重複なし）
+        """
+        hits = self._collect_cues(context)
+        detected: Dict[str, None] = {}
+        for rule in self.rules:
+            if rule.fallacy in detected:
+                continue
+            if not all(self._has_cue(hits, cue_id, scope) for cue_id, scope in rule.requires):
+                continue
+            if rule.structural and not STRUCTURAL_CHECKS[rule.structural](context):
+                continue
+            detected[rule.fallacy] = None
+        return list(detected)
+
+    def _collect_cues(self, context: ArgumentContext) -> Dict[str, Set[str]]:
+        """論証全体を1回走査し、手がかりごとの出現区分を集める"""
+        parts = [(PREMISE, premise) for premise in context.premises]
+        if context.conclusion:
+            parts.append((CONCLUSION, context.conclusion))
+
+        # 区分ごとの文字範囲を記録しながら1つのテキストに連結する
+        text = ''
+        boundaries: List[Tuple[int, str]] = []
+        for scope, part in parts:
+            text += part
+            boundaries.append((len(text), scope))
+            text += '\n'
+
+        def scope_of(offset: int) -> str:
+            for end, scope in boundaries:
+                if offset < end:
+                    return scope
+            return boundaries[-1][1]
+
+        hits: Dict[str, Set[str]] = {}
+        for start, _, cue_id in self._automaton.find(text):
+            hits.setdefault(cue_id, set()).add(scope_of(start))
+
+        if self.nlp is not None and parts:
+            # 解析済みの文があればそれを使い、無ければ各文を1回だけ解析する
+            sentences = context.sentences
+            if sentences is None or len(sentences) != len(parts):
+                sentences = list(self.nlp.pipe(part for _, part in parts))
+            vocab = self.nlp.vocab
+            for (scope, _), sentence in zip(parts, sentences):
+                for match_id, _, _ in self._matcher(sentence):
+                    hits.setdefault(vocab.strings[match_id], set()).add(scope)
+                for match_id, _ in self._dependency_matcher(sentence):
+                    hits.setdefault(vocab.strings[match_id], set()).add(scope)
+        return hits
+
+    @staticmethod
+    def _has_cue(hits: Dict[str, Set[str]], cue_id: str, scope: Optional[str]) -> bool:
+        scopes = hits.get(cue_id)
+        if not scopes:
+            return False
+        return scope is None or scope in scopes
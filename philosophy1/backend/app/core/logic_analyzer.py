@@ -1,8 +1,24 @@
-from typing import List, Dict, Optional
-from dataclasses import dataclass
+from typing import Any, List, Dict, Optional
+from dataclasses import dataclass, field
 import logging
+import sys
 from enum import Enum
 
+from app.core.fallacy_rules import ArgumentContext, FallacyRuleEngine
+from app.core.metrics import FALLACIES_DETECTED, timed
+from app.core.support_graph import SupportCycle, SupportGraphBuilder
+from app.core.propositional import (
+    Formula,
+    FormulaParser,
+    IncrementalSolver,
+    atom,
+    conj,
+    entails,
+    implies,
+    is_satisfiable,
+    neg
+)
+
 # 論理的な誤謬の種類を定義
 class FallacyType(Enum):
     AD_HOMINEM = "ad_hominem"
@@ -12,7 +28,7 @@ class FallacyType(Enum):
     HASTY_GENERALIZATION = "hasty_generalization"
     POST_HOC = "post_hoc"
 
-@dataclass
+@dataclass(slots=True)
 class LogicalProposition:
     """論理的命題を表現するデータクラス"""
     subject: str
@@ -21,34 +37,164 @@ class LogicalProposition:
     premises: List[str]
     conclusion: str
 
-@dataclass
+@dataclass(slots=True)
 class ValidationResult:
-    """論理検証の結果を表現するデータクラス"""
+    """
+    論理検証の結果を表現するデータクラス（問題点・提案の文字列は intern 済み）
+
+    undetermined は判定できなかった項目で、is_valid には影響しない
+    """
     is_valid: bool
     issues: List[str]
     fallacies: List[FallacyType]
     suggestions: List[str]
+    undetermined: List[str] = field(default_factory=list)
+
+def build_logical_proposition(analysis: Dict[str, Any]) -> LogicalProposition:
+    """
+    NLP解析結果から論理的命題を組み立てる
+
+    最後の文を結論、それ以前の文を前提とみなす
+
+    Args:
+        analysis: NLPEngine.analyze の戻り値
+
+    Returns:
+        LogicalProposition: 論理解析用の命題
+    """
+    structure = analysis['structure']
+    sentences = analysis['parsed']['sentences']
+    return LogicalProposition(
+        subject=structure['subjects'][0] if structure['subjects'] else "",
+        predicate=structure['main_verbs'][0] if structure['main_verbs'] else "",
+        modifiers=structure['logical_connectors'],
+        premises=sentences[:-1],
+        conclusion=sentences[-1] if sentences else ""
+    )
+
+# 結論の支持を判定できない場合の説明
+CONCLUSION_SUPPORT_UNDETERMINED = (
+    "Conclusion support is undetermined: its propositions do not all appear in the premises"
+)
+
+class ValidationSession:
+    """
+    前提を1つずつ追加・撤回しながら検証を繰り返すためのセッション
+
+    ソルバの状態（学習節・選択変数）と判定結果のメモを保持し、
+    再検証時には前回から変化した前提のみを反映する
+    """
+
+    def __init__(self, analyzer: 'LogicAnalyzer'):
+        self.analyzer = analyzer
+        self.solver = IncrementalSolver()
+        self._formulas: Dict[str, Optional[Formula]] = {}
+        self.premises: List[str] = []
+
+    def add_premise(self, premise: str) -> None:
+        """前提を追加する"""
+        formula = self._formula(premise)
+        if formula is not None:
+            self.solver.add(formula)
+        self.premises.append(premise)
+
+    def retract_premise(self, premise: str) -> None:
+        """前提を撤回する"""
+        if premise not in self.premises:
+            return
+        self.premises.remove(premise)
+        formula = self._formula(premise)
+        if formula is not None and premise not in self.premises:
+            self.solver.retract(formula)
+
+    def sync(self, premises: List[str]) -> None:
+        """前提リストとの差分だけを追加・撤回して同期する"""
+        for premise in [p for p in self.premises if p not in premises]:
+            self.retract_premise(premise)
+        for premise in premises:
+            if premise not in self.premises:
+                self.add_premise(premise)
+
+    def check_consistency(self, conclusion: str) -> Dict:
+        """
+        現在の前提に対して論理的一貫性を確認する
+
+        Args:
+            conclusion: 結論の文
+
+        Returns:
+            Dict: LogicAnalyzer.check_consistency と同形式の結果
+        """
+        issues = []
+        undetermined = []
+        budget = self.analyzer.time_budget
+
+        if self.solver.is_consistent(budget) is False:
+            issues.append("Premises are contradictory")
+
+        formula = self._formula(conclusion)
+        if self.solver.active and formula is not None:
+            premise_formulas = [f for f in (self._formulas.get(p) for p in self.premises) if f is not None]
+            if not LogicAnalyzer._shares_vocabulary(premise_formulas, formula):
+                undetermined.append(CONCLUSION_SUPPORT_UNDETERMINED)
+            elif self.solver.entails(formula, budget) is False:
+                issues.append("Conclusion is not properly supported by premises")
+
+        return {
+            "is_consistent": not issues,
+            "issues": issues,
+            "undetermined": undetermined
+        }
+
+    def _formula(self, sentence: str) -> Optional[Formula]:
+        """文を論理式に変換（結果は文ごとにキャッシュ）"""
+        if sentence not in self._formulas:
+            formulas = self.analyzer._parse_formulas([sentence])
+            self._formulas[sentence] = formulas[0] if formulas else None
+        return self._formulas[sentence]
 
 class LogicAnalyzer:
     """論理解析エンジン"""
     
-    def __init__(self):
+    def __init__(self, time_budget: float = 0.05, nlp: Optional[Any] = None):
+        """
+        Args:
+            time_budget: 1回の整合性・帰結判定に使える秒数
+            nlp: 誤謬検出のトークン・依存構造規則に使うspaCyモデル（省略可）
+        """
         self.logger = logging.getLogger(__name__)
+        self.time_budget = time_budget
+        self.nlp = nlp
+        self.parser = FormulaParser()
+        self.fallacy_engine = FallacyRuleEngine(nlp=nlp)
+        self.support_graph = SupportGraphBuilder(nlp=nlp)
         self._initialize_rules()
 
     def _initialize_rules(self):
-        """論理規則の初期化"""
-        self.logical_rules = {
-            "modus_ponens": lambda p, q: p and (p implies q) then q,
-            "modus_tollens": lambda p, q: (not q) and (p implies q) then (not p),
+        """論理規則の初期化（いずれも恒真式として表現する）"""
+        p, q = atom("p"), atom("q")
+        self.logical_rules: Dict[str, Formula] = {
+            "modus_ponens": implies(conj(p, implies(p, q)), q),
+            "modus_tollens": implies(conj(neg(q), implies(p, q)), neg(p)),
         }
         
-    def validate_logic(self, proposition: LogicalProposition) -> ValidationResult:
+    def create_session(self) -> ValidationSession:
+        """前提を段階的に追加して検証するためのセッションを生成する"""
+        return ValidationSession(self)
+
+    @timed('logic.validate_logic')
+    def validate_logic(self,
+                       proposition: LogicalProposition,
+                       session: Optional[ValidationSession] = None,
+                       doc: Optional[Any] = None) -> ValidationResult:
         """
         論理的な妥当性を検証する
         
         Args:
             proposition: 検証対象の論理的命題
+            session: 増分検証用のセッション（指定時は前回からの差分のみを再検証）
+            doc: 命題の元のテキストを解析したspaCyの Doc（NLPEngine.analyze_with_doc の戻り値）。
+                渡した場合は誤謬検出の Matcher と支持関係の判定にその文を使い、テキストを再解析しない
             
         Returns:
             ValidationResult: 検証結果
@@ -56,15 +202,26 @@ class LogicAnalyzer:
         issues = []
         fallacies = []
         suggestions = []
+        undetermined = []
 
         # 前提と結論の整合性チェック
-        consistency_result = self.check_consistency(proposition)
+        if session is not None:
+            session.sync(proposition.premises)
+            consistency_result = session.check_consistency(proposition.conclusion)
+        else:
+            consistency_result = self.check_consistency(proposition)
         if not consistency_result["is_consistent"]:
             issues.extend(consistency_result["issues"])
+        undetermined.extend(consistency_result["undetermined"])
 
         # 論理的誤謬の検出
-        fallacy_result = self.identify_fallacies(proposition)
-        fallacies.extend(fallacy_result)
+        context = self._build_context(proposition, doc)
+        fallacies.extend(self._detect_fallacies(context))
+        for fallacy in fallacies:
+            FALLACIES_DETECTED.labels(fallacy.value).inc()
+        for cycle in context.support_cycles:
+            numbers = ", ".join(str(i + 1) for i in cycle.premise_indices)
+            issues.append(sys.intern(f"Circular reasoning among premises: {numbers}"))
 
         # 改善提案の生成
         if issues or fallacies:
@@ -74,7 +231,8 @@ class LogicAnalyzer:
             is_valid=not (issues or fallacies),
             issues=issues,
             fallacies=fallacies,
-            suggestions=suggestions
+            suggestions=suggestions,
+            undetermined=undetermined
         )
 
     def check_consistency(self, proposition: LogicalProposition) -> Dict:
@@ -88,6 +246,7 @@ class LogicAnalyzer:
             Dict: 一貫性チェックの結果
         """
         issues = []
+        undetermined = []
         
         # 前提の相互矛盾チェック
         premises_consistent = self._check_premises_consistency(proposition.premises)
@@ -99,12 +258,15 @@ class LogicAnalyzer:
             proposition.premises,
             proposition.conclusion
         )
-        if not conclusion_supported:
+        if conclusion_supported is None:
+            undetermined.append(CONCLUSION_SUPPORT_UNDETERMINED)
+        elif not conclusion_supported:
             issues.append("Conclusion is not properly supported by premises")
 
         return {
             "is_consistent": not issues,
-            "issues": issues
+            "issues": issues,
+            "undetermined": undetermined
         }
 
     def identify_fallacies(self, proposition: LogicalProposition) -> List[FallacyType]:
@@ -117,44 +279,104 @@ class LogicAnalyzer:
         Returns:
             List[FallacyType]: 検出された誤謬のリスト
         """
-        fallacies = []
+        return self._detect_fallacies(self._build_context(proposition))
 
-        # 各種誤謬パターンのチェック
-        if self._check_ad_hominem(proposition):
-            fallacies.append(FallacyType.AD_HOMINEM)
-        
-        if self._check_straw_man(proposition):
-            fallacies.append(FallacyType.STRAW_MAN)
-            
-        if self._check_false_dichotomy(proposition):
-            fallacies.append(FallacyType.FALSE_DICHOTOMY)
+    def find_circular_reasoning(self,
+                                proposition: LogicalProposition,
+                                sentences: Optional[List[Any]] = None) -> List[SupportCycle]:
+        """
+        前提と結論の支持関係から循環論法を検出する
 
-        return fallacies
+        Args:
+            proposition: 分析対象の論理的命題
+            sentences: 前提・結論の各文の解析結果（_sentence_spans の戻り値、省略可）
+
+        Returns:
+            List[SupportCycle]: 循環を構成する前提の一覧
+        """
+        return self.support_graph.find_cycles(proposition.premises, proposition.conclusion, sentences)
+
+    def _build_context(self, proposition: LogicalProposition, doc: Optional[Any] = None) -> ArgumentContext:
+        """誤謬規則の評価に必要な論証の情報をまとめる"""
+        conclusions = self._parse_formulas([proposition.conclusion])
+        sentences = self._sentence_spans(proposition, doc)
+        return ArgumentContext(
+            premises=proposition.premises,
+            conclusion=proposition.conclusion,
+            premise_formulas=self._parse_formulas(proposition.premises),
+            conclusion_formula=conclusions[0] if conclusions else None,
+            support_cycles=self.find_circular_reasoning(proposition, sentences),
+            sentences=sentences
+        )
+
+    def _sentence_spans(self, proposition: LogicalProposition, doc: Optional[Any]) -> Optional[List[Any]]:
+        """
+        前提・結論の各文を解析したspaCyの Span（または Doc）を求める
+
+        doc の文が前提・結論と一致する場合はその文をそのまま使い、それ以外の場合
+        （解析結果がキャッシュにあった場合など）は各文を nlp.pipe で1回だけ解析する
+        """
+        if self.nlp is None:
+            return None
+        claims = [*proposition.premises, proposition.conclusion]
+        if doc is not None:
+            sentences = list(doc.sents)
+            if [sentence.text for sentence in sentences] == claims:
+                return sentences
+        return list(self.nlp.pipe(claims))
+
+    def _detect_fallacies(self, context: ArgumentContext) -> List[FallacyType]:
+        """全ての誤謬規則を1回の走査で評価"""
+        return [FallacyType(value) for value in self.fallacy_engine.detect(context)]
+
+    def _parse_formulas(self, sentences: List[str]) -> List[Formula]:
+        """文を論理式に変換（命題を含まない文は除外）"""
+        formulas = []
+        for sentence in sentences:
+            try:
+                formulas.append(self.parser.parse(sentence))
+            except ValueError:
+                self.logger.debug(f"論理式に変換できない文を除外: {sentence}")
+        return formulas
 
     def _check_premises_consistency(self, premises: List[str]) -> bool:
-        """前提の整合性をチェック"""
-        # 実装: 前提間の論理的整合性を確認
-        return True
-
-    def _check_conclusion_support(self, premises: List[str], conclusion: str) -> bool:
-        """結論が前提から適切に導出されているかチェック"""
-        # 実装: 前提から結論への論理的つながりを確認
-        return True
-
-    def _check_ad_hominem(self, proposition: LogicalProposition) -> bool:
-        """人身攻撃の誤謬をチェック"""
-        # 実装: 人身攻撃のパターンを検出
-        return False
-
-    def _check_straw_man(self, proposition: LogicalProposition) -> bool:
-        """わら人形論法をチェック"""
-        # 実装: わら人形論法のパターンを検出
-        return False
-
-    def _check_false_dichotomy(self, proposition: LogicalProposition) -> bool:
-        """二分法の誤りをチェック"""
-        # 実装: 誤った二分法のパターンを検出
-        return False
+        """前提の整合性をチェック（前提全体が同時に充足可能か）"""
+        result = is_satisfiable(self._parse_formulas(premises), self.time_budget)
+        if result is None:
+            self.logger.warning("前提の整合性チェックが時間内に完了しませんでした")
+            return True
+        return result
+
+    @staticmethod
+    def _shares_vocabulary(premises: List[Formula], conclusion: Formula) -> bool:
+        """結論の命題変数が全て前提のいずれかに現れる"""
+        premise_atoms = {name for formula in premises for name in formula.atoms()}
+        return all(name in premise_atoms for name in conclusion.atoms())
+
+    def _check_conclusion_support(self, premises: List[str], conclusion: str) -> Optional[bool]:
+        """
+        結論が前提から適切に導出されているかチェック（論理的帰結の判定）
+
+        命題論理の命題変数は文単位のため、「All men are mortal. Socrates is a man.
+        Therefore Socrates is mortal.」のような述語論理の推論では結論の命題変数が
+        前提に現れない。その場合は帰結を判定できないものとしてNoneを返す
+
+        Returns:
+            Optional[bool]: 帰結するならTrue、前提と同じ命題変数からなる結論が
+                帰結しないならFalse、判定できない場合はNone
+        """
+        formulas = self._parse_formulas(premises)
+        conclusions = self._parse_formulas([conclusion])
+        # 前提の無い単独の主張や、論理式に変換できない結論は判定対象外
+        if not formulas or not conclusions:
+            return True
+        if not self._shares_vocabulary(formulas, conclusions[0]):
+            return None
+        result = entails(formulas, conclusions[0], self.time_budget)
+        if result is None:
+            self.logger.warning("結論の導出チェックが時間内に完了しませんでした")
+            return True
+        return result
 
     def _generate_suggestions(self, issues: List[str], fallacies: List[FallacyType]) -> List[str]:
         """
@@ -170,9 +392,9 @@ class LogicAnalyzer:
         suggestions = []
         
         for issue in issues:
-            suggestions.append(f"Consider resolving: {issue}")
+            suggestions.append(sys.intern(f"Consider resolving: {issue}"))
             
         for fallacy in fallacies:
-            suggestions.append(f"Avoid {fallacy.value} by reformulating your argument")
+            suggestions.append(sys.intern(f"Avoid {fallacy.value} by reformulating your argument"))
 
         return suggestions
\ No newline at end of file
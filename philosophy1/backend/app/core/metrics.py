@@ -0,0 +1,353 @@
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from contextlib import contextmanager
+import functools
+import math
+import threading
+import time
+
+# HDR形式のヒストグラムの精度（各2冪区間を 2^(_SUB_BITS-1) 個に等分し、相対誤差は約3%以内）
+_SUB_BITS = 6
+_SUB_COUNT = 1 << _SUB_BITS
+_HALF = _SUB_COUNT >> 1
+# 記録できる最大値（マイクロ秒、約19時間）。これを超える値は最大値として記録する
+_MAX_SHIFT = 30
+_MAX_VALUE = (1 << (_MAX_SHIFT + _SUB_BITS)) - 1
+_NUM_BUCKETS = _SUB_COUNT + _MAX_SHIFT * _HALF
+
+# 要約として出力する分位点
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+def _bucket_index(value: int) -> int:
+    """値（マイクロ秒）を対数・線形の二段階で区切ったバケットの番号"""
+    if value < _SUB_COUNT:
+        return value
+    shift = value.bit_length() - _SUB_BITS
+    return _SUB_COUNT + (shift - 1) * _HALF + (value >> shift) - _HALF
+
+
+def _bucket_midpoint(index: int) -> float:
+    """バケットが表す範囲の中央値（マイクロ秒）"""
+    if index < _SUB_COUNT:
+        return float(index)
+    shift = (index - _SUB_COUNT) // _HALF + 1
+    low = ((index - _SUB_COUNT) % _HALF + _HALF) << shift
+    return low + ((1 << shift) - 1) / 2
+
+
+def _format_value(value: float) -> str:
+    """値を Prometheus テキスト形式の数値表記にする"""
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Timer:
+    """経過時間をヒストグラムに記録するコンテキストマネージャ"""
+
+    __slots__ = ('_histogram', '_started')
+
+    def __init__(self, histogram: 'Histogram'):
+        self._histogram = histogram
+
+    def __enter__(self) -> '_Timer':
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._histogram.observe(time.perf_counter() - self._started)
+
+
+class Histogram:
+    """
+    秒単位の値を記録するHDR形式のヒストグラム
+
+    値をマイクロ秒の整数に丸め、2冪ごとの区間をさらに等分した固定のバケットに数える。
+    記録はバケット番号の計算と加算のみで、分位点は出力時にバケットを走査して求める
+    """
+
+    def __init__(self, metric: Optional['_Metric'] = None, labels: Tuple[str, ...] = ()):
+        self._metric = metric
+        self._labels = labels
+        self._lock = threading.Lock()
+        self._buckets = [0] * _NUM_BUCKETS
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        """
+        値を記録する
+
+        Args:
+            seconds: 記録する値（秒）
+        """
+        index = _bucket_index(min(int(seconds * 1e6), _MAX_VALUE)) if seconds > 0 else 0
+        with self._lock:
+            self._buckets[index] += 1
+            self.count += 1
+            self.sum += seconds
+            if seconds > self.max:
+                self.max = seconds
+        if self._metric is not None:
+            self._metric.forward(self._labels, seconds)
+
+    def time(self) -> _Timer:
+        """with 文の本体の実行時間を記録する"""
+        return _Timer(self)
+
+    def quantile(self, q: float) -> float:
+        """
+        分位点を求める
+
+        Args:
+            q: 0〜1の分位
+
+        Returns:
+            float: 分位点の推定値（秒、記録が無い場合は NaN）
+        """
+        return self.quantiles((q,))[0]
+
+    def quantiles(self, qs: Sequence[float]) -> List[float]:
+        """複数の分位点をバケットの1回の走査で求める"""
+        with self._lock:
+            buckets = list(self._buckets)
+            count = self.count
+            maximum = self.max
+        if not count:
+            return [math.nan] * len(qs)
+        ranks = [max(1, math.ceil(q * count)) for q in qs]
+        order = sorted(range(len(qs)), key=lambda i: ranks[i])
+        results = [maximum] * len(qs)
+        cumulative, position = 0, 0
+        for index, bucket in enumerate(buckets):
+            if not bucket:
+                continue
+            cumulative += bucket
+            while position < len(order) and ranks[order[position]] <= cumulative:
+                results[order[position]] = min(_bucket_midpoint(index) / 1e6, maximum)
+                position += 1
+            if position == len(order):
+                break
+        return results
+
+
+class Counter:
+    """単調増加するカウンタ"""
+
+    def __init__(self, metric: Optional['_Metric'] = None, labels: Tuple[str, ...] = ()):
+        self._metric = metric
+        self._labels = labels
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+        if self._metric is not None:
+            self._metric.forward(self._labels, amount)
+
+    def observe(self, amount: float) -> None:
+        """ワーカープロセスから転送された増分を反映する（inc と同じ）"""
+        self.inc(amount)
+
+
+class _Metric:
+    """ラベルの値ごとに子（Histogram または Counter）を持つ名前付きのメトリクス"""
+
+    def __init__(self, registry: 'MetricsRegistry', kind: str, name: str, documentation: str,
+                 label_names: Sequence[str]):
+        self.registry = registry
+        self.kind = kind
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str) -> Any:
+        """
+        ラベルの値に対応する子を取得する（無ければ作成する）
+
+        Args:
+            values: ラベルの値（label_names と同じ順）
+        """
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.label_names):
+                raise ValueError(f"{self.name} expects labels {self.label_names}, got {values}")
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    factory = Histogram if self.kind == 'summary' else Counter
+                    child = factory(self, tuple(str(value) for value in values))
+                    self._children[values] = child
+        return child
+
+    def forward(self, labels: Tuple[str, ...], value: float) -> None:
+        """転送中であれば記録を書き留める"""
+        captured = self.registry._captured
+        if captured is not None:
+            captured.append((self.name, labels, value))
+
+    def render(self) -> Iterator[str]:
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} {self.kind}'
+        with self._lock:
+            children = sorted(self._children.items())
+        for values, child in children:
+            if self.kind == 'summary':
+                for q, value in zip(QUANTILES, child.quantiles(QUANTILES)):
+                    labels = _format_labels(self.label_names, values, f'quantile="{q}"')
+                    yield f'{self.name}{labels} {_format_value(value)}'
+                labels = _format_labels(self.label_names, values)
+                yield f'{self.name}_sum{labels} {_format_value(child.sum)}'
+                yield f'{self.name}_count{labels} {child.count}'
+            else:
+                yield f'{self.name}{_format_labels(self.label_names, values)} {_format_value(child.value)}'
+
+
+class MetricsRegistry:
+    """
+    メトリクスの登録と Prometheus テキスト形式での出力を行う
+
+    ヒストグラムは Prometheus の summary（分位点・合計・件数）として出力する。
+    ゲージは出力時に値を返す関数として登録する
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._gauges: Dict[str, Tuple[str, Tuple[str, ...], Callable[[], Iterable[Tuple[Sequence[str], float]]]]] = {}
+        self._lock = threading.Lock()
+        self._captured: Optional[List[Tuple[str, Tuple[str, ...], float]]] = None
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> _Metric:
+        """秒単位の値の分布を記録するメトリクスを登録する"""
+        return self._register('summary', name, documentation, label_names)
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> _Metric:
+        """カウンタを登録する"""
+        return self._register('counter', name, documentation, label_names)
+
+    def gauge(self,
+              name: str,
+              documentation: str,
+              label_names: Sequence[str],
+              collect: Callable[[], Iterable[Tuple[Sequence[str], float]]]) -> None:
+        """
+        出力時に値を取得するゲージを登録する
+
+        Args:
+            name: メトリクス名
+            documentation: 説明
+            label_names: ラベル名
+            collect: (ラベルの値, 値) の組を返す関数
+        """
+        with self._lock:
+            self._gauges[name] = (documentation, tuple(label_names), collect)
+
+    @contextmanager
+    def capture(self) -> Iterator[List[Tuple[str, Tuple[str, ...], float]]]:
+        """
+        with 文の中での記録を書き留める
+
+        ワーカープロセスで使い、書き留めた記録を結果と共に返して親プロセスで replay する
+        """
+        self._captured = captured = []
+        try:
+            yield captured
+        finally:
+            self._captured = None
+
+    def replay(self, captured: Iterable[Tuple[str, Tuple[str, ...], float]]) -> None:
+        """他のプロセスで書き留めた記録を反映する"""
+        for name, labels, value in captured:
+            metric = self._metrics.get(name)
+            if metric is not None:
+                metric.labels(*labels).observe(value)
+
+    def render(self) -> str:
+        """全てのメトリクスを Prometheus テキスト形式で出力する"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            gauges = list(self._gauges.items())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for name, (documentation, label_names, collect) in gauges:
+            lines.append(f'# HELP {name} {documentation}')
+            lines.append(f'# TYPE {name} gauge')
+            for values, value in collect():
+                if isinstance(values, str):
+                    values = (values,)
+                lines.append(f'{name}{_format_labels(label_names, values)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+    def _register(self, kind: str, name: str, documentation: str, label_names: Sequence[str]) -> _Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = _Metric(self, kind, name, documentation, label_names)
+                self._metrics[name] = metric
+            elif metric.kind != kind:
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+
+# プロセス内で共有するレジストリと解析パイプラインのメトリクス
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    'logiclens_stage_duration_seconds',
+    'Time spent in each stage of the analysis pipeline.',
+    ('stage',)
+)
+CACHE_LOOKUPS = registry.counter(
+    'logiclens_parse_cache_lookups_total',
+    'Parse cache lookups by analysis kind and result.',
+    ('kind', 'result')
+)
+FALLACIES_DETECTED = registry.counter(
+    'logiclens_fallacies_detected_total',
+    'Fallacies detected by LogicAnalyzer.validate_logic.',
+    ('fallacy',)
+)
+ANALYSES = registry.counter(
+    'logiclens_analyses_total',
+    'Propositions handled by the analyze endpoint by outcome.',
+    ('outcome',)
+)
+
+
+def stage(name: str) -> _Timer:
+    """with 文の本体の実行時間を段階名で記録する"""
+    return STAGE_SECONDS.labels(name).time()
+
+
+def timed(name: str) -> Callable:
+    """関数の実行時間を段階名で記録するデコレータ"""
+    def decorator(function: Callable) -> Callable:
+        histogram = STAGE_SECONDS.labels(name)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
@@ -0,0 +1,245 @@
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Set, Tuple
+import logging
+import re
+import zlib
+
+import numpy as np
+
+from app.core.search_index import normalize_terms
+
+# 置換ハッシュ (a * x + b) mod p に使うメルセンヌ素数（32ビットのシングルハッシュとの積が64ビットに収まる）
+_PRIME = np.uint64((1 << 31) - 1)
+# シングルを持たないテキストの署名値
+_EMPTY = np.iinfo(np.uint32).max
+# 否定を表す語（英語の否定語・縮約形と日本語の否定の助動詞）
+_NEGATIONS = re.compile(
+    r"\b(?:not|no|never|none|nobody|nothing|nowhere|neither|nor|without|cannot)\b|n['’]t|ない|なかっ|ません",
+    re.IGNORECASE
+)
+_NEGATION_FORMS = {"n't": 'not', 'n’t': 'not', 'cannot': 'not'}
+
+
+def polarity_markers(text: str) -> Tuple[str, ...]:
+    """
+    テキスト中の否定語を正規化して並べたもの
+
+    シングルのJaccard類似度は否定語1語の違いをほとんど反映しないため、近似重複を
+    同じ主張とみなす前にこの値の一致を確かめる（異なれば反対の主張として扱う）
+
+    Args:
+        text: 命題のテキスト
+
+    Returns:
+        Tuple[str, ...]: 否定語（縮約形は 'not' に揃える）の昇順の並び
+    """
+    markers = (match.group(0).lower() for match in _NEGATIONS.finditer(text))
+    return tuple(sorted(_NEGATION_FORMS.get(marker, marker) for marker in markers))
+
+
+class MinHasher:
+    """
+    見出し語のシングル（連続する k 語）に対するMinHash署名を計算する
+
+    2つの署名で値が一致する成分の割合が、シングル集合のJaccard類似度の推定値になる
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 2, seed: int = 1):
+        """
+        Args:
+            num_perm: 署名の長さ（ハッシュ関数の数）
+            shingle_size: シングルの語数
+            seed: ハッシュ関数の係数を決める乱数シード（署名を比較するには同じ値を使う）
+        """
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_PRIME), size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_PRIME), size=num_perm, dtype=np.uint64)
+
+    def shingles(self, lemmas: Iterable[str]) -> Set[str]:
+        """見出し語を正規化し、連続する shingle_size 語を空白で連結したシングルの集合を返す"""
+        terms = normalize_terms(lemmas)
+        if len(terms) <= self.shingle_size:
+            return {' '.join(terms)} if terms else set()
+        return {' '.join(terms[i:i + self.shingle_size]) for i in range(len(terms) - self.shingle_size + 1)}
+
+    def signature(self, lemmas: Iterable[str]) -> np.ndarray:
+        """
+        見出し語列のMinHash署名を計算する
+
+        Args:
+            lemmas: 命題の見出し語
+
+        Returns:
+            np.ndarray: 長さ num_perm のuint32配列
+        """
+        shingles = self.shingles(lemmas)
+        if not shingles:
+            return np.full(self.num_perm, _EMPTY, dtype=np.uint32)
+        hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles),
+                             dtype=np.uint64, count=len(shingles))
+        # 全てのハッシュ関数とシングルの組を1回の配列演算で求め、シングル方向の最小値を取る
+        permuted = (np.outer(hashes, self._a) + self._b) % _PRIME
+        return permuted.min(axis=0).astype(np.uint32)
+
+    @staticmethod
+    def similarity(first: np.ndarray, second: np.ndarray) -> float:
+        """2つの署名から推定したJaccard類似度"""
+        return float(np.count_nonzero(first == second)) / len(first)
+
+    def to_bytes(self, signature: np.ndarray) -> bytes:
+        """署名をデータベースに格納するバイト列に変換する"""
+        return signature.astype('<u4').tobytes()
+
+    def from_bytes(self, data: bytes) -> np.ndarray:
+        """データベースに格納したバイト列から署名を復元する"""
+        signature = np.frombuffer(data, dtype='<u4')
+        if len(signature) != self.num_perm:
+            raise ValueError(f"Signature length {len(signature)} does not match num_perm {self.num_perm}")
+        return signature.astype(np.uint32)
+
+
+class LSHIndex:
+    """
+    MinHash署名のLSH（バンディング）インデックス
+
+    署名を bands 個の帯に分け、帯ごとの値が完全に一致する署名だけを候補とする。
+    候補の取得は帯の数だけの辞書参照で済むため、登録数に対して劣線形で近似重複を探せる。
+    候補は署名同士の一致率で絞り込む
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 16):
+        """
+        Args:
+            num_perm: 署名の長さ
+            bands: 帯の数（num_perm を割り切る値。多いほど低い類似度でも候補になる）
+
+        Raises:
+            ValueError: num_perm が bands で割り切れない場合
+        """
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+        self.logger = logging.getLogger(__name__)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._buckets: List[Dict[bytes, List[Hashable]]] = [{} for _ in range(bands)]
+        self._signatures: Dict[Hashable, np.ndarray] = {}
+
+    @property
+    def threshold(self) -> float:
+        """候補になる確率が1/2となるおおよその類似度 (1/bands)^(1/rows)"""
+        return (1.0 / self.bands) ** (1.0 / self.rows)
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._signatures
+
+    def add(self, key: Hashable, signature: np.ndarray) -> None:
+        """
+        署名を登録する（登録済みのキーは置き換える）
+
+        Args:
+            key: 命題のIDなど
+            signature: MinHash署名
+        """
+        if key in self._signatures:
+            self.remove(key)
+        signature = np.ascontiguousarray(signature, dtype=np.uint32)
+        self._signatures[key] = signature
+        for buckets, band in zip(self._buckets, self._bands(signature)):
+            buckets.setdefault(band, []).append(key)
+
+    def remove(self, key: Hashable) -> None:
+        """署名を取り除く"""
+        signature = self._signatures.pop(key, None)
+        if signature is None:
+            return
+        for buckets, band in zip(self._buckets, self._bands(signature)):
+            bucket = buckets[band]
+            bucket.remove(key)
+            if not bucket:
+                del buckets[band]
+
+    def candidates(self, signature: np.ndarray) -> Set[Hashable]:
+        """いずれかの帯が一致する登録済みのキー"""
+        signature = np.ascontiguousarray(signature, dtype=np.uint32)
+        found: Set[Hashable] = set()
+        for buckets, band in zip(self._buckets, self._bands(signature)):
+            found.update(buckets.get(band, ()))
+        return found
+
+    def query(self, signature: np.ndarray, threshold: float = 0.8, limit: Optional[int] = None) -> List[Tuple[Hashable, float]]:
+        """
+        近似重複を探す
+
+        Args:
+            signature: MinHash署名
+            threshold: 推定Jaccard類似度の下限
+            limit: 返す最大件数
+
+        Returns:
+            List[Tuple[Hashable, float]]: キーと推定類似度（類似度の高い順）
+        """
+        keys = list(self.candidates(signature))
+        if not keys:
+            return []
+        matrix = np.stack([self._signatures[key] for key in keys])
+        scores = np.count_nonzero(matrix == signature, axis=1) / self.num_perm
+        order = np.argsort(-scores, kind='stable')
+        hits = [(keys[i], float(scores[i])) for i in order if scores[i] >= threshold]
+        return hits[:limit] if limit is not None else hits
+
+    def _bands(self, signature: np.ndarray) -> List[bytes]:
+        data = signature.tobytes()
+        width = self.rows * signature.itemsize
+        # 帯の番号は辞書ごとに分かれているため、帯の値のバイト列だけをキーにする
+        return [data[i * width:(i + 1) * width] for i in range(self.bands)]
+
+
+def deduplicate(documents: Iterable[Tuple[Hashable, Sequence[str]]],
+                threshold: float = 0.8,
+                hasher: Optional[MinHasher] = None,
+                index: Optional[LSHIndex] = None) -> Dict[Hashable, Hashable]:
+    """
+    コーパス全体を1回の走査で重複排除する
+
+    各文書をLSHインデックスに照会し、類似度が閾値以上の代表文書があれば
+    その重複として記録し、無ければ新しい代表文書として登録する
+
+    Args:
+        documents: (キー, 見出し語) の組
+        threshold: 重複とみなす推定Jaccard類似度の下限
+        hasher: 署名の計算に使うMinHasher
+        index: 代表文書を登録するLSHインデックス（既存の文書と照合する場合に渡す）
+
+    Returns:
+        Dict[Hashable, Hashable]: 重複した文書のキーと、その代表文書のキー
+    """
+    hasher = hasher or MinHasher()
+    index = index if index is not None else LSHIndex(num_perm=hasher.num_perm)
+    duplicates: Dict[Hashable, Hashable] = {}
+    for key, lemmas in documents:
+        signature = hasher.signature(lemmas)
+        hits = index.query(signature, threshold=threshold, limit=1)
+        if hits:
+            duplicates[key] = hits[0][0]
+        else:
+            index.add(key, signature)
+    return duplicates
+
+
+if __name__ == '__main__':
+    # 1行に1命題のテキストファイルを重複排除し、重複した行の番号と代表の行の番号を出力する
+    import sys
+
+    from app.core.nlp_engine import NLPEngine
+
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        lines = [line.strip() for line in f if line.strip()]
+    engine = NLPEngine()
+    documents = enumerate(engine.lemmatize_batch(lines))
+    for duplicate, original in deduplicate(documents, threshold=float(sys.argv[2]) if len(sys.argv) > 2 else 0.8).items():
+        print(f"{duplicate}\t{original}")
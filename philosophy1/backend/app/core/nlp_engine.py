@@ -1,24 +1,93 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Callable, Tuple
+import numpy as np
 import spacy
 import nltk
-from nltk.tokenize import word_tokenize
 from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
 import logging
+import sys
+import threading
+import time
 from dataclasses import dataclass
 
-# 必要なNLTKリソースをダウンロード
-nltk.download('punkt')
-nltk.download('stopwords')
-nltk.download('wordnet')
-nltk.download('averaged_perceptron_tagger')
+from app.core.concept_index import ConceptVectorIndex
+from app.core.metrics import CACHE_LOOKUPS, stage, timed
+from app.core.parse_cache import ParseCache
 
-@dataclass
+# 使用するNLTKリソース（ダウンロードはデプロイ時に行い、実行時はネットワークに触れない）
+NLTK_RESOURCES = {
+    'stopwords': 'corpora/stopwords',
+    'wordnet': 'corpora/wordnet',
+}
+
+# 解析結果の形式の版（キャッシュキーに含めるため、キャッシュする結果の型を変えたら上げる）
+RESULT_FORMAT = 2
+
+# プロセス内で共有するspaCyモデル
+_models: Dict[str, 'spacy.language.Language'] = {}
+_models_lock = threading.Lock()
+
+
+def select_links(names: List[str],
+                 results: List[List[Tuple[str, float]]],
+                 threshold: float) -> Dict[str, Optional[Tuple[str, float]]]:
+    """概念の表記ごとに、類似度が閾値以上の最近傍の概念を選ぶ（該当なしはNone）"""
+    return {
+        name: (hits[0] if hits and hits[0][1] >= threshold else None)
+        for name, hits in zip(names, results)
+    }
+
+
+def missing_nltk_resources() -> List[str]:
+    """
+    ローカルに存在しないNLTKリソースを返す（ダウンロードは行わない）
+
+    Returns:
+        List[str]: 見つからなかったリソース名のリスト
+    """
+    missing = []
+    for name, path in NLTK_RESOURCES.items():
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            missing.append(name)
+    return missing
+
+
+def load_spacy_model(name: str = 'en_core_web_sm') -> 'spacy.language.Language':
+    """
+    spaCyモデルを読み込む（プロセス内で1度だけ読み込み、以降は共有する）
+
+    Args:
+        name: モデル名
+
+    Returns:
+        spacy.language.Language: 読み込まれたモデル
+
+    Raises:
+        OSError: モデルがインストールされていない場合
+    """
+    model = _models.get(name)
+    if model is not None:
+        return model
+    with _models_lock:
+        if name not in _models:
+            started = time.perf_counter()
+            try:
+                _models[name] = spacy.load(name)
+            except OSError:
+                logging.error("Spacyモデルがインストールされていません。")
+                raise
+            logging.info(f"spaCyモデル {name} の読み込み時間: {time.perf_counter() - started:.3f}秒")
+        return _models[name]
+
+
+@dataclass(frozen=True, slots=True)
 class ConceptNode:
-    """概念ノードを表すデータクラス"""
+    """概念ノードを表すデータクラス（関連概念もタプルで持つため、ハッシュ可能）"""
     name: str
     weight: float
-    related_concepts: List[str]
+    related_concepts: Tuple[str, ...]
 
 class NLPEngine:
     """
@@ -26,16 +95,42 @@ class NLPEngine:
     テキストの解析、概念抽出、構造分析を行う
     """
 
-    def __init__(self):
-        """NLPエンジンの初期化"""
-        try:
-            self.nlp = spacy.load('en_core_web_sm')
-        except OSError:
-            logging.error("Spacyモデルがインストールされていません。")
-            raise
+    def __init__(self, cache: Optional[ParseCache] = None):
+        """
+        NLPエンジンの初期化
+
+        Args:
+            cache (Optional[ParseCache]): 解析結果キャッシュ（Noneの場合はキャッシュしない）
+        """
+        self.nlp = load_spacy_model('en_core_web_sm')
         
         self.lemmatizer = WordNetLemmatizer()
-        self.stop_words = set(stopwords.words('english'))
+        # ストップワードコーパスが無い環境ではspaCy組み込みのリストを使う
+        if 'stopwords' in missing_nltk_resources():
+            logging.warning("NLTKのstopwordsが見つからないため、spaCyのストップワードを使用します。")
+            self.stop_words = set(self.nlp.Defaults.stop_words)
+        else:
+            self.stop_words = set(stopwords.words('english'))
+        
+        # キャッシュキーに含めるモデル名とパイプライン設定
+        self.cache = cache
+        self.fingerprint = '{}-{}:{}/{}'.format(
+            self.nlp.meta.get('name', ''),
+            self.nlp.meta.get('version', ''),
+            ','.join(self.nlp.pipe_names),
+            RESULT_FORMAT
+        )
+
+    def warm_up(self) -> float:
+        """
+        パイプライン全体を一度実行し、初回リクエストの遅延を事前に解消する
+
+        Returns:
+            float: ウォームアップに要した秒数
+        """
+        started = time.perf_counter()
+        self._analyze_doc(self.nlp("Warm up the pipeline so that the first request is fast."))
+        return time.perf_counter() - started
 
     def parse_text(self, text: str) -> Dict[str, Any]:
         """
@@ -47,8 +142,46 @@ class NLPEngine:
         Returns:
             Dict[str, Any]: 解析結果を含む辞書
         """
-        doc = self.nlp(text)
-        
+        return self._cached('parsed', text, self._parse_doc)
+
+    def lemmatize(self, text: str) -> List[str]:
+        """
+        テキストの見出し語列を求める（構文解析と固有表現抽出を省いた軽量な解析）
+
+        Args:
+            text (str): 解析対象のテキスト
+
+        Returns:
+            List[str]: 見出し語のリスト
+        """
+        if self.cache is None:
+            with stage('nlp.lemmatize'):
+                return self._lemmas(self.nlp(text, disable=self._lemma_disabled()))
+        key = self._cache_key('lemmas', text)
+        lemmas = self.cache.get(key)
+        CACHE_LOOKUPS.labels('lemmas', 'miss' if lemmas is None else 'hit').inc()
+        if lemmas is None:
+            with stage('nlp.lemmatize'):
+                lemmas = self._lemmas(self.nlp(text, disable=self._lemma_disabled()))
+            self.cache.set(key, lemmas)
+        return lemmas
+
+    def lemmatize_batch(self, texts: Iterable[str], batch_size: int = 256) -> Iterator[List[str]]:
+        """複数のテキストの見出し語列を nlp.pipe でまとめて求める（入力順に返す）"""
+        for doc in self.nlp.pipe(texts, batch_size=batch_size, disable=self._lemma_disabled()):
+            yield self._lemmas(doc)
+
+    def _lemma_disabled(self) -> List[str]:
+        """見出し語化に不要なパイプライン構成要素"""
+        return [name for name in ('parser', 'ner') if name in self.nlp.pipe_names]
+
+    @staticmethod
+    def _lemmas(doc: spacy.tokens.Doc) -> List[str]:
+        return [token.lemma_ for token in doc]
+
+    @timed('nlp.parse_text')
+    def _parse_doc(self, doc: spacy.tokens.Doc) -> Dict[str, Any]:
+        """解析済みドキュメントから基本的な言語特徴を抽出"""
         return {
             'tokens': [token.text for token in doc],
             'lemmas': [token.lemma_ for token in doc],
@@ -67,23 +200,30 @@ class NLPEngine:
         Returns:
             List[ConceptNode]: 抽出された概念のリスト
         """
-        doc = self.nlp(text)
+        return self._cached('concepts', text, self._extract_concepts_doc)
+
+    @timed('nlp.extract_concepts')
+    def _extract_concepts_doc(self, doc: spacy.tokens.Doc) -> List[ConceptNode]:
+        """解析済みドキュメントから重要な概念を抽出"""
+        text = doc.text
         concepts = []
         
-        # 名詞句と固有表現を抽出
-        noun_phrases = [chunk.text for chunk in doc.noun_chunks]
-        entities = [ent.text for ent in doc.ents]
+        # 名詞句と固有表現を抽出（同一表記は最初のスパンを代表とする）
+        phrase_spans = {}
+        for span in list(doc.noun_chunks) + list(doc.ents):
+            phrase_spans.setdefault(span.text, span)
+        
+        # 関連概念は全フレーズ分をまとめて計算
+        related_map = self._find_related_concepts(phrase_spans, doc)
         
         # 重要度計算とコンセプトノード作成
-        concept_weights = {}
-        for phrase in set(noun_phrases + entities):
+        for phrase, related in related_map.items():
             # 重要度を計算（出現頻度とテキスト長を考慮）
             weight = text.count(phrase) * len(phrase.split())
-            related = self._find_related_concepts(phrase, doc)
             concepts.append(ConceptNode(
-                name=phrase,
+                name=sys.intern(phrase),
                 weight=weight,
-                related_concepts=related
+                related_concepts=tuple(sys.intern(r) for r in related)
             ))
         
         return sorted(concepts, key=lambda x: x.weight, reverse=True)
@@ -98,8 +238,11 @@ class NLPEngine:
         Returns:
             Dict[str, Any]: 構造分析結果
         """
-        doc = self.nlp(text)
-        
+        return self._cached('structure', text, self._analyze_structure_doc)
+
+    @timed('nlp.analyze_structure')
+    def _analyze_structure_doc(self, doc: spacy.tokens.Doc) -> Dict[str, Any]:
+        """解析済みドキュメントから論理構造を分析"""
         structure = {
             'main_verbs': [],
             'subjects': [],
@@ -124,24 +267,220 @@ class NLPEngine:
 
         return structure
 
-    def _find_related_concepts(self, concept: str, doc: spacy.tokens.Doc) -> List[str]:
+    def analyze(self, text: str) -> Dict[str, Any]:
         """
-        特定の概念に関連する他の概念を見つける
+        テキストを一度だけ解析し、言語特徴・概念・論理構造をまとめて返す
+
+        parse_text / extract_concepts / analyze_structure を個別に呼ぶと
+        同じテキストに対してパイプラインが3回実行されるため、
+        命題全体の解析にはこちらを使用する
 
         Args:
-            concept (str): 対象概念
+            text (str): 解析対象のテキスト
+
+        Returns:
+            Dict[str, Any]: 'parsed', 'concepts', 'structure' を含む辞書
+        """
+        return self._cached('analysis', text, self._analyze_doc)
+
+    def analyze_with_doc(self, text: str) -> Tuple[Dict[str, Any], Optional[spacy.tokens.Doc]]:
+        """
+        analyze と同じ結果を、パイプラインを実行した場合はその Doc と共に返す
+
+        論理検証（誤謬検出・支持関係の判定）に Doc を渡して同じテキストの再解析を避けるために使う
+
+        Args:
+            text (str): 解析対象のテキスト
+
+        Returns:
+            Tuple[Dict[str, Any], Optional[spacy.tokens.Doc]]: 解析結果と Doc（キャッシュにあった場合はNone）
+        """
+        parsed: List[spacy.tokens.Doc] = []
+
+        def compute(doc: spacy.tokens.Doc) -> Dict[str, Any]:
+            parsed.append(doc)
+            return self._analyze_doc(doc)
+
+        return self._cached('analysis', text, compute), (parsed[0] if parsed else None)
+
+    def analyze_batch(self,
+                      texts: Iterable[str],
+                      batch_size: int = 64,
+                      n_process: int = 1) -> Iterator[Dict[str, Any]]:
+        """
+        複数のテキストを nlp.pipe でバッチ解析し、結果を順次返す
+
+        Args:
+            texts (Iterable[str]): 解析対象のテキスト群
+            batch_size (int): nlp.pipe に渡すバッチサイズ
+            n_process (int): nlp.pipe が使用するプロセス数
+
+        Yields:
+            Dict[str, Any]: 入力順に並んだ analyze() と同形式の解析結果
+        """
+        for result, _ in self.analyze_batch_with_docs(texts, batch_size, n_process):
+            yield result
+
+    def analyze_batch_with_docs(self,
+                                texts: Iterable[str],
+                                batch_size: int = 64,
+                                n_process: int = 1) -> Iterator[Tuple[Dict[str, Any], Optional[spacy.tokens.Doc]]]:
+        """
+        analyze_batch と同じ解析を行い、結果をパイプラインで得た Doc と共に返す
+
+        Yields:
+            Tuple[Dict[str, Any], Optional[spacy.tokens.Doc]]: 入力順の解析結果と Doc
+                （キャッシュにあった場合はNone）
+        """
+        if self.cache is None:
+            for doc in self.nlp.pipe(texts, batch_size=batch_size, n_process=n_process):
+                yield self._analyze_doc(doc), doc
+            return
+        
+        # キャッシュに無いテキストだけをパイプラインに流し、入力順を保って返す
+        hits: Dict[int, Dict[str, Any]] = {}
+        
+        def misses() -> Iterator:
+            for index, text in enumerate(texts):
+                cached = self.cache.get(self._cache_key('analysis', text))
+                CACHE_LOOKUPS.labels('analysis', 'miss' if cached is None else 'hit').inc()
+                if cached is not None:
+                    hits[index] = cached
+                else:
+                    yield text, (index, text)
+        
+        next_index = 0
+        for doc, (index, text) in self.nlp.pipe(misses(), as_tuples=True,
+                                                batch_size=batch_size,
+                                                n_process=n_process):
+            result = self._analyze_doc(doc)
+            self.cache.set(self._cache_key('analysis', text), result)
+            while next_index < index:
+                yield hits.pop(next_index), None
+                next_index += 1
+            yield result, doc
+            next_index = index + 1
+        while next_index in hits:
+            yield hits.pop(next_index), None
+            next_index += 1
+
+    def embed(self, texts: Iterable[str], batch_size: int = 256) -> np.ndarray:
+        """
+        テキストごとの埋め込み（doc.vector）を行列として返す
+
+        Args:
+            texts (Iterable[str]): 埋め込むテキスト群
+            batch_size (int): nlp.pipe に渡すバッチサイズ
+
+        Returns:
+            np.ndarray: 形状 (テキスト数, 次元数) のfloat32行列
+        """
+        vectors = [doc.vector for doc in self.nlp.pipe(texts, batch_size=batch_size)]
+        if not vectors:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.asarray(vectors, dtype=np.float32)
+
+    def link_concepts(self,
+                      names: List[str],
+                      index: ConceptVectorIndex,
+                      threshold: float = 0.75) -> Dict[str, Optional[Tuple[str, float]]]:
+        """
+        抽出した概念を概念データベースの正規の概念に対応付ける
+
+        Args:
+            names (List[str]): 抽出した概念の表記
+            index (ConceptVectorIndex): 概念データベースの埋め込みインデックス
+            threshold (float): 対応付けるコサイン類似度の下限
+
+        Returns:
+            Dict[str, Optional[Tuple[str, float]]]: 表記ごとの概念IDと類似度（該当なしはNone）
+        """
+        if not names or not len(index):
+            return {name: None for name in names}
+        return select_links(names, index.search_batch(self.embed(names), k=1), threshold)
+
+    def _cache_key(self, kind: str, text: str) -> str:
+        """解析の種類とテキストからキャッシュキーを生成"""
+        return ParseCache.make_key(kind, text, self.fingerprint)
+
+    def _cached(self, kind: str, text: str, compute: Callable[[spacy.tokens.Doc], Any]) -> Any:
+        """キャッシュを参照し、無ければ解析して結果を格納する"""
+        if self.cache is None:
+            with stage('nlp.pipeline'):
+                doc = self.nlp(text)
+            return compute(doc)
+        key = self._cache_key(kind, text)
+        result = self.cache.get(key)
+        CACHE_LOOKUPS.labels(kind, 'miss' if result is None else 'hit').inc()
+        if result is None:
+            with stage('nlp.pipeline'):
+                doc = self.nlp(text)
+            result = compute(doc)
+            self.cache.set(key, result)
+        return result
+
+    def _analyze_doc(self, doc: spacy.tokens.Doc) -> Dict[str, Any]:
+        """解析済みドキュメントから全ての解析結果を生成"""
+        return {
+            'parsed': self._parse_doc(doc),
+            'concepts': self._extract_concepts_doc(doc),
+            'structure': self._analyze_structure_doc(doc)
+        }
+
+    def _find_related_concepts(self,
+                               phrase_spans: Dict[str, spacy.tokens.Span],
+                               doc: spacy.tokens.Doc,
+                               top_k: int = 5,
+                               threshold: float = 0.5) -> Dict[str, List[str]]:
+        """
+        各概念に関連する他の概念をまとめて見つける
+
+        フレーズとトークンのベクトルを行列にまとめ、正規化した行列積で
+        全組み合わせのコサイン類似度を一度に計算する
+
+        Args:
+            phrase_spans (Dict[str, spacy.tokens.Span]): 概念名とそのスパン
             doc (spacy.tokens.Doc): 解析済みドキュメント
+            top_k (int): 概念ごとに返す関連概念の最大数
+            threshold (float): 関連とみなす類似度の下限
 
         Returns:
-            List[str]: 関連概念のリスト
+            Dict[str, List[str]]: 概念名ごとの関連概念のリスト（類似度の降順）
         """
-        related = []
-        concept_doc = self.nlp(concept)
+        phrases = list(phrase_spans)
+        related_map: Dict[str, List[str]] = {phrase: [] for phrase in phrases}
         
+        # 候補トークン（名詞・固有名詞）を表記ごとに1つに絞る
+        candidates = {}
         for token in doc:
-            if token.text not in concept and \
-               token.pos_ in ['NOUN', 'PROPN'] and \
-               token.similarity(concept_doc) > 0.5:
-                related.append(token.text)
+            if token.pos_ in ['NOUN', 'PROPN']:
+                candidates.setdefault(token.text, token)
+        if not phrases or not candidates:
+            return related_map
         
-        return list(set(related))[:5]  # 上位5件まで
+        names = list(candidates)
+        phrase_matrix = self._normalize_rows(
+            np.array([phrase_spans[p].vector for p in phrases], dtype=np.float32))
+        token_matrix = self._normalize_rows(
+            np.array([candidates[n].vector for n in names], dtype=np.float32))
+        similarities = phrase_matrix @ token_matrix.T
+        
+        for i, phrase in enumerate(phrases):
+            scores = similarities[i]
+            # 閾値以下のトークンと概念自身に含まれるトークンを除外
+            indices = np.array([j for j in np.flatnonzero(scores > threshold)
+                                if names[j] not in phrase], dtype=np.intp)
+            if indices.size > top_k:
+                top = np.argpartition(-scores[indices], top_k - 1)[:top_k]
+                indices = indices[top]
+            indices = indices[np.argsort(-scores[indices])]
+            related_map[phrase] = [names[j] for j in indices]
+        
+        return related_map
+
+    @staticmethod
+    def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+        """行ベクトルをL2正規化（ゼロベクトルはゼロのまま）"""
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
@@ -0,0 +1,439 @@
+from typing import List, Dict, Any, Callable, Optional, Set, Tuple, Union
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import zlib
+
+import numpy as np
+
+from app.core.concept_index import ConceptVectorIndex
+from app.core.logic_analyzer import LogicAnalyzer, ValidationResult, ValidationSession, build_logical_proposition
+from app.core.metrics import registry, stage
+from app.core.nlp_engine import NLPEngine, ConceptNode, select_links
+from app.core.parse_cache import ParseCache
+from app.core.profiler import SampledProfile, SamplingProfiler, current_profile
+
+
+class PoolOverloadedError(Exception):
+    """処理待ちのタスクが上限に達した場合に送出される例外"""
+
+
+# ワーカープロセス内で共有するNLPエンジンと論理解析エンジン
+_worker_engine: Optional[NLPEngine] = None
+_worker_analyzer: Optional[LogicAnalyzer] = None
+# ワーカープロセス内の論証ごとの検証セッション（最近使った順、VALIDATION_SESSIONS 件まで）
+_worker_sessions: 'OrderedDict[str, ValidationSession]' = OrderedDict()
+VALIDATION_SESSIONS = int(os.getenv("VALIDATION_SESSIONS", "256"))
+
+# 処理時間がこれを超えたタスクのプロファイルを自動で残す（秒、0の場合は無効）
+PROFILE_THRESHOLD = float(os.getenv("PROFILE_THRESHOLD_MS", "0")) / 1000
+# 自動採取の採取間隔（秒）
+PROFILE_AUTO_INTERVAL = float(os.getenv("PROFILE_AUTO_INTERVAL_MS", "10")) / 1000
+
+
+def _init_worker() -> None:
+    """ワーカープロセスの初期化（spaCyモデルを事前に読み込み、論理解析エンジンと共有する）"""
+    global _worker_engine, _worker_analyzer
+    _worker_engine = NLPEngine(cache=ParseCache(db_path=os.getenv("PARSE_CACHE_PATH")))
+    _worker_engine.warm_up()
+    _worker_analyzer = LogicAnalyzer(nlp=_worker_engine.nlp)
+
+
+def _analyze_and_validate(text: str) -> Tuple[Dict[str, Any], ValidationResult]:
+    """テキストを解析し、最後の文を結論とする論証として論理検証する"""
+    analysis, doc = _worker_engine.analyze_with_doc(text)
+    return analysis, _worker_analyzer.validate_logic(build_logical_proposition(analysis), doc=doc)
+
+
+def _analyze_and_validate_batch(texts: List[str]) -> List[Union[Tuple[Dict[str, Any], ValidationResult], str]]:
+    """
+    テキスト群を NLPEngine.analyze_batch（nlp.pipe）でまとめて解析し、それぞれを論理検証する
+
+    検証に失敗したテキストは例外を送出せずエラーメッセージを返し、同じチャンクの他の結果は失わない
+    """
+    results: List[Union[Tuple[Dict[str, Any], ValidationResult], str]] = []
+    for analysis, doc in _worker_engine.analyze_batch_with_docs(texts):
+        try:
+            results.append((analysis, _worker_analyzer.validate_logic(build_logical_proposition(analysis), doc=doc)))
+        except Exception as e:
+            results.append(str(e))
+    return results
+
+
+def _validate_in_session(argument: Tuple[str, str]) -> Tuple[Dict[str, Any], ValidationResult]:
+    """
+    論証のキーごとの ValidationSession を使ってテキストを検証する
+
+    同じキーで再検証すると、ソルバの学習節と判定のメモを引き継ぎ、前回から変化した前提のみを反映する
+    """
+    key, text = argument
+    session = _worker_sessions.get(key)
+    if session is None:
+        session = _worker_analyzer.create_session()
+        _worker_sessions[key] = session
+        if len(_worker_sessions) > VALIDATION_SESSIONS:
+            _worker_sessions.popitem(last=False)
+    else:
+        _worker_sessions.move_to_end(key)
+    analysis, doc = _worker_engine.analyze_with_doc(text)
+    return analysis, _worker_analyzer.validate_logic(build_logical_proposition(analysis), session, doc=doc)
+
+
+# NLPEngine のメソッド以外にワーカーで実行できるタスク
+_WORKER_TASKS: Dict[str, Callable[[Any], Any]] = {
+    'analyze_and_validate': _analyze_and_validate,
+    'analyze_and_validate_batch': _analyze_and_validate_batch,
+    'validate_in_session': _validate_in_session,
+}
+
+
+def _run_in_worker(method: str,
+                   argument: Any,
+                   profile_interval: Optional[float] = None) -> Tuple[Any, List, Optional[SampledProfile]]:
+    """
+    ワーカープロセス内でNLPエンジンのメソッド、または _WORKER_TASKS のタスクを実行する
+
+    メトリクスの記録と、要求された場合または処理時間が PROFILE_THRESHOLD を超えた場合の
+    プロファイルを結果と共に返す
+    """
+    task = _WORKER_TASKS.get(method) or getattr(_worker_engine, method)
+    interval = profile_interval or (PROFILE_AUTO_INTERVAL if PROFILE_THRESHOLD > 0 else None)
+    profiler = SamplingProfiler(interval) if interval else None
+    with registry.capture() as captured:
+        if profiler is None:
+            result = task(argument)
+        else:
+            with profiler:
+                result = task(argument)
+    profile = None
+    if profiler is not None and (profile_interval or profiler.profile.duration >= PROFILE_THRESHOLD):
+        profile = profiler.profile
+    return result, captured, profile
+
+
+@dataclass
+class _PoolTask:
+    """プールに投入したタスク（ワーカーを停止したときに別のワーカーへ投入し直すための情報を持つ）"""
+    method: str
+    argument: Any
+    interval: Optional[float]
+    key: Optional[str]
+    # 呼び出し側が待つ Future（投入し直しても同じものを使う）
+    result: Future = field(default_factory=Future)
+    # 現在投入しているワーカーのプロセスプールとその Future
+    executor: Optional[ProcessPoolExecutor] = None
+    future: Optional[Future] = None
+    # タイムアウトして呼び出し側が待つのをやめたタスク（投入し直さない）
+    abandoned: bool = False
+
+
+class NLPWorkerPool:
+    """
+    CPU負荷の高いNLP処理を実行するプロセスプール
+
+    ワーカーごとに1プロセスのプロセスプールを持ち、キーを持つタスク（検証セッション）は
+    キーのハッシュで決まる同じワーカーに、それ以外のタスクは処理中のタスクが最も少ない
+    ワーカーに割り当てる。各ワーカーは起動時にspaCyモデルを1度だけ読み込み、
+    指定タスク数を処理した後に再起動される。
+    一括分析のタスクは単発のタスクと別の枠（max_batch_pending）で受け付け、枠が空くまで待機させる。
+    タイムアウトしたタスクは実行が終わるまで処理枠を占有し続け、そのタスクを抱えるワーカーは
+    停止して新しいプロセスに置き換える（後ろで待っていたタスクは別のワーカーで実行し直す）
+    """
+
+    def __init__(self,
+                 max_workers: Optional[int] = None,
+                 max_pending: int = 64,
+                 task_timeout: float = 30.0,
+                 max_tasks_per_worker: int = 1000,
+                 max_batch_pending: Optional[int] = None):
+        """
+        Args:
+            max_workers: ワーカープロセス数（Noneの場合はCPUコア数）
+            max_pending: 同時に受け付ける最大タスク数（実行中と待機中の合計）
+            task_timeout: 1タスクあたりのタイムアウト（秒）
+            max_tasks_per_worker: ワーカーを再起動するまでの処理タスク数
+            max_batch_pending: 同時に投入する一括分析のタスク数（Noneの場合はワーカープロセス数）
+        """
+        self.logger = logging.getLogger(__name__)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.max_batch_pending = max_batch_pending or self.max_workers
+        # 一括分析の処理枠（イベントループ上で初回使用時に生成）
+        self._batch_slots: Optional[asyncio.Semaphore] = None
+        self.task_timeout = task_timeout
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self._pending = 0
+        self._lock = threading.Lock()
+        # ワーカーごとのプロセスプール（初回使用時に起動）と、プールごとの実行中・待機中のタスク
+        self._executors: List[Optional[ProcessPoolExecutor]] = [None] * self.max_workers
+        self._tasks: Dict[ProcessPoolExecutor, Dict[Future, _PoolTask]] = {}
+        # 停止中のプロセスプール（実行できなかったタスクを投入し直す）
+        self._retired: Set[ProcessPoolExecutor] = set()
+        # 処理時間の閾値を超えて自動採取されたプロファイルの保存先（method, text, profile を受け取る）
+        self.profile_sink: Optional[Callable[[str, str, SampledProfile], None]] = None
+
+    @property
+    def executors(self) -> List[ProcessPoolExecutor]:
+        """ワーカーごとのプロセスプール（未起動のものはここで起動する）"""
+        with self._lock:
+            return [self._executor_at(shard) for shard in range(self.max_workers)]
+
+    def _executor_at(self, shard: int) -> ProcessPoolExecutor:
+        """shard 番目のワーカーのプロセスプール（_lock を取得した状態で呼び出す）"""
+        executor = self._executors[shard]
+        if executor is None:
+            executor = self._executors[shard] = ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                max_tasks_per_child=self.max_tasks_per_worker
+            )
+        return executor
+
+    def _shard_for(self, key: Optional[str]) -> int:
+        """タスクを割り当てるワーカーの番号（_lock を取得した状態で呼び出す）"""
+        if key is not None:
+            # プロセスごとに値が変わる hash() ではなく、安定したハッシュで割り当てる
+            return zlib.crc32(key.encode('utf-8')) % self.max_workers
+        loads = [len(self._tasks.get(executor, ())) if executor is not None else 0 for executor in self._executors]
+        return loads.index(min(loads))
+
+    async def submit(self, method: str, text: Any, batch: bool = False, key: Optional[str] = None) -> Any:
+        """
+        NLPエンジンのメソッドをワーカープロセスで実行する
+
+        Args:
+            method: 実行するNLPEngineのメソッド名（または _WORKER_TASKS のタスク名）
+            text: 解析対象のテキスト（embed の場合はテキストのリスト）
+            batch: 一括分析のタスクとして max_pending ではなく max_batch_pending の枠で実行する
+                （枠が空くまで待機し、PoolOverloadedError は送出しない）
+            key: 指定した場合、同じキーのタスクは常に同じワーカーで実行する
+                （ワーカー内に保持する状態を再利用するタスクのため）
+
+        Returns:
+            Any: メソッドの戻り値
+
+        Raises:
+            PoolOverloadedError: 処理待ちのタスクが上限に達している場合
+            asyncio.TimeoutError: タスクがタイムアウトした場合
+        """
+        if batch:
+            if self._batch_slots is None:
+                self._batch_slots = asyncio.Semaphore(self.max_batch_pending)
+            async with self._batch_slots:
+                return await self._run(method, text, True, key)
+        return await self._run(method, text, False, key)
+
+    async def _run(self, method: str, text: Any, batch: bool, key: Optional[str]) -> Any:
+        """タスクを投入して完了を待つ（タイムアウトした場合はタスクを抱えるワーカーを停止する）"""
+        request_profile = current_profile.get()
+        interval = request_profile.interval if request_profile is not None else None
+        task = self._submit(_PoolTask(method, text, interval, key), batch)
+        try:
+            with stage(f'nlp_pool.{method}'):
+                result, captured, profile = await asyncio.wait_for(
+                    asyncio.wrap_future(task.result), timeout=self.task_timeout
+                )
+        except asyncio.TimeoutError:
+            task.abandoned = True
+            # 待機中のまま取り消せた場合を除き、タスクはワーカーで実行され続けている
+            with self._lock:
+                executor, future = task.executor, task.future
+            if not future.cancel():
+                self.logger.warning(f"NLPタスクがタイムアウトしました。ワーカーを再起動します: {method}")
+                self._retire(executor)
+            raise
+        registry.replay(captured)
+        if profile is not None:
+            if request_profile is not None:
+                request_profile.add(f'nlp.{method}', profile)
+            elif self.profile_sink is not None:
+                self.profile_sink(method, text if isinstance(text, str) else '\n'.join(map(str, text)), profile)
+        return result
+
+    def _submit(self, task: _PoolTask, batch: bool = False) -> _PoolTask:
+        """
+        処理枠を確保してタスクを投入する（枠はタスクの実行が終わった時点で解放する）
+
+        一括分析のタスクの枠は submit が確保するため、ここでは単発のタスクの枠のみ数える
+        """
+        if not batch:
+            with self._lock:
+                if self._pending >= self.max_pending:
+                    raise PoolOverloadedError("NLP worker pool is overloaded")
+                self._pending += 1
+            task.result.add_done_callback(self._release)
+        # 実行中の状態にして、待機側のタイムアウトで取り消されないようにする
+        # （取り消しはワーカーに投入した Future に対して行い、枠は実行が終わるまで解放しない）
+        task.result.set_running_or_notify_cancel()
+        try:
+            self._dispatch(task)
+        except BaseException as e:
+            task.result.set_exception(e)
+            raise
+        return task
+
+    def _dispatch(self, task: _PoolTask) -> None:
+        """タスクをワーカーのプロセスプールに投入する"""
+        with self._lock:
+            executor = self._executor_at(self._shard_for(task.key))
+            future = executor.submit(_run_in_worker, task.method, task.argument, task.interval)
+            task.executor, task.future = executor, future
+            self._tasks.setdefault(executor, {})[future] = task
+        future.add_done_callback(lambda done: self._settle(executor, done))
+
+    def _settle(self, executor: ProcessPoolExecutor, future: Future) -> None:
+        """
+        ワーカーの Future の結果を呼び出し側の Future に移す（プロセスプールの管理スレッドから呼ばれる）
+
+        停止したワーカーで実行できなかったタスクは、別のワーカーに投入し直す
+        """
+        with self._lock:
+            task = self._tasks.get(executor, {}).pop(future, None)
+            retired = executor in self._retired
+        if task is None:
+            return
+        failed = future.cancelled() or isinstance(future.exception(), BrokenProcessPool)
+        if failed and retired and not task.abandoned:
+            try:
+                self._dispatch(task)
+                return
+            except BaseException as e:
+                task.result.set_exception(e)
+                return
+        if future.cancelled():
+            task.result.set_exception(CancelledError())
+        elif future.exception() is not None:
+            task.result.set_exception(future.exception())
+        else:
+            task.result.set_result(future.result())
+
+    def _release(self, result: Future) -> None:
+        """単発のタスクの処理枠を解放する"""
+        with self._lock:
+            self._pending -= 1
+
+    def _retire(self, executor: ProcessPoolExecutor) -> None:
+        """
+        タイムアウトしたタスクを抱えるワーカーを停止する
+
+        以降のタスクは同じ番号の新しいワーカーで処理する。停止したワーカーで待機していた
+        タスクは取り消され、_settle が別のワーカーに投入し直す
+        """
+        with self._lock:
+            self._executors = [None if current is executor else current for current in self._executors]
+            self._retired.add(executor)
+
+        def reap() -> None:
+            # ProcessPoolExecutor には実行中のワーカーを止める公開APIが無いため、直接停止する
+            for process in list((executor._processes or {}).values()):
+                process.terminate()
+            executor.shutdown(wait=True, cancel_futures=True)
+            with self._lock:
+                self._retired.discard(executor)
+                self._tasks.pop(executor, None)
+
+        threading.Thread(target=reap, name='nlp-pool-reaper', daemon=True).start()
+
+    def shutdown(self) -> None:
+        """全てのワーカーを停止する"""
+        with self._lock:
+            executors = [executor for executor in self._executors if executor is not None]
+            self._executors = [None] * self.max_workers
+        for executor in executors:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+class AsyncNLPEngine:
+    """
+    NLPEngineの非同期ファサード
+
+    処理をプロセスプールに委譲し、イベントループをブロックしない
+    """
+
+    def __init__(self, pool: NLPWorkerPool):
+        self.pool = pool
+
+    async def parse_text(self, text: str) -> Dict[str, Any]:
+        """NLPEngine.parse_text の非同期版"""
+        return await self.pool.submit('parse_text', text)
+
+    async def lemmatize(self, text: str) -> List[str]:
+        """NLPEngine.lemmatize の非同期版"""
+        return await self.pool.submit('lemmatize', text)
+
+    async def extract_concepts(self, text: str) -> List[ConceptNode]:
+        """NLPEngine.extract_concepts の非同期版"""
+        return await self.pool.submit('extract_concepts', text)
+
+    async def analyze_structure(self, text: str) -> Dict[str, Any]:
+        """NLPEngine.analyze_structure の非同期版"""
+        return await self.pool.submit('analyze_structure', text)
+
+    async def analyze(self, text: str) -> Dict[str, Any]:
+        """NLPEngine.analyze の非同期版"""
+        return await self.pool.submit('analyze', text)
+
+    async def analyze_and_validate(self, text: str) -> Tuple[Dict[str, Any], ValidationResult]:
+        """
+        NLPEngine.analyze と LogicAnalyzer.validate_logic を1つのタスクとしてワーカーで実行する
+
+        誤謬検出の Matcher / DependencyMatcher もワーカーのspaCyモデルで実行するため、
+        APIプロセスではspaCyモデルを読み込まない
+
+        Returns:
+            Tuple[Dict[str, Any], ValidationResult]: 解析結果と論理検証の結果
+        """
+        return await self.pool.submit('analyze_and_validate', text)
+
+    async def analyze_and_validate_batch(self,
+                                         texts: List[str]) -> List[Union[Tuple[Dict[str, Any], ValidationResult], str]]:
+        """
+        analyze_and_validate をテキスト群に対して1つのタスクとして行う（解析は nlp.pipe でまとめて行う）
+
+        タスクは一括分析の枠（NLPWorkerPool.max_batch_pending）で実行するため、単発のリクエストの
+        処理枠を消費しない
+
+        Returns:
+            List[Union[Tuple[Dict[str, Any], ValidationResult], str]]: 入力順の解析結果と論理検証の結果
+                （検証に失敗したテキストはエラーメッセージ）
+        """
+        return await self.pool.submit('analyze_and_validate_batch', list(texts), batch=True)
+
+    async def validate_in_session(self, key: str, text: str) -> Tuple[Dict[str, Any], ValidationResult]:
+        """
+        analyze_and_validate と同じ処理を、キーごとの ValidationSession で増分的に行う
+
+        セッションは各ワーカープロセスが保持し、同じキーのタスクはキーのハッシュで決まる
+        同じワーカーで実行するため、前回の状態を再利用できる（ワーカーの再起動や
+        VALIDATION_SESSIONS を超えて追い出された場合は新しいセッションで検証する）
+
+        Args:
+            key: 論証を識別するキー（命題IDなど）
+            text: 検証するテキスト
+        """
+        return await self.pool.submit('validate_in_session', (key, text), key=key)
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """NLPEngine.embed の非同期版"""
+        return await self.pool.submit('embed', list(texts))
+
+    async def link_concepts(self,
+                            names: List[str],
+                            index: ConceptVectorIndex,
+                            threshold: float = 0.75) -> Dict[str, Optional[Tuple[str, float]]]:
+        """
+        NLPEngine.link_concepts の非同期版
+
+        埋め込みはワーカーで計算し、インデックスの検索はスレッドで行う
+        """
+        if not names or not len(index):
+            return {name: None for name in names}
+        vectors = await self.embed(names)
+        return select_links(names, await asyncio.to_thread(index.search_batch, vectors, 1), threshold)
@@ -0,0 +1,131 @@
+from typing import Any, Dict, Optional
+from collections import OrderedDict
+import hashlib
+import logging
+import pickle
+import sqlite3
+import threading
+import unicodedata
+
+
+def normalize_text(text: str) -> str:
+    """
+    キャッシュキー用にテキストを正規化する
+
+    Unicode正規化（NFKC）と空白の畳み込みを行い、
+    表記揺れだけが異なる入力を同一のキーにまとめる
+
+    Args:
+        text: 正規化対象のテキスト
+
+    Returns:
+        str: 正規化されたテキスト
+    """
+    return ' '.join(unicodedata.normalize('NFKC', text).split())
+
+
+class ParseCache:
+    """
+    NLP解析結果のコンテンツアドレス型キャッシュ
+
+    正規化テキスト・モデル名・パイプライン設定のハッシュをキーとし、
+    容量制限付きのメモリ上LRU層と、任意のSQLiteによるディスク層を持つ。
+    値はpickle化して保持するため、呼び出し側が結果を変更してもキャッシュは影響を受けない
+    """
+
+    def __init__(self, max_entries: int = 4096, db_path: Optional[str] = None):
+        """
+        Args:
+            max_entries: メモリ層に保持する最大エントリ数
+            db_path: ディスク層のSQLiteファイルパス（Noneの場合はメモリ層のみ）
+        """
+        self.logger = logging.getLogger(__name__)
+        self.max_entries = max_entries
+        self._memory: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS parse_cache (key TEXT PRIMARY KEY, value BLOB NOT NULL)'
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(kind: str, text: str, fingerprint: str) -> str:
+        """
+        キャッシュキーを生成する
+
+        Args:
+            kind: 解析の種類（'parsed', 'concepts' など）
+            text: 解析対象のテキスト
+            fingerprint: モデル名とパイプライン設定を表す文字列
+
+        Returns:
+            str: SHA-256ハッシュによるキー
+        """
+        payload = '\x00'.join([kind, fingerprint, normalize_text(text)])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """キーに対応する値を取得（存在しない場合はNone）"""
+        with self._lock:
+            blob = self._memory.get(key)
+            if blob is not None:
+                self._memory.move_to_end(key)
+            elif self._db is not None:
+                row = self._db.execute(
+                    'SELECT value FROM parse_cache WHERE key = ?', (key,)
+                ).fetchone()
+                if row is not None:
+                    blob = row[0]
+                    self._store_memory(key, blob)
+            if blob is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return pickle.loads(blob)
+
+    def set(self, key: str, value: Any) -> None:
+        """キーに値を格納する"""
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._store_memory(key, blob)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        'INSERT OR REPLACE INTO parse_cache (key, value) VALUES (?, ?)',
+                        (key, blob)
+                    )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    self.logger.warning(f"解析キャッシュの書き込みに失敗しました: {str(e)}")
+
+    def clear(self) -> None:
+        """全てのエントリを削除する"""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute('DELETE FROM parse_cache')
+                self._db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        """ヒット数・ミス数・追い出し数などの統計を返す"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._memory)
+            }
+
+    def _store_memory(self, key: str, blob: bytes) -> None:
+        """メモリ層に格納し、容量超過分を古い順に追い出す（ロック取得済みで呼ぶこと）"""
+        self._memory[key] = blob
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
@@ -0,0 +1,273 @@
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+import types
+
+
+@dataclass
+class SampledProfile:
+    """
+    サンプリングで得たスタックの集計
+
+    stacks は根から葉へ並べたフレーム名の組と、そのスタックで観測した時間（マイクロ秒）
+    """
+    interval: float
+    duration: float
+    stacks: Dict[Tuple[str, ...], int] = field(default_factory=dict)
+    samples: int = 0
+
+    def to_collapsed(self) -> str:
+        """collapsed stack 形式（1行に「フレーム;フレーム;... 重み」、重みはマイクロ秒）"""
+        lines = sorted(self.stacks.items(), key=lambda item: -item[1])
+        return '\n'.join(f"{';'.join(stack)} {weight}" for stack, weight in lines)
+
+    @classmethod
+    def from_collapsed(cls, text: str, interval: float = 0.0, duration: float = 0.0) -> 'SampledProfile':
+        stacks: Dict[Tuple[str, ...], int] = {}
+        for line in text.splitlines():
+            stack, _, weight = line.rpartition(' ')
+            if stack:
+                stacks[tuple(stack.split(';'))] = int(weight)
+        return cls(interval=interval, duration=duration, stacks=stacks)
+
+    def to_speedscope(self, name: str = 'profile') -> Dict[str, Any]:
+        """speedscope のファイル形式（sampled プロファイル）"""
+        frames: Dict[str, int] = {}
+        samples: List[List[int]] = []
+        weights: List[int] = []
+        for stack, weight in self.stacks.items():
+            samples.append([frames.setdefault(frame, len(frames)) for frame in stack])
+            weights.append(weight)
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'shared': {'frames': [{'name': frame} for frame in frames]},
+            'profiles': [{
+                'type': 'sampled',
+                'name': name,
+                'unit': 'microseconds',
+                'startValue': 0,
+                'endValue': sum(weights),
+                'samples': samples,
+                'weights': weights,
+            }],
+            'name': name,
+            'exporter': 'logiclens',
+        }
+
+    @classmethod
+    def combine(cls, parts: Sequence[Tuple[str, 'SampledProfile']], duration: float) -> 'SampledProfile':
+        """段階ごとのプロファイルを、段階名を根のフレームとして1つにまとめる"""
+        stacks: Dict[Tuple[str, ...], int] = defaultdict(int)
+        for stage, profile in parts:
+            for stack, weight in profile.stacks.items():
+                stacks[(stage,) + stack] += weight
+        interval = min((profile.interval for _, profile in parts), default=0.0)
+        samples = sum(profile.samples for _, profile in parts)
+        return cls(interval=interval, duration=duration, stacks=dict(stacks), samples=samples)
+
+
+class SamplingProfiler:
+    """
+    1つのスレッドのスタックを一定間隔で採取するサンプリングプロファイラ
+
+    別スレッドから sys._current_frames() で対象スレッドのフレームを読むため、
+    対象のコードには手を加えず、オーバーヘッドは採取間隔に応じた一定量に留まる。
+    各サンプルには前回の採取からの実経過時間を重みとして記録する
+    """
+
+    def __init__(self, interval: float = 0.005, thread_id: Optional[int] = None, max_depth: int = 128):
+        """
+        Args:
+            interval: 採取間隔（秒）
+            thread_id: 対象スレッドのID（Noneの場合は start を呼んだスレッド）
+            max_depth: 記録するスタックの最大の深さ
+        """
+        self.interval = interval
+        self.thread_id = thread_id
+        self.max_depth = max_depth
+        self.profile: Optional[SampledProfile] = None
+        self._stacks: Dict[Tuple[str, ...], int] = defaultdict(int)
+        self._samples = 0
+        self._labels: Dict[types.CodeType, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+
+    def __enter__(self) -> 'SamplingProfiler':
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> SampledProfile:
+        """採取を止めて結果を返す"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.profile = SampledProfile(
+            interval=self.interval,
+            duration=time.perf_counter() - self._started,
+            stacks=dict(self._stacks),
+            samples=self._samples
+        )
+        return self.profile
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                stack.append(self._label(frame))
+                frame = frame.f_back
+            stack.reverse()
+            self._stacks[tuple(stack)] += int((now - last) * 1e6)
+            self._samples += 1
+            last = now
+
+    def _label(self, frame: types.FrameType) -> str:
+        """フレーム名（関数の修飾名・モジュール・定義行）"""
+        code = frame.f_code
+        label = self._labels.get(code)
+        if label is None:
+            name = getattr(code, 'co_qualname', code.co_name)
+            module = frame.f_globals.get('__name__', os.path.basename(code.co_filename))
+            label = f"{name} ({module}:{code.co_firstlineno})".replace(';', ',')
+            self._labels[code] = label
+        return label
+
+
+class RequestProfile:
+    """1件のリクエストで採取した段階ごとのプロファイル"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.started = time.perf_counter()
+        self.parts: List[Tuple[str, SampledProfile]] = []
+
+    def add(self, stage: str, profile: SampledProfile) -> None:
+        self.parts.append((stage, profile))
+
+    def combined(self) -> SampledProfile:
+        return SampledProfile.combine(self.parts, duration=time.perf_counter() - self.started)
+
+
+# 処理中のリクエストのプロファイル（プロファイルが要求されていない場合はNone）
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar('current_profile', default=None)
+
+
+@contextmanager
+def profile_stage(stage: str) -> Iterator[None]:
+    """プロファイル中のリクエストであれば、with 文の本体を現在のスレッドで採取する"""
+    request_profile = current_profile.get()
+    if request_profile is None:
+        yield
+        return
+    profiler = SamplingProfiler(request_profile.interval)
+    with profiler:
+        yield
+    request_profile.add(stage, profiler.profile)
+
+
+class ProfileStore:
+    """
+    採取したプロファイルを入力テキストと共に保存するSQLiteストア
+
+    プロファイルは collapsed stack 形式で保存し、max_entries を超えた分は古い順に削除する
+    """
+
+    def __init__(self, db_path: str = ':memory:', max_entries: int = 1000):
+        """
+        Args:
+            db_path: SQLiteファイルのパス
+            max_entries: 保持する最大件数
+        """
+        self.logger = logging.getLogger(__name__)
+        self.max_entries = max_entries
+        directory = os.path.dirname(db_path)
+        if db_path != ':memory:' and directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS profiles (
+                id INTEGER PRIMARY KEY,
+                created_at TEXT NOT NULL,
+                text TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                trigger TEXT NOT NULL,
+                duration_ms REAL NOT NULL,
+                interval_ms REAL NOT NULL,
+                samples INTEGER NOT NULL,
+                stacks TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS profiles_duration ON profiles (duration_ms);
+        """)
+        self._db.commit()
+
+    def add(self, text: str, stage: str, trigger: str, profile: SampledProfile) -> int:
+        """
+        プロファイルを保存する
+
+        Args:
+            text: 入力テキスト
+            stage: 採取した処理（'analyze'・'nlp.extract_concepts' など）
+            trigger: 採取の契機（'request' または 'threshold'）
+            profile: プロファイル
+
+        Returns:
+            int: 保存したプロファイルのID
+        """
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                'INSERT INTO profiles (created_at, text, stage, trigger, duration_ms, interval_ms, samples, stacks) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (datetime.utcnow().isoformat(), text, stage, trigger, profile.duration * 1e3,
+                 profile.interval * 1e3, profile.samples, profile.to_collapsed())
+            )
+            self._db.execute(
+                'DELETE FROM profiles WHERE id <= (SELECT MAX(id) FROM profiles) - ?', (self.max_entries,)
+            )
+            return cursor.lastrowid
+
+    def list(self, limit: int = 50, offset: int = 0, min_duration_ms: float = 0.0) -> List[Dict[str, Any]]:
+        """保存したプロファイルの概要（スタックを除く）を新しい順に取得する"""
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT id, created_at, text, stage, trigger, duration_ms, interval_ms, samples FROM profiles '
+                'WHERE duration_ms >= ? ORDER BY id DESC LIMIT ? OFFSET ?',
+                (min_duration_ms, limit, offset)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get(self, profile_id: int) -> Optional[Dict[str, Any]]:
+        """プロファイルを取得する（stacks は collapsed stack 形式の文字列）"""
+        with self._lock:
+            row = self._db.execute('SELECT * FROM profiles WHERE id = ?', (profile_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,700 @@
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import re
+import time
+import weakref
+
+# 論理式の演算子
+ATOM = 'atom'
+NOT = 'not'
+AND = 'and'
+OR = 'or'
+IMPLIES = 'implies'
+IFF = 'iff'
+
+
+class Formula:
+    """
+    命題論理式のノード
+
+    同一構造のノードは1つのインスタンスに集約（ハッシュコンシング）されるため、
+    等価判定は同一性比較で行える。直接生成せず atom() / neg() などを使うこと
+    """
+
+    __slots__ = ('op', 'args', '__weakref__')
+
+    _table: 'weakref.WeakValueDictionary[Tuple, Formula]' = weakref.WeakValueDictionary()
+
+    def __init__(self, op: str, args: Tuple):
+        self.op = op
+        self.args = args
+
+    @classmethod
+    def make(cls, op: str, args: Tuple) -> 'Formula':
+        """構造が同一の既存ノードを返し、無ければ新規に生成する"""
+        key = (op, args)
+        node = cls._table.get(key)
+        if node is None:
+            node = cls(op, args)
+            cls._table[key] = node
+        return node
+
+    def atoms(self) -> List[str]:
+        """論理式に含まれる命題変数名の一覧（出現順、重複なし）"""
+        seen: Dict[str, None] = {}
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node.op == ATOM:
+                seen.setdefault(node.args[0])
+            else:
+                stack.extend(reversed(node.args))
+        return list(seen)
+
+    def __repr__(self) -> str:
+        if self.op == ATOM:
+            return self.args[0]
+        if self.op == NOT:
+            return f"~{self.args[0]!r}"
+        symbol = {AND: ' & ', OR: ' | ', IMPLIES: ' -> ', IFF: ' <-> '}[self.op]
+        return '(' + symbol.join(repr(arg) for arg in self.args) + ')'
+
+
+def atom(name: str) -> Formula:
+    """命題変数"""
+    return Formula.make(ATOM, (name,))
+
+
+def neg(formula: Formula) -> Formula:
+    """否定（二重否定は除去する）"""
+    if formula.op == NOT:
+        return formula.args[0]
+    return Formula.make(NOT, (formula,))
+
+
+def _nary(op: str, formulas: Iterable[Formula]) -> Formula:
+    """同じ演算子の入れ子を平坦化し、重複を除いたn項演算ノードを生成"""
+    flat: Dict[int, Formula] = {}
+    for formula in formulas:
+        for arg in (formula.args if formula.op == op else (formula,)):
+            flat.setdefault(id(arg), arg)
+    args = tuple(flat.values())
+    if len(args) == 1:
+        return args[0]
+    return Formula.make(op, args)
+
+
+def conj(*formulas: Formula) -> Formula:
+    """論理積"""
+    return _nary(AND, formulas)
+
+
+def disj(*formulas: Formula) -> Formula:
+    """論理和"""
+    return _nary(OR, formulas)
+
+
+def implies(antecedent: Formula, consequent: Formula) -> Formula:
+    """含意"""
+    return Formula.make(IMPLIES, (antecedent, consequent))
+
+
+def iff(left: Formula, right: Formula) -> Formula:
+    """同値"""
+    return Formula.make(IFF, (left, right))
+
+
+def map_atoms(formula: Formula, rename: Callable[[str], str]) -> Formula:
+    """
+    論理式中の命題変数名を置き換えた論理式を返す
+
+    Args:
+        formula: 対象の論理式
+        rename: 命題変数名の変換関数
+
+    Returns:
+        Formula: 変換後の論理式
+    """
+    if formula.op == ATOM:
+        return atom(rename(formula.args[0]))
+    args = tuple(map_atoms(arg, rename) for arg in formula.args)
+    if formula.op == NOT:
+        return neg(args[0])
+    if formula.op in (AND, OR):
+        return _nary(formula.op, args)
+    return Formula.make(formula.op, args)
+
+
+class FormulaParser:
+    """
+    記号表記と簡単な英語表現の両方から論理式を構築するパーサ
+
+    記号: ~ ! & | -> <-> と括弧
+    英語: not, and, or, either ... or, if ... then, implies, iff / if and only if
+    演算子で区切られない語の並びは1つの命題変数となり、
+    文中の not / n't は命題変数の否定として扱う
+    """
+
+    _TOKEN_RE = re.compile(r"<->|->|[~!&|(),]|[A-Za-z0-9_']+")
+    _CONTRACTIONS = [
+        (re.compile(r"\bcannot\b", re.I), "can not"),
+        (re.compile(r"\bwon't\b", re.I), "will not"),
+        (re.compile(r"n't\b", re.I), " not"),
+    ]
+    _RESERVED = {'~', '!', '&', '|', '->', '<->', '(', ')', ',',
+                 'and', 'or', 'if', 'then', 'implies', 'iff', 'either', 'not'}
+    _FILLERS = {'a', 'an', 'the', 'therefore', 'thus', 'hence'}
+
+    def parse(self, text: str) -> Formula:
+        """
+        テキストを論理式に変換する
+
+        Args:
+            text: 前提や結論の文
+
+        Returns:
+            Formula: 構築された論理式
+
+        Raises:
+            ValueError: 命題変数を1つも含まない場合
+        """
+        for pattern, replacement in self._CONTRACTIONS:
+            text = pattern.sub(replacement, text)
+        text = re.sub(r"\bif and only if\b", " iff ", text, flags=re.I)
+        text = re.sub(r"\bit is not the case that\b", " not ", text, flags=re.I)
+        self._tokens = [t.lower() for t in self._TOKEN_RE.findall(text)]
+        self._pos = 0
+        formula = self._parse_iff()
+        # カンマなどで区切られた残りの節は論理積として扱う
+        while self._pos < len(self._tokens):
+            start = self._pos
+            rest = self._parse_iff()
+            if rest is not None:
+                formula = rest if formula is None else conj(formula, rest)
+            if self._pos == start:
+                self._pos += 1
+        if formula is None:
+            raise ValueError(f"No proposition found in: {text!r}")
+        return formula
+
+    def _peek(self) -> Optional[str]:
+        return self._tokens[self._pos] if self._pos < len(self._tokens) else None
+
+    def _accept(self, *tokens: str) -> bool:
+        if self._peek() in tokens:
+            self._pos += 1
+            return True
+        return False
+
+    def _accept_connective(self, *tokens: str) -> bool:
+        """接続詞を受理する（直前のカンマも併せて読み飛ばす）"""
+        if self._peek() == ',' and self._pos + 1 < len(self._tokens) \
+                and self._tokens[self._pos + 1] in tokens:
+            self._pos += 2
+            return True
+        return self._accept(*tokens)
+
+    def _parse_iff(self) -> Optional[Formula]:
+        left = self._parse_implies()
+        while self._accept('<->', 'iff'):
+            right = self._parse_implies()
+            if left is None or right is None:
+                return left or right
+            left = iff(left, right)
+        return left
+
+    def _parse_implies(self) -> Optional[Formula]:
+        if self._accept('if'):
+            antecedent = self._parse_or()
+            self._accept(',')
+            self._accept('then')
+            consequent = self._parse_implies()
+            if antecedent is None or consequent is None:
+                return antecedent or consequent
+            return implies(antecedent, consequent)
+        left = self._parse_or()
+        if self._accept('->', 'implies'):
+            right = self._parse_implies()
+            if left is None or right is None:
+                return left or right
+            return implies(left, right)
+        return left
+
+    def _parse_or(self) -> Optional[Formula]:
+        self._accept('either')
+        operands = [self._parse_and()]
+        while self._accept_connective('|', 'or'):
+            operands.append(self._parse_and())
+        operands = [op for op in operands if op is not None]
+        return disj(*operands) if operands else None
+
+    def _parse_and(self) -> Optional[Formula]:
+        operands = [self._parse_not()]
+        while self._accept_connective('&', 'and'):
+            operands.append(self._parse_not())
+        operands = [op for op in operands if op is not None]
+        return conj(*operands) if operands else None
+
+    def _parse_not(self) -> Optional[Formula]:
+        if self._accept('~', '!', 'not'):
+            operand = self._parse_not()
+            return neg(operand) if operand is not None else None
+        if self._accept('('):
+            inner = self._parse_iff()
+            self._accept(')')
+            return inner
+        return self._parse_atom()
+
+    def _parse_atom(self) -> Optional[Formula]:
+        words: List[str] = []
+        negated = False
+        while True:
+            token = self._peek()
+            if token == 'not' and words:
+                # 文中の否定語は命題変数全体の否定とみなす
+                negated = not negated
+                self._pos += 1
+                continue
+            if token is None or token in self._RESERVED:
+                break
+            if token not in self._FILLERS:
+                words.append(token)
+            self._pos += 1
+        if not words:
+            return None
+        formula = atom(' '.join(words))
+        return neg(formula) if negated else formula
+
+
+class SATSolver:
+    """
+    監視リテラル方式のCDCL SATソルバ
+
+    リテラルは DIMACS 形式の0以外の整数で表す。学習節は solve() の呼び出しを
+    またいで保持され、仮定リテラルを使った追加的な求解に対応する
+    """
+
+    def __init__(self):
+        self.num_vars = 0
+        self.clauses: List[List[int]] = []
+        self.units: List[int] = []
+        self.watches: Dict[int, List[int]] = {}
+        self.values: List[Optional[bool]] = [None]
+        self.levels: List[int] = [0]
+        self.reasons: List[Optional[int]] = [None]
+        self.activity: List[float] = [0.0]
+        self.phase: List[bool] = [False]
+        self.trail: List[int] = []
+        self.trail_lim: List[int] = []
+        self.qhead = 0
+        self.unsat = False
+        self._bump = 1.0
+        self.conflicts = 0
+
+    def new_var(self) -> int:
+        """新しい変数を追加し、その番号を返す"""
+        self.num_vars += 1
+        self.values.append(None)
+        self.levels.append(0)
+        self.reasons.append(None)
+        self.activity.append(0.0)
+        self.phase.append(False)
+        self.watches[self.num_vars] = []
+        self.watches[-self.num_vars] = []
+        return self.num_vars
+
+    def add_clause(self, literals: Iterable[int]) -> bool:
+        """
+        節を追加する
+
+        Args:
+            literals: 節を構成するリテラル
+
+        Returns:
+            bool: 節集合が自明に充足不能になった場合はFalse
+        """
+        self._reset()
+        clause = list(dict.fromkeys(literals))
+        if any(-lit in clause for lit in clause):
+            return True
+        if not clause:
+            self.unsat = True
+            return False
+        if len(clause) == 1:
+            self.units.append(clause[0])
+            return True
+        self._attach(clause)
+        return True
+
+    def solve(self,
+              assumptions: Sequence[int] = (),
+              time_budget: Optional[float] = None) -> Optional[bool]:
+        """
+        節集合の充足可能性を判定する
+
+        Args:
+            assumptions: 真と仮定するリテラル
+            time_budget: 探索に使える秒数（Noneの場合は無制限）
+
+        Returns:
+            Optional[bool]: 充足可能ならTrue、不能ならFalse、時間切れならNone
+        """
+        if self.unsat:
+            return False
+        deadline = None if time_budget is None else time.perf_counter() + time_budget
+        self._reset()
+        for unit in self.units:
+            value = self._value(unit)
+            if value is False:
+                self.unsat = True
+                return False
+            if value is None:
+                self._enqueue(unit, None)
+
+        steps = 0
+        while True:
+            conflict = self._propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                if self._decision_level() == 0:
+                    self.unsat = True
+                    return False
+                learnt, backjump = self._analyze(conflict)
+                self._backtrack(backjump)
+                if len(learnt) == 1:
+                    self.units.append(learnt[0])
+                    self._enqueue(learnt[0], None)
+                else:
+                    self._enqueue(learnt[0], self._attach(learnt))
+                self._bump /= 0.95
+            else:
+                level = self._decision_level()
+                if level < len(assumptions):
+                    literal = assumptions[level]
+                    value = self._value(literal)
+                    self.trail_lim.append(len(self.trail))
+                    if value is False:
+                        self._reset()
+                        return False
+                    if value is None:
+                        self._enqueue(literal, None)
+                    continue
+                var = self._pick_branch()
+                if var is None:
+                    return True
+                self.trail_lim.append(len(self.trail))
+                self._enqueue(var if self.phase[var] else -var, None)
+
+            steps += 1
+            if deadline is not None and steps % 64 == 0 and time.perf_counter() > deadline:
+                self._reset()
+                return None
+
+    def model(self) -> Dict[int, bool]:
+        """直前の solve() で見つかった割り当て"""
+        return {var: bool(self.values[var]) for var in range(1, self.num_vars + 1)
+                if self.values[var] is not None}
+
+    def _value(self, literal: int) -> Optional[bool]:
+        value = self.values[abs(literal)]
+        if value is None:
+            return None
+        return value if literal > 0 else not value
+
+    def _decision_level(self) -> int:
+        return len(self.trail_lim)
+
+    def _attach(self, clause: List[int]) -> int:
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self.watches[clause[0]].append(index)
+        self.watches[clause[1]].append(index)
+        return index
+
+    def _enqueue(self, literal: int, reason: Optional[int]) -> None:
+        var = abs(literal)
+        self.values[var] = literal > 0
+        self.levels[var] = self._decision_level()
+        self.reasons[var] = reason
+        self.trail.append(literal)
+
+    def _propagate(self) -> Optional[int]:
+        """単位伝播を行い、矛盾が生じた節の番号を返す"""
+        while self.qhead < len(self.trail):
+            false_lit = -self.trail[self.qhead]
+            self.qhead += 1
+            watchers = self.watches[false_lit]
+            kept: List[int] = []
+            conflict = None
+            i = 0
+            while i < len(watchers):
+                index = watchers[i]
+                i += 1
+                clause = self.clauses[index]
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], clause[0]
+                if self._value(clause[0]) is True:
+                    kept.append(index)
+                    continue
+                for k in range(2, len(clause)):
+                    if self._value(clause[k]) is not False:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches[clause[1]].append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if self._value(clause[0]) is False:
+                        conflict = index
+                        kept.extend(watchers[i:])
+                        break
+                    self._enqueue(clause[0], index)
+            self.watches[false_lit] = kept
+            if conflict is not None:
+                return conflict
+        return None
+
+    def _analyze(self, conflict: int) -> Tuple[List[int], int]:
+        """第一UIPに基づいて学習節とバックジャンプ先のレベルを求める"""
+        learnt: List[int] = [0]
+        seen = set()
+        counter = 0
+        literal = None
+        clause = self.clauses[conflict]
+        index = len(self.trail) - 1
+        current = self._decision_level()
+        while True:
+            for q in (clause if literal is None else clause[1:]):
+                var = abs(q)
+                if var not in seen and self.levels[var] > 0:
+                    seen.add(var)
+                    self.activity[var] += self._bump
+                    if self.levels[var] == current:
+                        counter += 1
+                    else:
+                        learnt.append(q)
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            seen.discard(abs(literal))
+            counter -= 1
+            if counter == 0:
+                break
+            clause = self.clauses[self.reasons[abs(literal)]]
+        learnt[0] = -literal
+
+        if len(learnt) == 1:
+            return learnt, 0
+        # 2番目の監視リテラルには最も深いレベルのリテラルを置く
+        deepest = max(range(1, len(learnt)), key=lambda k: self.levels[abs(learnt[k])])
+        learnt[1], learnt[deepest] = learnt[deepest], learnt[1]
+        return learnt, self.levels[abs(learnt[1])]
+
+    def _backtrack(self, level: int) -> None:
+        if self._decision_level() <= level:
+            return
+        start = self.trail_lim[level]
+        for literal in self.trail[start:]:
+            var = abs(literal)
+            self.phase[var] = literal > 0
+            self.values[var] = None
+            self.reasons[var] = None
+        del self.trail[start:]
+        del self.trail_lim[level:]
+        self.qhead = min(self.qhead, start)
+
+    def _reset(self) -> None:
+        """レベル0を含む全ての割り当てを解除する"""
+        for literal in self.trail:
+            var = abs(literal)
+            self.values[var] = None
+            self.reasons[var] = None
+        self.trail = []
+        self.trail_lim = []
+        self.qhead = 0
+
+    def _pick_branch(self) -> Optional[int]:
+        best = None
+        best_activity = -1.0
+        for var in range(1, self.num_vars + 1):
+            if self.values[var] is None and self.activity[var] > best_activity:
+                best = var
+                best_activity = self.activity[var]
+        return best
+
+
+class CNFEncoder:
+    """
+    論理式をTseitin変換でCNFに変換し、SATソルバに登録する
+
+    ハッシュコンシングにより同一の部分式は1つの変数にまとめられる
+    """
+
+    def __init__(self, solver: SATSolver):
+        self.solver = solver
+        self.variables: Dict[int, int] = {}
+        self._formulas: Dict[int, Formula] = {}
+
+    def literal(self, formula: Formula) -> int:
+        """
+        論理式と同値なリテラルを返す（必要な定義節はソルバに追加される）
+
+        Args:
+            formula: 変換対象の論理式
+
+        Returns:
+            int: 論理式の真偽と一致するリテラル
+        """
+        if formula.op == NOT:
+            return -self.literal(formula.args[0])
+        key = id(formula)
+        if key in self.variables:
+            return self.variables[key]
+
+        args = [self.literal(arg) for arg in formula.args] if formula.op != ATOM else []
+        var = self.solver.new_var()
+        self.variables[key] = var
+        # ノードを保持して id の再利用を防ぐ
+        self._formulas[key] = formula
+        add = self.solver.add_clause
+        if formula.op == AND:
+            for a in args:
+                add([-var, a])
+            add([var] + [-a for a in args])
+        elif formula.op == OR:
+            for a in args:
+                add([var, -a])
+            add([-var] + args)
+        elif formula.op == IMPLIES:
+            a, b = args
+            add([-var, -a, b])
+            add([var, a])
+            add([var, -b])
+        elif formula.op == IFF:
+            a, b = args
+            add([-var, -a, b])
+            add([-var, a, -b])
+            add([var, a, b])
+            add([var, -a, -b])
+        return var
+
+    def atom_literals(self) -> Dict[str, int]:
+        """命題変数名と対応する変数番号"""
+        return {f.args[0]: var for key, var in self.variables.items()
+                for f in (self._formulas[key],) if f.op == ATOM}
+
+
+def to_cnf(formula: Formula) -> Tuple[List[List[int]], Dict[str, int]]:
+    """
+    論理式を充足可能性が等価なCNFに変換する
+
+    Args:
+        formula: 変換対象の論理式
+
+    Returns:
+        Tuple[List[List[int]], Dict[str, int]]: 節のリストと命題変数の番号対応
+    """
+    solver = SATSolver()
+    encoder = CNFEncoder(solver)
+    solver.add_clause([encoder.literal(formula)])
+    return [[u] for u in solver.units] + solver.clauses, encoder.atom_literals()
+
+
+def is_satisfiable(formulas: Sequence[Formula],
+                   time_budget: Optional[float] = None) -> Optional[bool]:
+    """
+    論理式の集合が同時に充足可能かを判定する
+
+    Args:
+        formulas: 判定対象の論理式
+        time_budget: 探索に使える秒数
+
+    Returns:
+        Optional[bool]: 充足可能ならTrue、不能ならFalse、時間切れならNone
+    """
+    solver = SATSolver()
+    encoder = CNFEncoder(solver)
+    for formula in formulas:
+        solver.add_clause([encoder.literal(formula)])
+    return solver.solve(time_budget=time_budget)
+
+
+def entails(premises: Sequence[Formula],
+            conclusion: Formula,
+            time_budget: Optional[float] = None) -> Optional[bool]:
+    """
+    前提から結論が論理的に帰結するかを判定する
+
+    Args:
+        premises: 前提の論理式
+        conclusion: 結論の論理式
+        time_budget: 探索に使える秒数
+
+    Returns:
+        Optional[bool]: 帰結するならTrue、しないならFalse、時間切れならNone
+    """
+    result = is_satisfiable(list(premises) + [neg(conclusion)], time_budget)
+    return None if result is None else not result
+
+
+class IncrementalSolver:
+    """
+    前提の追加・撤回に対応した増分判定器
+
+    各前提には選択変数を割り当て、「選択変数 → 前提」の節として登録する。
+    判定時は有効な前提の選択変数を仮定として与えるため、ソルバの学習節は
+    前提集合が変わっても再利用できる。判定結果は前提集合ごとにメモ化する
+    """
+
+    def __init__(self):
+        self.solver = SATSolver()
+        self.encoder = CNFEncoder(self.solver)
+        self.selectors: Dict[int, int] = {}
+        self.active: Dict[int, Formula] = {}
+        self._memo: Dict[Tuple[frozenset, Optional[int]], bool] = {}
+
+    def add(self, formula: Formula) -> None:
+        """前提を追加する"""
+        key = id(formula)
+        if key not in self.selectors:
+            selector = self.solver.new_var()
+            self.solver.add_clause([-selector, self.encoder.literal(formula)])
+            self.selectors[key] = selector
+        self.active[key] = formula
+
+    def retract(self, formula: Formula) -> None:
+        """前提を撤回する（節は残し、選択変数を仮定しないことで無効化する）"""
+        self.active.pop(id(formula), None)
+
+    def is_consistent(self, time_budget: Optional[float] = None) -> Optional[bool]:
+        """
+        有効な前提が同時に充足可能かを判定する
+
+        Returns:
+            Optional[bool]: 充足可能ならTrue、不能ならFalse、時間切れならNone
+        """
+        return self._solve(None, time_budget)
+
+    def entails(self, conclusion: Formula,
+                time_budget: Optional[float] = None) -> Optional[bool]:
+        """
+        有効な前提から結論が帰結するかを判定する
+
+        Returns:
+            Optional[bool]: 帰結するならTrue、しないならFalse、時間切れならNone
+        """
+        literal = self.encoder.literal(conclusion)
+        result = self._solve(-literal, time_budget)
+        return None if result is None else not result
+
+    def _solve(self, extra: Optional[int], time_budget: Optional[float]) -> Optional[bool]:
+        key = (frozenset(self.active), extra)
+        if key in self._memo:
+            return self._memo[key]
+        assumptions = [self.selectors[k] for k in self.active]
+        if extra is not None:
+            assumptions.append(extra)
+        result = self.solver.solve(assumptions, time_budget)
+        # 時間切れの結果はメモ化しない
+        if result is not None:
+            self._memo[key] = result
+        return result
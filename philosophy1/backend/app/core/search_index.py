@@ -0,0 +1,143 @@
+from typing import Iterable, List, Sequence, Tuple
+import logging
+import os
+import re
+import sqlite3
+import threading
+
+# 索引・検索語として扱うトークン（記号のみのトークンは除く）
+_TERM_PATTERN = re.compile(r"\w", re.UNICODE)
+
+
+def normalize_terms(lemmas: Iterable[str]) -> List[str]:
+    """見出し語を小文字化し、記号のみのトークンを除く"""
+    return [lemma.lower() for lemma in lemmas if _TERM_PATTERN.search(lemma)]
+
+
+class PropositionSearchIndex:
+    """
+    保存済みの命題に対する見出し語（レンマ）の転置インデックス
+
+    SQLiteのFTS5仮想表に命題ごとの見出し語列を格納し、BM25で順位付けして検索する。
+    見出し語は NLPEngine.parse_text の結果を空白区切りで登録するため、
+    語形の違う表現も同じ語として一致する
+    """
+
+    def __init__(self, db_path: str = ':memory:'):
+        """
+        Args:
+            db_path: SQLiteファイルのパス
+        """
+        self.logger = logging.getLogger(__name__)
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if db_path != ':memory:' and directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS search_documents (
+                doc_id INTEGER PRIMARY KEY,
+                proposition_id TEXT NOT NULL UNIQUE
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS proposition_lemmas
+                USING fts5(lemmas, tokenize = 'unicode61 remove_diacritics 2');
+        """)
+        self._db.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM search_documents').fetchone()[0]
+
+    def add(self, proposition_id: str, lemmas: Iterable[str]) -> None:
+        """
+        命題の見出し語を登録する（登録済みの場合は置き換える）
+
+        Args:
+            proposition_id: 命題のID
+            lemmas: 命題の見出し語
+        """
+        self.add_many([(proposition_id, lemmas)])
+
+    def add_many(self, documents: Iterable[Tuple[str, Iterable[str]]]) -> int:
+        """
+        複数の命題をまとめて1つのトランザクションで登録する
+
+        Args:
+            documents: (命題のID, 見出し語) の組
+
+        Returns:
+            int: 登録した命題の数
+        """
+        count = 0
+        with self._lock, self._db:
+            for proposition_id, lemmas in documents:
+                doc_id = self._doc_id(proposition_id)
+                self._db.execute('DELETE FROM proposition_lemmas WHERE rowid = ?', (doc_id,))
+                self._db.execute(
+                    'INSERT INTO proposition_lemmas (rowid, lemmas) VALUES (?, ?)',
+                    (doc_id, ' '.join(normalize_terms(lemmas)))
+                )
+                count += 1
+        return count
+
+    def remove(self, proposition_id: str) -> None:
+        """命題を索引から削除する"""
+        with self._lock, self._db:
+            row = self._db.execute(
+                'SELECT doc_id FROM search_documents WHERE proposition_id = ?', (proposition_id,)
+            ).fetchone()
+            if row is not None:
+                self._db.execute('DELETE FROM proposition_lemmas WHERE rowid = ?', row)
+                self._db.execute('DELETE FROM search_documents WHERE doc_id = ?', row)
+
+    def search(self,
+               lemmas: Sequence[str],
+               limit: int = 20,
+               match_all: bool = False) -> List[Tuple[str, float]]:
+        """
+        見出し語でBM25順位付き検索を行う
+
+        Args:
+            lemmas: 検索語の見出し語
+            limit: 返す最大件数
+            match_all: 全ての語を含む命題のみを返す（Falseの場合はいずれかを含む命題）
+
+        Returns:
+            List[Tuple[str, float]]: 命題のIDとスコア（スコアの高い順）
+        """
+        terms = list(dict.fromkeys(normalize_terms(lemmas)))
+        if not terms:
+            return []
+        # 各語を引用符で囲み、FTS5の演算子として解釈されないようにする
+        query = (' AND ' if match_all else ' OR ').join('"{}"'.format(t.replace('"', '""')) for t in terms)
+        with self._lock:
+            rows = self._db.execute("""
+                SELECT d.proposition_id, bm25(proposition_lemmas) AS score
+                FROM proposition_lemmas
+                JOIN search_documents AS d ON d.doc_id = proposition_lemmas.rowid
+                WHERE proposition_lemmas MATCH ?
+                ORDER BY score
+                LIMIT ?
+            """, (query, limit)).fetchall()
+        # FTS5のbm25は小さいほど関連度が高いため符号を反転する
+        return [(proposition_id, -score) for proposition_id, score in rows]
+
+    def optimize(self) -> None:
+        """索引のセグメントを統合して検索を速くする（大量登録の後に呼ぶ）"""
+        with self._lock, self._db:
+            self._db.execute("INSERT INTO proposition_lemmas (proposition_lemmas) VALUES ('optimize')")
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def _doc_id(self, proposition_id: str) -> int:
+        """命題IDに対応する文書番号（ロック取得済みで呼ぶこと）"""
+        self._db.execute(
+            'INSERT OR IGNORE INTO search_documents (proposition_id) VALUES (?)', (proposition_id,)
+        )
+        return self._db.execute(
+            'SELECT doc_id FROM search_documents WHERE proposition_id = ?', (proposition_id,)
+        ).fetchone()[0]
@@ -0,0 +1,339 @@
+from typing import Any, Dict, List, Optional, Set, Tuple
+from dataclasses import dataclass, field
+import re
+
+import numpy as np
+
+from app.core.near_duplicate import polarity_markers
+
+# 支持関係を表す接続表現と、文が支持される側の主張を断定するかどうか
+_SUPPORT_PATTERNS = [
+    (re.compile(r"^\s*if\b(?P<source>.+?)(?:,\s*then\b|\bthen\b|,)(?P<target>.+)$", re.I), False),
+    (re.compile(r"^(?P<source>.+?)\b(?:implies|entails)\b(?P<target>.+)$", re.I), False),
+    (re.compile(r"^(?P<source>.+?)[,;]?\s*\b(?:therefore|thus|hence)\b,?(?P<target>.+)$", re.I), True),
+    # 「so」は「so tired」「so that」などにも現れるため、読点・セミコロンで区切られた節の先頭のみ推論とみなす
+    (re.compile(r"^(?P<source>.+?)[,;]\s*so\b(?!\s+that\b),?(?P<target>.+)$", re.I), True),
+    (re.compile(r"^(?P<target>.+?)\b(?:because|since|as shown by)\b(?P<source>.+)$", re.I), True),
+]
+
+# 正規化時に除外する機能語（否定語は意味を変えるため残す）
+_STOP_WORDS = {
+    'a', 'an', 'the', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'it', 'this',
+    'that', 'these', 'those', 'of', 'to', 'in', 'on', 'for', 'and', 'therefore', 'thus',
+    'hence', 'so', 'do', 'does', 'did', 'must', 'we', 'can', 'will',
+}
+
+
+def simple_lemmas(text: str) -> List[str]:
+    """spaCyを使わない簡易的な語形正規化"""
+    words = re.findall(r"[a-z0-9']+", text.lower().replace("n't", " not"))
+    return [w[:-1] if len(w) > 3 and w.endswith('s') and not w.endswith('ss')
+            and w not in _STOP_WORDS else w
+            for w in words]
+
+
+def lemma_key(lemmas: List[str]) -> str:
+    """機能語を除いた見出し語の集合を正規化キーとする"""
+    return ' '.join(sorted(set(l for l in lemmas if l not in _STOP_WORDS)))
+
+
+def lemma_sequence_key(lemmas: List[str]) -> str:
+    """機能語を除いた見出し語の並びを正規化キーとする（語順を区別する）"""
+    return ' '.join(l for l in lemmas if l not in _STOP_WORDS)
+
+
+@dataclass
+class SupportCycle:
+    """循環する支持関係"""
+    claims: List[str]
+    premise_indices: List[int] = field(default_factory=list)
+
+
+class UnionFind:
+    """同値類を管理する素集合データ構造"""
+
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, x: int) -> int:
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a: int, b: int) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+def tarjan_scc(num_nodes: int, edges: Dict[int, Set[int]]) -> List[List[int]]:
+    """
+    Tarjanのアルゴリズムで強連結成分を求める（再帰を使わない実装）
+
+    Args:
+        num_nodes: ノード数
+        edges: ノードごとの隣接ノード集合
+
+    Returns:
+        List[List[int]]: 強連結成分のリスト
+    """
+    index_of = [-1] * num_nodes
+    lowlink = [0] * num_nodes
+    on_stack = [False] * num_nodes
+    stack: List[int] = []
+    components: List[List[int]] = []
+    counter = 0
+
+    for root in range(num_nodes):
+        if index_of[root] != -1:
+            continue
+        work = [(root, iter(edges.get(root, ())))]
+        index_of[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        while work:
+            node, neighbors = work[-1]
+            advanced = False
+            for nxt in neighbors:
+                if index_of[nxt] == -1:
+                    index_of[nxt] = lowlink[nxt] = counter
+                    counter += 1
+                    stack.append(nxt)
+                    on_stack[nxt] = True
+                    work.append((nxt, iter(edges.get(nxt, ()))))
+                    advanced = True
+                    break
+                if on_stack[nxt]:
+                    lowlink[node] = min(lowlink[node], index_of[nxt])
+            if advanced:
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+            if lowlink[node] == index_of[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+    return components
+
+
+class SupportGraphBuilder:
+    """
+    前提と結論の間の支持関係グラフを構築し、循環論法を検出する
+
+    各主張は見出し語（レンマ）に基づく正規化キーで同値類にまとめ、
+    spaCyモデルが与えられた場合は埋め込みの近い主張もランダム超平面LSHで
+    候補を絞ったうえで同一視する。循環は強連結成分として線形時間で求める
+    """
+
+    def __init__(self,
+                 nlp: Optional[Any] = None,
+                 similarity_threshold: float = 0.92,
+                 hash_bits: int = 12,
+                 seed: int = 0):
+        """
+        Args:
+            nlp: spaCyモデル（Noneの場合は簡易的な語形正規化のみを行う）
+            similarity_threshold: 同一の主張とみなす埋め込みのコサイン類似度
+            hash_bits: LSHの超平面数
+            seed: 超平面生成用の乱数シード
+        """
+        self.nlp = nlp
+        self.similarity_threshold = similarity_threshold
+        self.hash_bits = hash_bits
+        self._rng = np.random.default_rng(seed)
+        self._planes: Optional[np.ndarray] = None
+
+    def find_cycles(self,
+                    premises: List[str],
+                    conclusion: str,
+                    parsed: Optional[List[Any]] = None) -> List[SupportCycle]:
+        """
+        循環する支持関係を検出する
+
+        Args:
+            premises: 前提の文
+            conclusion: 結論の文
+            parsed: 前提・結論の順に各文を解析したspaCyの Span（または Doc）。渡した場合は
+                主張の見出し語と埋め込みをその部分範囲から求め、主張を再解析しない
+
+        Returns:
+            List[SupportCycle]: 検出された循環（関与する前提の番号を含む）
+        """
+        sentences = list(premises) + ([conclusion] if conclusion else [])
+        conclusion_index = len(premises) if conclusion else None
+
+        # 文ごとに主張される命題と、文の内部の支持関係（主張番号の組）を抽出
+        # （主張ごとに、由来する文の番号と文中の文字範囲も記録する）
+        claims: List[str] = []
+        ranges: List[Tuple[int, int, int]] = []
+        sentence_claims: List[int] = []
+        internal_edges: List[Tuple[int, int, int]] = []
+        for i, sentence in enumerate(sentences):
+            split = self._split_support(sentence)
+            if split is not None:
+                (source, source_range), (target, target_range), asserts_target = split
+                claims.extend([source, target])
+                ranges.extend([(i, *source_range), (i, *target_range)])
+                internal_edges.append((len(claims) - 2, len(claims) - 1, i))
+                # 「AだからB」はBを主張するが、「AならばB」は条件文そのものを主張する
+                if asserts_target:
+                    sentence_claims.append(len(claims) - 1)
+                    continue
+            claims.append(sentence)
+            ranges.append((i, 0, len(sentence)))
+            sentence_claims.append(len(claims) - 1)
+
+        spans = self._claim_spans(sentences, parsed, ranges) if self.nlp is not None else None
+        classes = self._equivalence_classes(claims, spans)
+
+        # 同値類の上に支持グラフを構築（辺ごとに由来する前提を記録）
+        edges: Dict[int, Set[int]] = {}
+        origins: Dict[Tuple[int, int], Set[int]] = {}
+
+        def add_edge(source: int, target: int, origin: int) -> None:
+            u, v = classes[source], classes[target]
+            edges.setdefault(u, set()).add(v)
+            origins.setdefault((u, v), set()).add(origin)
+
+        for source, target, origin in internal_edges:
+            add_edge(source, target, origin)
+        if conclusion_index is not None:
+            for i in range(len(premises)):
+                add_edge(sentence_claims[i], sentence_claims[conclusion_index], i)
+
+        num_nodes = max(classes) + 1 if classes else 0
+        components = [c for c in tarjan_scc(num_nodes, edges)
+                      if len(c) > 1 or c[0] in edges.get(c[0], ())]
+        component_of = {node: k for k, c in enumerate(components) for node in c}
+
+        # 成分内で閉じた辺の由来を成分ごとに集める
+        involved_by_component: List[Set[int]] = [set() for _ in components]
+        for (u, v), sources in origins.items():
+            k = component_of.get(u)
+            if k is not None and component_of.get(v) == k:
+                involved_by_component[k] |= sources
+
+        cycles = []
+        for involved in involved_by_component:
+            premise_indices = sorted(i for i in involved if i != conclusion_index)
+            if not premise_indices:
+                continue
+            cycles.append(SupportCycle(
+                claims=[sentences[i] for i in sorted(involved)],
+                premise_indices=premise_indices
+            ))
+        return cycles
+
+    def _split_support(self, sentence: str) -> Optional[Tuple[Tuple[str, Tuple[int, int]],
+                                                              Tuple[str, Tuple[int, int]], bool]]:
+        """
+        文を支持関係に分割する
+
+        Returns:
+            支持する主張・支持される主張（それぞれ文中の文字範囲と共に）・
+            文が後者を主張するか（該当しない場合はNone）
+        """
+        for pattern, asserts_target in _SUPPORT_PATTERNS:
+            match = pattern.match(sentence)
+            if match:
+                source = self._group(match, 'source')
+                target = self._group(match, 'target')
+                if source[0] and target[0]:
+                    return source, target, asserts_target
+        return None
+
+    @staticmethod
+    def _group(match: re.Match, name: str) -> Tuple[str, Tuple[int, int]]:
+        """一致した部分から前後の空白・句読点を除いた主張と、その文中の文字範囲"""
+        raw = match.group(name)
+        start = match.start(name) + len(raw) - len(raw.lstrip(' ,.'))
+        claim = raw.strip(' ,.')
+        return claim, (start, start + len(claim))
+
+    @staticmethod
+    def _claim_spans(sentences: List[str],
+                     parsed: Optional[List[Any]],
+                     ranges: List[Tuple[int, int, int]]) -> Optional[List[Any]]:
+        """解析済みの文から、主張ごとの部分範囲（spaCyの Span）を切り出す（対応が取れない場合はNone）"""
+        if parsed is None or len(parsed) < len(sentences) or \
+                any(parsed[i].text != sentence for i, sentence in enumerate(sentences)):
+            return None
+        spans = []
+        for i, start, end in ranges:
+            sentence = parsed[i]
+            doc = getattr(sentence, 'doc', sentence)
+            offset = getattr(sentence, 'start_char', 0)
+            span = doc.char_span(offset + start, offset + end, alignment_mode='expand')
+            if span is None:
+                return None
+            spans.append(span)
+        return spans
+
+    def _equivalence_classes(self, claims: List[str], spans: Optional[List[Any]] = None) -> List[int]:
+        """
+        主張ごとの同値類番号を求める
+
+        Args:
+            claims: 主張
+            spans: 主張ごとの解析結果（省略した場合、spaCyモデルがあれば主張を解析する）
+        """
+        vectors = None
+        if spans is None and self.nlp is not None:
+            spans = list(self.nlp.pipe(claims))
+        if spans is not None:
+            keys = [lemma_key([t.lemma_.lower() for t in span if not t.is_punct]) for span in spans]
+            vectors = np.array([span.vector for span in spans], dtype=np.float32)
+        else:
+            keys = [lemma_key(simple_lemmas(claim)) for claim in claims]
+
+        # 正規化キーが一致する主張を同一視
+        key_ids: Dict[str, int] = {}
+        union = UnionFind(len(claims))
+        for i, key in enumerate(keys):
+            if key in key_ids:
+                union.union(key_ids[key], i)
+            else:
+                key_ids[key] = i
+
+        if vectors is not None and vectors.ndim == 2 and vectors.shape[1] > 0:
+            self._merge_similar(vectors, union, [polarity_markers(claim) for claim in claims])
+
+        # 代表元を0からの連番に振り直す
+        roots: Dict[int, int] = {}
+        return [roots.setdefault(union.find(i), len(roots)) for i in range(len(claims))]
+
+    def _merge_similar(self, vectors: np.ndarray, union: UnionFind, polarities: List[Tuple[str, ...]]) -> None:
+        """
+        LSHバケット内でのみ埋め込みを比較し、類似する主張を同一視する
+
+        埋め込みは否定語1語の違いをほとんど反映しないため、否定語（polarity_markers）が
+        異なる主張は類似度に関わらず同一視しない
+        """
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        valid = norms[:, 0] > 0
+        normalized = np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+        if self._planes is None or self._planes.shape[1] != vectors.shape[1]:
+            self._planes = self._rng.standard_normal((self.hash_bits, vectors.shape[1])).astype(np.float32)
+        signs = (normalized @ self._planes.T) > 0
+        signatures = signs @ (1 << np.arange(self.hash_bits))
+
+        buckets: Dict[int, List[int]] = {}
+        for i in np.flatnonzero(valid):
+            buckets.setdefault(int(signatures[i]), []).append(int(i))
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            block = normalized[members]
+            similar = np.argwhere(np.triu(block @ block.T, k=1) >= self.similarity_threshold)
+            for a, b in similar:
+                if polarities[members[a]] == polarities[members[b]]:
+                    union.union(members[a], members[b])
@@ -0,0 +1,181 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from dataclasses import dataclass, field
+import json
+import logging
+import os
+import threading
+import time
+
+DEFAULT_TEMPLATES_PATH = os.getenv("EXPERIMENT_TEMPLATES_PATH", "templates/experiment_templates.json")
+
+
+@dataclass(frozen=True)
+class TemplateSnapshot:
+    """ある時点のテンプレート集合とその索引（読み込み後は変更しない）"""
+    templates: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    by_complexity: Dict[int, Tuple[str, ...]] = field(default_factory=dict)
+    by_tag: Dict[str, Tuple[str, ...]] = field(default_factory=dict)
+    listing: Tuple[Dict[str, Any], ...] = ()
+    mtime: Optional[float] = None
+
+
+class TemplateRegistry:
+    """
+    思考実験テンプレートのプロセス内共有レジストリ
+
+    テンプレートはカテゴリ・複雑さ・タグで索引付けした不変のスナップショットとして保持する。
+    ファイルの更新時刻を一定間隔で確認し、変更があればバックグラウンドで再読み込みして
+    スナップショットを差し替えるため、参照側が読み込みを待つことはない
+    """
+
+    def __init__(self, path: str = DEFAULT_TEMPLATES_PATH, check_interval: float = 2.0):
+        """
+        Args:
+            path: テンプレートファイルのパス（.json または1行1テンプレートの .jsonl）
+            check_interval: 更新確認の最短間隔（秒）
+        """
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self.check_interval = check_interval
+        self._snapshot = self._build_snapshot()
+        self._last_check = time.monotonic()
+        self._reloading = threading.Lock()
+
+    @property
+    def snapshot(self) -> TemplateSnapshot:
+        """現在のスナップショット（必要に応じて再読み込みを開始する）"""
+        self._maybe_reload()
+        return self._snapshot
+
+    @property
+    def templates(self) -> Dict[str, Dict[str, Any]]:
+        """カテゴリをキーとするテンプレート"""
+        return self.snapshot.templates
+
+    def get(self, category: str) -> Optional[Dict[str, Any]]:
+        """カテゴリに対応するテンプレートを返す"""
+        return self.snapshot.templates.get(category)
+
+    def list_templates(self) -> Tuple[Dict[str, Any], ...]:
+        """全テンプレートの一覧（事前に構築済み）"""
+        return self.snapshot.listing
+
+    def find(self, complexity: Optional[int] = None, tag: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        複雑さやタグでテンプレートを絞り込む
+
+        Args:
+            complexity: 対応できる複雑さレベル
+            tag: タグ
+
+        Returns:
+            List[Dict[str, Any]]: 条件に一致するテンプレート
+        """
+        snapshot = self.snapshot
+        categories = None
+        if complexity is not None:
+            categories = set(snapshot.by_complexity.get(complexity, ()))
+        if tag is not None:
+            tagged = set(snapshot.by_tag.get(tag, ()))
+            categories = tagged if categories is None else categories & tagged
+        if categories is None:
+            return list(snapshot.listing)
+        return [t for t in snapshot.listing if t["category"] in categories]
+
+    def reload(self) -> None:
+        """テンプレートファイルを同期的に再読み込みする"""
+        self._snapshot = self._build_snapshot()
+
+    def _maybe_reload(self) -> None:
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        mtime = self._mtime()
+        if mtime == self._snapshot.mtime or not self._reloading.acquire(blocking=False):
+            return
+
+        def worker() -> None:
+            try:
+                self._snapshot = self._build_snapshot()
+                self.logger.info(f"テンプレートを再読み込みしました: {self.path}")
+            finally:
+                self._reloading.release()
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return None
+
+    def _iter_templates(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """テンプレートファイルを読み込む（.jsonl は1行ずつ逐次処理する）"""
+        with open(self.path, 'r', encoding='utf-8') as f:
+            if self.path.endswith('.jsonl'):
+                for line in f:
+                    if line.strip():
+                        template = json.loads(line)
+                        yield template["category"], template
+            else:
+                yield from json.load(f).items()
+
+    def _build_snapshot(self) -> TemplateSnapshot:
+        mtime = self._mtime()
+        templates: Dict[str, Dict[str, Any]] = {}
+        try:
+            for category, template in self._iter_templates():
+                templates[category] = template
+        except FileNotFoundError:
+            self.logger.warning("テンプレートファイルが見つかりません")
+        except (json.JSONDecodeError, KeyError) as e:
+            # 書き込み途中などで読めない場合は現在のスナップショットを維持する
+            self.logger.error(f"テンプレートの読み込みエラー: {str(e)}")
+            current = getattr(self, '_snapshot', None)
+            if current is not None:
+                return current
+
+        by_complexity: Dict[int, List[str]] = {}
+        by_tag: Dict[str, List[str]] = {}
+        listing = []
+        for category, template in templates.items():
+            # base_conditions の数までの複雑さに対応できる
+            max_complexity = template.get("complexity", len(template.get("base_conditions", [])))
+            for level in range(1, max_complexity + 1):
+                by_complexity.setdefault(level, []).append(category)
+            for tag in template.get("tags", []):
+                by_tag.setdefault(tag, []).append(category)
+            listing.append(dict(template, category=category))
+
+        return TemplateSnapshot(
+            templates=templates,
+            by_complexity={k: tuple(v) for k, v in by_complexity.items()},
+            by_tag={k: tuple(v) for k, v in by_tag.items()},
+            listing=tuple(listing),
+            mtime=mtime
+        )
+
+
+# パスごとにプロセス内で共有するレジストリ
+_registries: Dict[str, TemplateRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_template_registry(path: str = DEFAULT_TEMPLATES_PATH) -> TemplateRegistry:
+    """
+    テンプレートレジストリを取得する（パスごとにプロセス内で1つだけ生成）
+
+    Args:
+        path: テンプレートファイルのパス
+
+    Returns:
+        TemplateRegistry: 共有レジストリ
+    """
+    registry = _registries.get(path)
+    if registry is None:
+        with _registries_lock:
+            if path not in _registries:
+                _registries[path] = TemplateRegistry(path)
+            registry = _registries[path]
+    return registry
@@ -3,15 +3,13 @@ Models initialization file for LogicLens application.
 This file exports all model classes for easy access throughout the application.
 """
 
-from .proposition import Proposition
-from .concept import Concept
-from .logical_structure import LogicalStructure
-from .validation_result import ValidationResult
+from .proposition import Base, Proposition, Analysis, Concept, proposition_concept
 
 # Export all models for easy import elsewhere
 __all__ = [
+    'Base',
     'Proposition',
+    'Analysis',
     'Concept',
-    'LogicalStructure',
-    'ValidationResult'
-]
\ No newline at end of file
+    'proposition_concept'
+]
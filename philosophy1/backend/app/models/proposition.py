@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, JSON, ForeignKey, Table
+from sqlalchemy import Column, String, Boolean, JSON, ForeignKey, LargeBinary, Table
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 from typing import List, Optional
@@ -11,8 +11,8 @@ Base = declarative_base()
 proposition_concept = Table(
     'proposition_concept',
     Base.metadata,
-    Column('proposition_id', String, ForeignKey('propositions.id')),
-    Column('concept_id', String, ForeignKey('concepts.id'))
+    Column('proposition_id', String, ForeignKey('propositions.id'), index=True),
+    Column('concept_id', String, ForeignKey('concepts.id'), index=True)
 )
 
 class Proposition(Base):
@@ -23,7 +23,9 @@ class Proposition(Base):
     text = Column(String, nullable=False)
     structure = Column(JSON, nullable=False)  # LogicalStructureを格納
     validity = Column(JSON)  # ValidationResultを格納
-    created_at = Column(String, default=lambda: datetime.utcnow().isoformat())
+    minhash = Column(LargeBinary)  # 見出し語シングルのMinHash署名（近似重複の検出用）
+    # 索引により最新の作成時刻を全件を走査せずに求められる（LSHインデックスの更新検出用）
+    created_at = Column(String, default=lambda: datetime.utcnow().isoformat(), index=True)
     updated_at = Column(String, default=lambda: datetime.utcnow().isoformat())
 
     # リレーションシップ
@@ -31,7 +33,12 @@ class Proposition(Base):
     analyses = relationship("Analysis", back_populates="proposition")
 
     def to_dict(self):
-        """命題をディクショナリ形式に変換"""
+        """
+        命題をディクショナリ形式に変換
+
+        concepts が未読み込みの場合は命題ごとにクエリが発生するため、一覧では
+        PropositionRepository の一括読み込みまたは射影による取得を使う
+        """
         return {
             "id": self.id,
             "text": self.text,
@@ -47,7 +54,7 @@ class Analysis(Base):
     __tablename__ = 'analyses'
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    proposition_id = Column(String, ForeignKey('propositions.id'))
+    proposition_id = Column(String, ForeignKey('propositions.id'), index=True)
     result = Column(JSON, nullable=False)
     method = Column(String, nullable=False)
     created_at = Column(String, default=lambda: datetime.utcnow().isoformat())
@@ -75,7 +82,8 @@ class Concept(Base):
     related_concepts = Column(JSON, default=list)
     user_defined = Column(Boolean, default=True)
     created_at = Column(String, default=lambda: datetime.utcnow().isoformat())
-    updated_at = Column(String, default=lambda: datetime.utcnow().isoformat())
+    # 索引により最新の更新時刻を全件を走査せずに求められる（概念グラフの更新検出用）
+    updated_at = Column(String, default=lambda: datetime.utcnow().isoformat(), index=True)
 
     # リレーションシップ
     propositions = relationship("Proposition", secondary=proposition_concept, back_populates="concepts")
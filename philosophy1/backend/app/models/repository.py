@@ -0,0 +1,284 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from datetime import datetime
+import uuid
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from .proposition import Analysis, Concept, Proposition, proposition_concept
+
+
+class PropositionRepository:
+    """
+    命題・分析結果・概念の永続化を行うリポジトリ
+
+    AsyncSession 上で動作し、分析結果や関連付けの複数行はまとめて1つの
+    INSERT 文（複数VALUES）で書き込む
+    """
+
+    # SQLiteのバインド変数の上限を超えないよう1文あたりの行数を抑える
+    BULK_CHUNK_SIZE = 150
+
+    def __init__(self, session: AsyncSession):
+        """
+        Args:
+            session: 非同期セッション
+        """
+        self.session = session
+
+    async def add_proposition(self,
+                              text: str,
+                              structure: Dict[str, Any],
+                              validity: Optional[Dict[str, Any]] = None,
+                              concept_names: Iterable[str] = (),
+                              concept_ids: Iterable[str] = (),
+                              minhash: Optional[bytes] = None) -> Proposition:
+        """
+        命題を保存し、名前が一致する登録済みの概念および指定IDの概念と関連付ける
+
+        Args:
+            text: 命題のテキスト
+            structure: 論理構造
+            validity: 妥当性検証の結果
+            concept_names: 関連付ける概念の名称
+            concept_ids: 関連付ける概念のID（埋め込みで対応付けた概念など）
+            minhash: 見出し語シングルのMinHash署名
+
+        Returns:
+            Proposition: 保存された命題
+        """
+        proposition = Proposition(text=text, structure=structure, validity=validity, minhash=minhash)
+        self.session.add(proposition)
+        await self.session.flush()
+
+        linked = dict.fromkeys(concept_ids)
+        names = list(dict.fromkeys(concept_names))
+        if names:
+            result = await self.session.execute(select(Concept.id).where(Concept.name.in_(names)))
+            linked.update(dict.fromkeys(result.scalars()))
+        await self._bulk_insert(proposition_concept, [
+            {"proposition_id": proposition.id, "concept_id": concept_id}
+            for concept_id in linked
+        ])
+        return proposition
+
+    async def add_analyses(self, analyses: Sequence[Dict[str, Any]]) -> List[str]:
+        """
+        分析結果をまとめて保存する
+
+        Args:
+            analyses: proposition_id・result・method を持つ辞書のリスト
+
+        Returns:
+            List[str]: 保存された分析結果のID
+        """
+        created_at = datetime.utcnow().isoformat()
+        rows = [{
+            "id": analysis.get("id") or str(uuid.uuid4()),
+            "proposition_id": analysis["proposition_id"],
+            "result": analysis["result"],
+            "method": analysis["method"],
+            "created_at": analysis.get("created_at", created_at),
+        } for analysis in analyses]
+        await self._bulk_insert(Analysis.__table__, rows)
+        return [row["id"] for row in rows]
+
+    async def get_proposition(self, proposition_id: str) -> Optional[Proposition]:
+        """IDで命題を取得する（概念と分析結果も一括で読み込む）"""
+        return await self.session.get(Proposition, proposition_id, options=self._eager_options())
+
+    async def list_propositions(self, limit: int = 100, offset: int = 0) -> List[Proposition]:
+        """
+        命題を作成日時の新しい順に取得する
+
+        概念と分析結果は selectinload で関連ごとに1回のクエリで読み込むため、
+        件数にかかわらずクエリ数は一定になる
+
+        Args:
+            limit: 取得する最大件数
+            offset: 読み飛ばす件数
+
+        Returns:
+            List[Proposition]: 命題のリスト
+        """
+        result = await self.session.execute(
+            select(Proposition)
+            .options(*self._eager_options())
+            .order_by(Proposition.created_at.desc(), Proposition.id)
+            .limit(limit)
+            .offset(offset)
+        )
+        return list(result.scalars())
+
+    async def list_proposition_dicts(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        命題を Proposition.to_dict と同じ形式の辞書で取得する
+
+        ORMオブジェクトを生成せず、命題の列と関連する概念の列を2回のクエリで
+        行タプルとして取得して組み立てる
+
+        Args:
+            limit: 取得する最大件数
+            offset: 読み飛ばす件数
+
+        Returns:
+            List[Dict[str, Any]]: 命題の辞書のリスト
+        """
+        proposition_columns = [
+            Proposition.id, Proposition.text, Proposition.structure, Proposition.validity,
+            Proposition.created_at, Proposition.updated_at
+        ]
+        rows = (await self.session.execute(
+            select(*proposition_columns)
+            .order_by(Proposition.created_at.desc(), Proposition.id)
+            .limit(limit)
+            .offset(offset)
+        )).all()
+
+        propositions = {}
+        for row in rows:
+            item = dict(row._mapping)
+            item["concepts"] = []
+            propositions[row.id] = item
+        if not propositions:
+            return []
+
+        concept_columns = [
+            Concept.id, Concept.name, Concept.definition, Concept.related_concepts,
+            Concept.user_defined, Concept.created_at, Concept.updated_at
+        ]
+        links = await self.session.execute(
+            select(proposition_concept.c.proposition_id, *concept_columns)
+            .join(Concept, Concept.id == proposition_concept.c.concept_id)
+            .where(proposition_concept.c.proposition_id.in_(list(propositions)))
+            .order_by(Concept.name)
+        )
+        for proposition_id, *values in links:
+            propositions[proposition_id]["concepts"].append(
+                dict(zip((column.key for column in concept_columns), values)))
+        return list(propositions.values())
+
+    async def get_proposition_texts(self, proposition_ids: Sequence[str]) -> Dict[str, str]:
+        """複数の命題のテキストを1回のクエリで取得する"""
+        if not proposition_ids:
+            return {}
+        result = await self.session.execute(
+            select(Proposition.id, Proposition.text).where(Proposition.id.in_(list(proposition_ids)))
+        )
+        return dict(result.all())
+
+    async def get_concept_ids(self, proposition_id: str) -> List[str]:
+        """命題に関連付けられた概念のIDを取得する"""
+        result = await self.session.execute(
+            select(proposition_concept.c.concept_id).where(proposition_concept.c.proposition_id == proposition_id)
+        )
+        return list(result.scalars())
+
+    async def get_latest_analysis(self, proposition_id: str) -> Optional[Dict[str, Any]]:
+        """命題の最新の分析結果（Analysis.result）を取得する"""
+        result = await self.session.execute(
+            select(Analysis.result)
+            .where(Analysis.proposition_id == proposition_id)
+            .order_by(Analysis.created_at.desc())
+            .limit(1)
+        )
+        return result.scalar_one_or_none()
+
+    async def list_minhashes(self, created_since: Optional[str] = None) -> List[Tuple[str, bytes]]:
+        """
+        署名を持つ命題のIDとMinHash署名を行タプルのまま取得する（LSHインデックスの構築用）
+
+        Args:
+            created_since: 指定した場合はこの時刻以降に作成された命題のみ
+
+        Returns:
+            List[Tuple[str, bytes]]: 命題のIDと署名
+        """
+        query = select(Proposition.id, Proposition.minhash).where(Proposition.minhash.is_not(None))
+        if created_since is not None:
+            query = query.where(Proposition.created_at >= created_since)
+        result = await self.session.execute(query)
+        return [tuple(row) for row in result]
+
+    async def latest_proposition_created(self) -> Optional[str]:
+        """命題の最新の作成時刻（created_at の索引で求める。他のプロセスによる追加の検出用）"""
+        return (await self.session.execute(select(func.max(Proposition.created_at)))).scalar()
+
+    async def count_minhashes(self) -> int:
+        """署名を持つ命題の件数（全件を数えるため、LSHインデックスの定期的な照合にのみ使う）"""
+        result = await self.session.execute(select(func.count(Proposition.minhash)))
+        return result.scalar()
+
+    async def latest_concept_update(self) -> Optional[str]:
+        """概念の最新の更新時刻（updated_at の索引で求める。他のプロセスによる変更の検出用）"""
+        return (await self.session.execute(select(func.max(Concept.updated_at)))).scalar()
+
+    async def list_concepts(self) -> List[Concept]:
+        """登録済みの全ての概念を名称順に取得する"""
+        result = await self.session.execute(select(Concept).order_by(Concept.name))
+        return list(result.scalars())
+
+    async def list_concept_links(self, updated_since: Optional[str] = None) -> List[Tuple[str, List[str]]]:
+        """
+        概念のIDと関連概念IDを行タプルのまま取得する（概念グラフの構築用）
+
+        Args:
+            updated_since: 指定した場合はこの時刻以降に更新された概念のみ
+
+        Returns:
+            List[Tuple[str, List[str]]]: 概念IDと関連概念IDのリスト
+        """
+        query = select(Concept.id, Concept.related_concepts)
+        if updated_since is not None:
+            query = query.where(Concept.updated_at >= updated_since)
+        result = await self.session.execute(query)
+        return [(concept_id, related or []) for concept_id, related in result]
+
+    async def list_concept_texts(self) -> List[Tuple[str, str, str]]:
+        """全ての概念のID・名称・定義を行タプルのまま取得する（埋め込みインデックスの構築用）"""
+        result = await self.session.execute(select(Concept.id, Concept.name, Concept.definition))
+        return [tuple(row) for row in result]
+
+    async def save_concept(self,
+                           name: str,
+                           definition: str,
+                           related_concepts: Sequence[str] = (),
+                           concept_id: Optional[str] = None) -> Concept:
+        """
+        概念を追加または更新する（IDまたは名称が一致する概念があれば更新）
+
+        Args:
+            name: 概念の名称
+            definition: 概念の定義
+            related_concepts: 関連する概念のIDリスト
+            concept_id: 概念のID
+
+        Returns:
+            Concept: 保存された概念
+        """
+        concept = await self.session.get(Concept, concept_id) if concept_id else None
+        if concept is None:
+            result = await self.session.execute(select(Concept).where(Concept.name == name))
+            concept = result.scalars().first()
+        if concept is None:
+            concept = Concept(id=concept_id, name=name) if concept_id else Concept(name=name)
+            self.session.add(concept)
+        concept.name = name
+        concept.definition = definition
+        concept.related_concepts = list(related_concepts)
+        concept.updated_at = datetime.utcnow().isoformat()
+        await self.session.flush()
+        return concept
+
+    async def commit(self) -> None:
+        await self.session.commit()
+
+    @staticmethod
+    def _eager_options():
+        return (selectinload(Proposition.concepts), selectinload(Proposition.analyses))
+
+    async def _bulk_insert(self, table, rows: List[Dict[str, Any]]) -> None:
+        """複数行を INSERT ... VALUES (...), (...) でまとめて書き込む"""
+        for start in range(0, len(rows), self.BULK_CHUNK_SIZE):
+            await self.session.execute(insert(table).values(rows[start:start + self.BULK_CHUNK_SIZE]))
@@ -0,0 +1,17 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+class ProfileSummary(BaseModel):
+    """保存済みプロファイルの概要を表すスキーマ"""
+    id: int = Field(..., description="プロファイルのID")
+    created_at: str = Field(..., description="採取日時")
+    text: str = Field(..., description="採取したリクエストの入力テキスト")
+    stage: str = Field(..., description="採取した処理（analyze・nlp.analyze など）")
+    trigger: str = Field(..., description="採取の契機（request: 要求、threshold: 処理時間の閾値超過）")
+    duration_ms: float = Field(..., description="処理時間（ミリ秒）")
+    interval_ms: float = Field(..., description="採取間隔（ミリ秒）")
+    samples: int = Field(..., description="サンプル数")
+
+class ProfileDetail(ProfileSummary):
+    """collapsed stack 形式のスタックを含むプロファイルを表すスキーマ"""
+    stacks: str = Field(..., description="collapsed stack 形式のスタック（重みはマイクロ秒）")
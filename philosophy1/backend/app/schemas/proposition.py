@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel, Field
 
 class LogicalStructure(BaseModel):
@@ -70,4 +70,53 @@ class AnalysisResponse(BaseModel):
                 },
                 "timestamp": "2024-11-03T00:39:00Z"
             }
-        }
\ No newline at end of file
+        }
+
+class BatchAnalysisItem(BaseModel):
+    """一括分析の1件分の結果を表すスキーマ（NDJSONの1行に対応）"""
+    index: int = Field(..., description="入力内での位置")
+    result: Optional[AnalysisResponse] = Field(None, description="分析結果（成功時）")
+    error: Optional[str] = Field(None, description="エラー内容（失敗時）")
+
+class PropositionRequest(BaseModel):
+    """命題解析リクエストのスキーマ"""
+    text: str = Field(..., min_length=1, description="命題のテキスト")
+
+class PropositionAnalysis(AnalysisResponse):
+    """保存済みの命題に対する分析結果を表すスキーマ"""
+    proposition_id: Optional[str] = Field(None, description="保存された命題のID")
+    duplicate_of: Optional[str] = Field(None, description="分析結果を再利用した近似重複の命題のID")
+    similarity: Optional[float] = Field(None, description="近似重複との推定Jaccard類似度")
+    profile_id: Optional[int] = Field(None, description="このリクエストで採取したプロファイルのID")
+
+class ValidationRequest(BaseModel):
+    """論理検証リクエストのスキーマ"""
+    analysis: PropositionAnalysis = Field(..., description="検証する命題の解析結果")
+
+class StoredProposition(BaseModel):
+    """保存済みの命題を表すスキーマ"""
+    id: str = Field(..., description="命題の一意識別子")
+    text: str = Field(..., description="命題のテキスト")
+    structure: dict = Field(..., description="論理構造の分析結果")
+    validity: Optional[dict] = Field(None, description="妥当性検証の結果")
+    created_at: Optional[str] = Field(None, description="作成日時")
+    updated_at: Optional[str] = Field(None, description="更新日時")
+    concepts: List[Concept] = Field(default_factory=list, description="関連する概念のリスト")
+
+class ConceptNeighborhood(BaseModel):
+    """概念グラフ上の近傍を表すスキーマ"""
+    concept_id: str = Field(..., description="起点の概念ID")
+    degree: int = Field(..., description="起点の次数")
+    distances: Dict[str, int] = Field(default_factory=dict, description="到達した概念IDと起点からのホップ数")
+
+class ConceptPath(BaseModel):
+    """概念グラフ上の最短経路を表すスキーマ"""
+    source: str = Field(..., description="始点の概念ID")
+    target: str = Field(..., description="終点の概念ID")
+    path: Optional[List[str]] = Field(None, description="始点から終点までの概念ID（到達できない場合はnull）")
+
+class PropositionSearchHit(BaseModel):
+    """命題検索の結果を表すスキーマ"""
+    proposition_id: str = Field(..., description="命題のID")
+    text: str = Field(..., description="命題のテキスト")
+    score: float = Field(..., description="BM25スコア（大きいほど関連度が高い）")
@@ -0,0 +1,4 @@
+"""
+Services package for LogicLens backend.
+Services combine the core engines with persistence for the API routes.
+"""
@@ -0,0 +1,526 @@
+from fastapi import Depends
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+import uuid
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.proposition import config, validate_input
+from app.api.proposition.batch import build_analysis_response
+from app.core.concept_graph import BOTH, ConceptGraph
+from app.core.concept_index import ConceptVectorIndex, IndexLock
+from app.core.database import get_session
+from app.core.metrics import ANALYSES, stage
+from app.core.near_duplicate import LSHIndex, MinHasher, polarity_markers
+from app.core.profiler import RequestProfile, current_profile, profile_stage
+from app.core.search_index import PropositionSearchIndex
+from app.models.repository import PropositionRepository
+from app.schemas.proposition import (
+    Concept,
+    ConceptNeighborhood,
+    ConceptPath,
+    PropositionAnalysis,
+    PropositionSearchHit,
+    StoredProposition,
+    ValidationResult
+)
+
+# プロセス内で共有する概念グラフ（初回参照時にConceptテーブルから構築）と、最後に取り込んだ
+# 時点の概念の最新の更新時刻。他のワーカーの変更はこの値の変化で検出し、差分のみ取り込む
+_concept_graph: Optional[ConceptGraph] = None
+_concept_graph_stamp: Optional[str] = None
+_concept_graph_lock = asyncio.Lock()
+
+# 差分の取り込みで遡る秒数（更新時刻の順と異なる順にコミットされた更新を取りこぼさないため）
+CONCEPT_GRAPH_LOOKBACK_SECONDS = float(os.getenv("CONCEPT_GRAPH_LOOKBACK_SECONDS", "30"))
+
+# 概念の埋め込みインデックスの保存先と、プロセス内で共有するインデックス
+# （保存先はワーカープロセス間で共有し、構築・更新は IndexLock の下で行う）
+CONCEPT_INDEX_PATH = os.getenv("CONCEPT_INDEX_PATH", "data/concept_index")
+_concept_index: Optional[ConceptVectorIndex] = None
+_concept_index_lock = asyncio.Lock()
+
+# 命題の見出し語検索インデックス
+SEARCH_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH", "data/search_index.db")
+_search_index: Optional[PropositionSearchIndex] = None
+
+
+def _lookback(stamp: Optional[str]) -> Optional[str]:
+    """更新時刻から CONCEPT_GRAPH_LOOKBACK_SECONDS 遡った時刻（ISO形式）"""
+    if stamp is None:
+        return None
+    return (datetime.fromisoformat(stamp) - timedelta(seconds=CONCEPT_GRAPH_LOOKBACK_SECONDS)).isoformat()
+
+
+def get_search_index() -> PropositionSearchIndex:
+    """命題の検索インデックスを取得する（初回呼び出し時に開く）"""
+    global _search_index
+    if _search_index is None:
+        _search_index = PropositionSearchIndex(SEARCH_INDEX_PATH)
+    return _search_index
+
+# 近似重複の検出に使うMinHashとLSHインデックス（初回参照時に保存済みの署名から構築）と、
+# 最後に取り込んだ時点の命題の最新の作成時刻、署名の件数と照合した時刻（time.monotonic）
+DUPLICATE_THRESHOLD = float(os.getenv("DUPLICATE_THRESHOLD", "0.9"))
+_minhasher = MinHasher()
+_duplicate_index: Optional[LSHIndex] = None
+_duplicate_index_stamp: Optional[str] = None
+_duplicate_index_reconciled = 0.0
+_duplicate_index_lock = asyncio.Lock()
+
+# LSHインデックスの件数を保存済みの署名の件数と照合する間隔（秒）。作成時刻の順と異なる順に
+# コミットされた命題は最新の作成時刻を動かさないため、この照合で取りこぼしを検出する
+DUPLICATE_INDEX_RECONCILE_SECONDS = float(os.getenv("DUPLICATE_INDEX_RECONCILE_SECONDS", "60"))
+
+# 要求されたリクエストのプロファイルの採取間隔（秒）
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", "2")) / 1000
+
+
+def _build_duplicate_index(rows: Sequence[Tuple[str, bytes]], index: Optional[LSHIndex] = None) -> LSHIndex:
+    """保存済みの署名からLSHインデックスを構築する（index を渡した場合は未登録の命題のみ追加する）"""
+    if index is None:
+        index = LSHIndex(num_perm=_minhasher.num_perm)
+    for proposition_id, minhash in rows:
+        if proposition_id not in index:
+            index.add(proposition_id, _minhasher.from_bytes(minhash))
+    return index
+
+
+def _concept_text(name: str, definition: Optional[str]) -> str:
+    """埋め込みに使う概念のテキスト（名称と定義）"""
+    return f"{name}. {definition}" if definition else name
+
+
+async def _build_concept_index(rows: Sequence[Tuple[str, str, str]], path: str) -> ConceptVectorIndex:
+    """概念の名称と定義から埋め込みインデックスを構築して保存する（埋め込みはワーカーで計算）"""
+    nlp_engine = config.async_nlp_engine
+    dim = (await nlp_engine.embed(["concept"])).shape[1]
+    index = ConceptVectorIndex(dim=dim, path=path)
+    batch = 1024
+    for start in range(0, len(rows), batch):
+        chunk = rows[start:start + batch]
+        vectors = await nlp_engine.embed([_concept_text(name, definition) for _, name, definition in chunk])
+        await asyncio.to_thread(index.add, [row[0] for row in chunk], vectors)
+    await asyncio.to_thread(index.save)
+    return index
+
+
+def _index_concept(index: ConceptVectorIndex, concept_id: str, vector: np.ndarray) -> ConceptVectorIndex:
+    """
+    概念の埋め込みをインデックスに追加して保存する
+
+    他のプロセスが保存先を更新していれば開き直してから追加するため、他のプロセスの追加を失わない
+
+    Returns:
+        ConceptVectorIndex: 追加後のインデックス（開き直した場合は新しいインスタンス）
+    """
+    with IndexLock(index.path):
+        if index.changed_on_disk():
+            index = ConceptVectorIndex.open(index.path)
+        index.add([concept_id], vector)
+        index.save()
+    return index
+
+
+class PropositionService:
+    """
+    命題の解析・検証と結果の永続化を行うサービス
+
+    spaCyを使う処理（解析・論理検証・埋め込み）はプロセスプールで、ファイルへの書き込みは
+    スレッドで、保存は AsyncSession で行うため、いずれもイベントループを塞がない
+    """
+
+    def __init__(self, session: AsyncSession = Depends(get_session)):
+        """
+        Args:
+            session: リクエストごとの非同期セッション
+        """
+        self.repository = PropositionRepository(session)
+
+    async def analyze(self, text: str, reuse_duplicates: bool = True, profile: bool = False) -> PropositionAnalysis:
+        """
+        命題を解析し、命題と分析結果を保存する
+
+        見出し語のMinHash署名でLSHインデックスを引き、推定類似度が DUPLICATE_THRESHOLD 以上で
+        否定語の一致する保存済みの命題があれば、解析をやり直さずにその分析結果を複製して
+        この命題の分析結果として保存する（duplicate_of に再利用元の命題IDを入れて返す）
+
+        Args:
+            text: 命題のテキスト
+            reuse_duplicates: 近似重複の分析結果を再利用するかどうか
+            profile: このリクエストのみサンプリングプロファイラで採取し、入力テキストと共に保存する
+
+        Returns:
+            PropositionAnalysis: 保存された命題のIDを含む解析結果
+        """
+        if not profile:
+            return await self._analyze(text, reuse_duplicates)
+
+        request_profile = RequestProfile(PROFILE_INTERVAL)
+        token = current_profile.set(request_profile)
+        try:
+            result = await self._analyze(text, reuse_duplicates)
+        finally:
+            current_profile.reset(token)
+        profile_id = await asyncio.to_thread(
+            config.profile_store.add, text, "analyze", "request", request_profile.combined()
+        )
+        return result.copy(update={"profile_id": profile_id})
+
+    async def _analyze(self, text: str, reuse_duplicates: bool) -> PropositionAnalysis:
+        """analyze の本体（プロファイル中は current_profile に段階ごとのプロファイルが集まる）"""
+        with stage('validate_input'):
+            validate_input(text)
+        lemmas = await config.async_nlp_engine.lemmatize(text)
+        signature = _minhasher.signature(lemmas)
+        if reuse_duplicates:
+            with stage('duplicate_lookup'):
+                duplicate = await self.find_duplicate_analysis(text, signature)
+            if duplicate is not None:
+                duplicate_of, similarity, reused = duplicate
+                result = {**reused, "id": str(uuid.uuid4()), "original_text": text}
+                with stage('persist'):
+                    concept_ids = await self.repository.get_concept_ids(duplicate_of)
+                    proposition_id = await self._persist(
+                        text, result, [concept["name"] for concept in result["concepts"]], concept_ids,
+                        signature, method="duplicate"
+                    )
+                await self._index_proposition(proposition_id, lemmas, signature)
+                ANALYSES.labels('duplicate').inc()
+                return PropositionAnalysis(
+                    **result,
+                    proposition_id=proposition_id,
+                    duplicate_of=duplicate_of,
+                    similarity=similarity
+                )
+
+        analysis, validation = await config.async_nlp_engine.analyze_and_validate(text)
+        with profile_stage('build_response'):
+            response = build_analysis_response(text, analysis, validation)
+        with stage('concept_linking'):
+            concept_names = [concept.name for concept in response.concepts]
+            concept_ids = await self.link_concepts(concept_names)
+        with stage('serialize'):
+            result = response.dict()
+
+        with stage('persist'):
+            proposition_id = await self._persist(text, result, concept_names, concept_ids, signature, method="nlp")
+        await self._index_proposition(proposition_id, analysis['parsed']['lemmas'], signature)
+        ANALYSES.labels('analyzed').inc()
+        return PropositionAnalysis(**result, proposition_id=proposition_id)
+
+    async def _persist(self,
+                       text: str,
+                       result: Dict[str, Any],
+                       concept_names: List[str],
+                       concept_ids: List[str],
+                       signature: np.ndarray,
+                       method: str) -> str:
+        """
+        命題と分析結果を保存する
+
+        Returns:
+            str: 保存した命題のID
+        """
+        proposition = await self.repository.add_proposition(
+            text=text,
+            structure=result['structure'],
+            validity=result['validity'],
+            concept_names=concept_names,
+            concept_ids=concept_ids,
+            minhash=_minhasher.to_bytes(signature)
+        )
+        await self.repository.add_analyses([{
+            "id": result["id"],
+            "proposition_id": proposition.id,
+            "result": result,
+            "method": method
+        }])
+        await self.repository.commit()
+        return proposition.id
+
+    async def _index_proposition(self, proposition_id: str, lemmas: List[str], signature: np.ndarray) -> None:
+        """保存した命題を検索インデックスと近似重複のインデックスに登録する"""
+        with stage('search_index'):
+            await asyncio.to_thread(get_search_index().add, proposition_id, lemmas)
+        if _duplicate_index is not None:
+            _duplicate_index.add(proposition_id, signature)
+
+    async def duplicate_index(self) -> LSHIndex:
+        """
+        近似重複のLSHインデックスを取得する
+
+        未構築の場合は保存済みの署名から構築する。命題の最新の作成時刻（索引で求める）が
+        前回から変わった（他のワーカープロセスが命題を保存した）場合は、前回の最新時刻以降の
+        署名のみ取り込む。DUPLICATE_INDEX_RECONCILE_SECONDS ごとに署名の件数と照合し、
+        足りなければ（作成時刻の順にコミットされなかった場合）構築し直す
+        """
+        global _duplicate_index, _duplicate_index_stamp, _duplicate_index_reconciled
+        stamp = await self.repository.latest_proposition_created()
+        reconcile = time.monotonic() - _duplicate_index_reconciled >= DUPLICATE_INDEX_RECONCILE_SECONDS
+        if _duplicate_index is not None and stamp == _duplicate_index_stamp and not reconcile:
+            return _duplicate_index
+        async with _duplicate_index_lock:
+            if _duplicate_index is not None and stamp != _duplicate_index_stamp:
+                rows = await self.repository.list_minhashes(created_since=_duplicate_index_stamp)
+                # 差分は少数のため、検索中の他のリクエストと競合しないようイベントループ上で追加する
+                _build_duplicate_index(rows, _duplicate_index)
+            if _duplicate_index is not None and reconcile:
+                if len(_duplicate_index) < await self.repository.count_minhashes():
+                    _duplicate_index = None
+                _duplicate_index_reconciled = time.monotonic()
+            if _duplicate_index is None:
+                rows = await self.repository.list_minhashes()
+                _duplicate_index = await asyncio.to_thread(_build_duplicate_index, rows)
+                _duplicate_index_reconciled = time.monotonic()
+            _duplicate_index_stamp = stamp
+        return _duplicate_index
+
+    async def find_duplicate_analysis(self,
+                                      text: str,
+                                      signature: np.ndarray) -> Optional[Tuple[str, float, Dict[str, Any]]]:
+        """
+        署名が近く、否定語が一致する保存済みの命題の分析結果を探す
+
+        Args:
+            text: 命題のテキスト
+            signature: 命題のMinHash署名
+
+        Returns:
+            Optional[Tuple[str, float, Dict[str, Any]]]: 近似重複の命題ID・推定類似度・分析結果
+            （見つからない場合はNone）
+        """
+        index = await self.duplicate_index()
+        hits = index.query(signature, threshold=DUPLICATE_THRESHOLD, limit=3)
+        if not hits:
+            return None
+        texts = await self.repository.get_proposition_texts([proposition_id for proposition_id, _ in hits])
+        polarity = polarity_markers(text)
+        for proposition_id, similarity in hits:
+            # 否定語の異なる命題は署名が近くても反対の主張のため再利用しない
+            if proposition_id not in texts or polarity_markers(texts[proposition_id]) != polarity:
+                continue
+            result = await self.repository.get_latest_analysis(proposition_id)
+            if result is not None:
+                return proposition_id, similarity, result
+        return None
+
+    async def search(self, query: str, limit: int = 20, match_all: bool = False) -> List[PropositionSearchHit]:
+        """
+        保存済みの命題を見出し語で検索する
+
+        Args:
+            query: 検索文（見出し語に変換して照合する）
+            limit: 返す最大件数
+            match_all: 全ての語を含む命題のみを返す
+
+        Returns:
+            List[PropositionSearchHit]: BM25スコアの高い順の検索結果
+        """
+        lemmas = await config.async_nlp_engine.lemmatize(query)
+        hits = await asyncio.to_thread(get_search_index().search, lemmas, limit, match_all)
+        texts = await self.repository.get_proposition_texts([proposition_id for proposition_id, _ in hits])
+        return [
+            PropositionSearchHit(proposition_id=proposition_id, text=texts[proposition_id], score=score)
+            for proposition_id, score in hits if proposition_id in texts
+        ]
+
+    async def get_all_concepts(self) -> List[Concept]:
+        """
+        登録済みの全ての概念を取得する
+
+        Returns:
+            List[Concept]: 概念のリスト
+        """
+        return [Concept(**concept.to_dict()) for concept in await self.repository.list_concepts()]
+
+    async def list_propositions(self, limit: int = 100, offset: int = 0) -> List[StoredProposition]:
+        """
+        保存済みの命題を新しい順に取得する（ORMオブジェクトを介さない射影で取得）
+
+        Args:
+            limit: 取得する最大件数
+            offset: 読み飛ばす件数
+
+        Returns:
+            List[StoredProposition]: 命題のリスト
+        """
+        rows = await self.repository.list_proposition_dicts(limit=limit, offset=offset)
+        return [StoredProposition(**row) for row in rows]
+
+    async def get_proposition(self, proposition_id: str) -> Optional[StoredProposition]:
+        """
+        保存済みの命題を取得する
+
+        Args:
+            proposition_id: 命題のID
+
+        Returns:
+            Optional[StoredProposition]: 命題（存在しない場合はNone）
+        """
+        proposition = await self.repository.get_proposition(proposition_id)
+        return StoredProposition(**proposition.to_dict()) if proposition is not None else None
+
+    async def save_concept(self, concept: Concept) -> Concept:
+        """
+        概念を追加・更新し、構築済みの概念グラフにも差分を反映する
+
+        Args:
+            concept: 保存する概念
+
+        Returns:
+            Concept: 保存された概念
+        """
+        saved = await self.repository.save_concept(
+            name=concept.name,
+            definition=concept.definition,
+            related_concepts=concept.related_concepts,
+            concept_id=concept.id
+        )
+        await self.repository.commit()
+        if _concept_graph is not None:
+            async with _concept_graph_lock:
+                await self._refresh_concept_graph()
+        if _concept_index is not None:
+            await self._index_saved_concept(saved.id, _concept_text(saved.name, saved.definition))
+        return Concept(**saved.to_dict())
+
+    async def _index_saved_concept(self, concept_id: str, text: str) -> None:
+        """保存した概念の埋め込みを共有の保存先に追加する"""
+        global _concept_index
+        vector = await config.async_nlp_engine.embed([text])
+        async with _concept_index_lock:
+            _concept_index = await asyncio.to_thread(_index_concept, _concept_index, concept_id, vector)
+
+    async def concept_index(self) -> ConceptVectorIndex:
+        """
+        概念の埋め込みインデックスを取得する
+
+        保存済みのインデックスがあればメモリマップで開き、無ければConceptテーブルから構築する。
+        他のプロセスが保存先を更新した（meta.json が置き換わった）場合は開き直す
+        """
+        global _concept_index
+        if _concept_index is not None and not _concept_index.changed_on_disk():
+            return _concept_index
+        async with _concept_index_lock:
+            if _concept_index is None or _concept_index.changed_on_disk():
+                _concept_index = await self._load_concept_index()
+        return _concept_index
+
+    async def _load_concept_index(self) -> ConceptVectorIndex:
+        """
+        ファイルロックの下で保存済みのインデックスを開くか、無ければ構築して保存する
+
+        ロックを取ってから保存先を確認するため、複数のワーカーが同時に起動しても構築は1回で済む
+        """
+        lock = IndexLock(CONCEPT_INDEX_PATH)
+        await asyncio.to_thread(lock.acquire)
+        try:
+            if ConceptVectorIndex.exists(CONCEPT_INDEX_PATH):
+                return await asyncio.to_thread(ConceptVectorIndex.open, CONCEPT_INDEX_PATH)
+            rows = await self.repository.list_concept_texts()
+            return await _build_concept_index(rows, CONCEPT_INDEX_PATH)
+        finally:
+            lock.release()
+
+    async def link_concepts(self, names: List[str]) -> List[str]:
+        """
+        抽出した概念の表記を埋め込みの近い登録済みの概念IDに対応付ける
+
+        Args:
+            names: 抽出した概念の表記
+
+        Returns:
+            List[str]: 対応付けられた概念ID
+        """
+        index = await self.concept_index()
+        links = await config.async_nlp_engine.link_concepts(names, index)
+        return [link[0] for link in links.values() if link is not None]
+
+    async def concept_graph(self) -> ConceptGraph:
+        """
+        概念グラフを取得する
+
+        未構築の場合はConceptテーブルから構築する。概念の最新の更新時刻（索引で求める）が
+        取り込み時から変わった（他のワーカープロセスが概念を保存した）場合は差分のみ反映する
+        """
+        global _concept_graph, _concept_graph_stamp
+        stamp = await self.repository.latest_concept_update()
+        if _concept_graph is not None and stamp == _concept_graph_stamp:
+            return _concept_graph
+        async with _concept_graph_lock:
+            if _concept_graph is None:
+                rows = await self.repository.list_concept_links()
+                _concept_graph = await asyncio.to_thread(ConceptGraph.from_rows, rows)
+                _concept_graph_stamp = stamp
+            elif stamp != _concept_graph_stamp:
+                await self._refresh_concept_graph()
+        return _concept_graph
+
+    async def _refresh_concept_graph(self) -> None:
+        """
+        前回の取り込み以降に更新された概念を構築済みの概念グラフに反映する
+        （_concept_graph_lock を取得した状態で呼び出す）
+        """
+        global _concept_graph_stamp
+        stamp = await self.repository.latest_concept_update()
+        rows = await self.repository.list_concept_links(updated_since=_lookback(_concept_graph_stamp))
+        for concept_id, related in rows:
+            _concept_graph.update_concept(concept_id, related)
+        _concept_graph_stamp = stamp
+
+    async def concept_neighborhood(self, concept_id: str, k: int = 1, direction: str = BOTH) -> ConceptNeighborhood:
+        """
+        概念から k ホップ以内の概念を取得する
+
+        Args:
+            concept_id: 起点の概念ID
+            k: 最大ホップ数
+            direction: 辿る方向（'out'・'in'・'both'）
+
+        Returns:
+            ConceptNeighborhood: 近傍の概念と距離
+        """
+        graph = await self.concept_graph()
+        return ConceptNeighborhood(
+            concept_id=concept_id,
+            degree=graph.degree(concept_id, direction),
+            distances=graph.k_hop(concept_id, k, direction)
+        )
+
+    async def concept_path(self, source: str, target: str, direction: str = BOTH) -> ConceptPath:
+        """
+        2つの概念を結ぶ最短経路を取得する
+
+        Args:
+            source: 始点の概念ID
+            target: 終点の概念ID
+            direction: 辿る方向
+
+        Returns:
+            ConceptPath: 最短経路
+        """
+        graph = await self.concept_graph()
+        return ConceptPath(source=source, target=target, path=graph.shortest_path(source, target, direction))
+
+    async def validate(self, analysis: PropositionAnalysis) -> ValidationResult:
+        """
+        解析結果の元のテキストを再解析して論理的妥当性を検証する
+
+        命題ID（無い場合は分析ID）ごとの ValidationSession で検証するため、
+        同じ論証を編集しながら再検証すると、変化した前提のみを反映して判定する
+
+        Args:
+            analysis: 検証する命題の解析結果
+
+        Returns:
+            ValidationResult: 検証結果
+        """
+        text = analysis.original_text
+        key = analysis.proposition_id or analysis.id
+        result, validation = await config.async_nlp_engine.validate_in_session(key, text)
+        return build_analysis_response(text, result, validation).validity
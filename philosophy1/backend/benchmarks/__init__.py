@@ -0,0 +1,5 @@
+"""
+NLPエンジン・論理解析エンジン・思考実験エンジンのベンチマーク
+
+backend ディレクトリで ``python -m benchmarks`` として実行する
+"""
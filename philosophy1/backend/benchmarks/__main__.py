@@ -0,0 +1,69 @@
+from typing import Dict, List
+import argparse
+import logging
+import os
+import sys
+
+from .harness import BenchmarkResult, DEFAULT_THRESHOLDS, compare, format_table, load_report, write_report
+from .suites import SUITES, SuiteSkipped
+
+# 結果の既定の保存先（ソースツリーを汚さないよう .gitignore 済みのディレクトリに置く）
+DEFAULT_OUTPUT = os.path.join('.benchmarks', 'benchmark-results.json')
+
+
+def _parse_thresholds(values: List[str]) -> Dict[str, float]:
+    thresholds = {}
+    for value in values:
+        metric, _, ratio = value.partition('=')
+        if metric not in DEFAULT_THRESHOLDS or not ratio:
+            raise argparse.ArgumentTypeError(f"Invalid threshold: {value} (use METRIC=RATIO)")
+        thresholds[metric] = float(ratio)
+    return thresholds
+
+
+def main(argv: List[str] = None) -> int:
+    """
+    ベンチマークを実行し、結果を保存してベースラインと比較する
+
+    Returns:
+        int: 終了コード（回帰があれば1）
+    """
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__)
+    parser.add_argument('--suite', action='append', choices=sorted(SUITES),
+                        help='実行するスイート（複数指定可、既定は全て）')
+    parser.add_argument('--scale', type=float, default=1.0, help='コーパスの件数の倍率')
+    parser.add_argument('--repeat', type=int, default=1, help='入力全体を繰り返す回数')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='結果を保存するJSONファイル')
+    parser.add_argument('--baseline', help='比較するベースラインのJSONファイル')
+    parser.add_argument('--threshold', action='append', default=[], metavar='METRIC=RATIO',
+                        help=f'回帰とみなす変化率（既定: {DEFAULT_THRESHOLDS}）')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    metadata = {'scale': args.scale, 'repeat': args.repeat}
+    results: List[BenchmarkResult] = []
+    skipped: Dict[str, str] = {}
+    for name in args.suite or sorted(SUITES):
+        try:
+            results.extend(SUITES[name](args.scale, args.repeat, metadata))
+        except SuiteSkipped as e:
+            skipped[name] = str(e)
+            print(f"skipped {name}: {e}", file=sys.stderr)
+
+    write_report(args.output, results, skipped, metadata)
+    print(format_table(results))
+    print(f"\nresults written to {args.output}")
+
+    if args.baseline:
+        regressions = compare(results, load_report(args.baseline), _parse_thresholds(args.threshold))
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"\nno regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,160 @@
+from typing import Dict, List
+from datetime import datetime
+import json
+import os
+import random
+import re
+
+from app.core.experiment_engine import ExperimentScenario
+from app.core.logic_analyzer import LogicalProposition
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+# APIが受け付ける命題の最大長（validate_input と同じ）
+MAX_TEXT_LENGTH = 1000
+
+# 合成コーパスの語彙
+_SUBJECTS = [
+    'the philosopher', 'every citizen', 'the mind', 'a rational agent', 'the state',
+    'the trolley driver', 'each person', 'the scientist', 'the soul', 'the community',
+    'a virtuous person', 'the observer', 'the artist', 'the judge', 'the student'
+]
+_PREDICATES = [
+    'is mortal', 'acts freely', 'seeks happiness', 'knows the truth', 'ought to keep promises',
+    'deserves respect', 'perceives the world', 'causes harm', 'follows the law', 'values justice',
+    'doubts its own existence', 'is responsible for the outcome', 'desires the good',
+    'can be mistaken', 'reasons about morality'
+]
+_CONNECTORS = ['Therefore', 'Hence', 'So', 'Thus', 'Consequently']
+_SENTENCE_PATTERNS = [
+    'All {s} {p}.',
+    'If {s} {p}, then {s2} {p2}.',
+    '{s} {p} because {s2} {p2}.',
+    'Either {s} {p} or {s2} {p2}.',
+    'It is not the case that {s} {p}.',
+    'Since {s} {p}, {s2} {p2}.',
+]
+_CONDITION_PATTERNS = [
+    '{s} {p}',
+    'not {s} {p}',
+    'if {s} {p} then {s2} {p2}',
+    '{s} {p} and {s2} {p2}',
+    'either {s} {p} or {s2} {p2}',
+]
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+
+def _fill(pattern: str, rng: random.Random) -> str:
+    text = pattern.format(s=rng.choice(_SUBJECTS), p=rng.choice(_PREDICATES),
+                          s2=rng.choice(_SUBJECTS), p2=rng.choice(_PREDICATES))
+    return text[0].upper() + text[1:]
+
+
+def short_claims(count: int, seed: int = 0) -> List[str]:
+    """1文の短い主張"""
+    rng = random.Random(seed)
+    return [_fill(rng.choice(_SENTENCE_PATTERNS), rng) for _ in range(count)]
+
+
+def long_arguments(count: int, length: int = MAX_TEXT_LENGTH, seed: int = 0) -> List[str]:
+    """前提を連ねて結論で終わる、長さ length 文字以内でそれに近い論証"""
+    rng = random.Random(seed)
+    arguments = []
+    for _ in range(count):
+        conclusion = f"{rng.choice(_CONNECTORS)}, {_fill('{s} {p}.', rng).lower()}"
+        sentences: List[str] = []
+        while True:
+            sentence = _fill(rng.choice(_SENTENCE_PATTERNS), rng)
+            if sum(len(s) + 1 for s in sentences) + len(sentence) + 1 + len(conclusion) > length:
+                break
+            sentences.append(sentence)
+        arguments.append(' '.join(sentences + [conclusion]))
+    return arguments
+
+
+def debates(count: int, premises: int = 100, seed: int = 0) -> List[LogicalProposition]:
+    """多数の前提を持つ論証（論理解析エンジン用）"""
+    rng = random.Random(seed)
+    return [
+        LogicalProposition(
+            subject=rng.choice(_SUBJECTS),
+            predicate=rng.choice(_PREDICATES),
+            modifiers=[],
+            premises=[_fill(rng.choice(_SENTENCE_PATTERNS), rng) for _ in range(premises)],
+            conclusion=_fill('{s} {p}.', rng)
+        )
+        for _ in range(count)
+    ]
+
+
+def to_logical_propositions(texts: List[str]) -> List[LogicalProposition]:
+    """テキストを文に分け、最後の文を結論、それ以前を前提とする（NLPを介さない簡易変換）"""
+    propositions = []
+    for text in texts:
+        sentences = [s for s in _SENTENCE_END.split(text.strip()) if s]
+        words = sentences[-1].split() if sentences else ['']
+        propositions.append(LogicalProposition(
+            subject=words[0],
+            predicate=words[1] if len(words) > 1 else '',
+            modifiers=[],
+            premises=sentences[:-1],
+            conclusion=sentences[-1] if sentences else ''
+        ))
+    return propositions
+
+
+def scenarios(count: int, conditions: int = 5, variables: int = 3, seed: int = 0) -> List[ExperimentScenario]:
+    """思考実験のシナリオ"""
+    rng = random.Random(seed)
+    now = datetime(2024, 1, 1)
+    return [
+        ExperimentScenario(
+            id=f"scenario_{i}",
+            title=f"Synthetic scenario {i}",
+            description="Generated for benchmarking",
+            variables={f"var_{j}": rng.choice(_PREDICATES) for j in range(variables)},
+            conditions=[_fill(rng.choice(_CONDITION_PATTERNS), rng).lower() for _ in range(conditions)],
+            expected_outcomes=[_fill('{s} {p}', rng).lower()],
+            created_at=now,
+            updated_at=now
+        )
+        for i in range(count)
+    ]
+
+
+def templated_scenarios(count: int, conditions: int = 20, pool: int = 300, seed: int = 0) -> List[ExperimentScenario]:
+    """
+    共通の条件の集合から条件を選んだシナリオ
+
+    テンプレートから生成したシナリオのように、異なるシナリオが同じ条件文を共有する場合
+    """
+    rng = random.Random(seed)
+    shared = sorted({_fill(rng.choice(_CONDITION_PATTERNS), rng).lower() for _ in range(pool)})
+    generated = scenarios(count, conditions=1, seed=seed)
+    for scenario in generated:
+        scenario.conditions = rng.sample(shared, min(conditions, len(shared)))
+    return generated
+
+
+def load_fixture(name: str = 'propositions') -> List[str]:
+    """fixtures ディレクトリの命題コーパス（JSONの文字列配列）"""
+    with open(os.path.join(FIXTURES_DIR, f'{name}.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def text_corpora(scale: float = 1.0, seed: int = 0) -> Dict[str, List[str]]:
+    """
+    NLPエンジン用のテキストコーパス
+
+    Args:
+        scale: 件数の倍率
+        seed: 乱数シード
+
+    Returns:
+        Dict[str, List[str]]: コーパス名とテキスト
+    """
+    return {
+        'fixture': load_fixture(),
+        'short': short_claims(max(1, int(500 * scale)), seed),
+        'long': long_arguments(max(1, int(50 * scale)), seed=seed),
+    }
@@ -0,0 +1,228 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+from dataclasses import asdict, dataclass
+from datetime import datetime
+import gc
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# 回帰とみなす変化率の既定値（遅延とメモリは増加、スループットは減少を回帰とする）
+DEFAULT_THRESHOLDS = {
+    'p50_ms': 0.10,
+    'p99_ms': 0.25,
+    'throughput': 0.10,
+    'peak_rss_mb': 0.20,
+}
+_LOWER_IS_WORSE = {'throughput'}
+
+
+@dataclass(frozen=True, slots=True)
+class BenchmarkResult:
+    """1つのベンチマークケースの計測結果"""
+    name: str
+    items: int
+    total_seconds: float
+    throughput: float
+    mean_ms: float
+    p50_ms: float
+    p99_ms: float
+    peak_rss_mb: Optional[float]
+    rss_growth_mb: Optional[float]
+
+
+@dataclass(frozen=True, slots=True)
+class Regression:
+    """ベースラインに対する回帰"""
+    name: str
+    metric: str
+    baseline: float
+    current: float
+    change: float
+
+    def __str__(self) -> str:
+        return f"{self.name}: {self.metric} {self.baseline:.4g} -> {self.current:.4g} ({self.change:+.1%})"
+
+
+def peak_rss_mb() -> Optional[float]:
+    """プロセスの最大常駐メモリ（MB、取得できない環境ではNone）"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux はKB、macOS はバイト単位
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def measure(name: str,
+            function: Callable[[Any], Any],
+            items: Sequence[Any],
+            warmup: int = 3,
+            repeat: int = 1) -> BenchmarkResult:
+    """
+    要素ごとに関数を呼び出して遅延を計測する
+
+    Args:
+        name: ケース名
+        function: 1要素を処理する関数
+        items: 入力
+        warmup: 計測前に処理する要素数
+        repeat: 入力全体を繰り返す回数
+
+    Returns:
+        BenchmarkResult: 計測結果
+    """
+    for item in items[:warmup]:
+        function(item)
+    gc.collect()
+    rss_before = peak_rss_mb()
+    latencies = np.empty(len(items) * repeat, dtype=np.int64)
+    position = 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for item in items:
+            begin = time.perf_counter_ns()
+            function(item)
+            latencies[position] = time.perf_counter_ns() - begin
+            position += 1
+    total = time.perf_counter() - started
+    return _result(name, latencies / 1e6, total, rss_before)
+
+
+def measure_batch(name: str,
+                  function: Callable[[Sequence[Any]], Iterable[Any]],
+                  items: Sequence[Any],
+                  repeat: int = 1) -> BenchmarkResult:
+    """
+    入力全体を1回で処理する関数のスループットを計測する
+
+    遅延は入力全体の処理時間を要素数で割った値（バッチ処理の要素あたりの時間）とする
+    """
+    for _ in function(items[:3]):
+        pass
+    gc.collect()
+    rss_before = peak_rss_mb()
+    totals = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in function(items):
+            pass
+        totals.append(time.perf_counter() - started)
+    per_item = np.asarray(totals) / max(len(items), 1) * 1e3
+    return _result(name, np.repeat(per_item, len(items)), sum(totals), rss_before)
+
+
+def _result(name: str, latencies_ms: np.ndarray, total: float, rss_before: Optional[float]) -> BenchmarkResult:
+    rss_after = peak_rss_mb()
+    p50, p99 = np.percentile(latencies_ms, [50, 99]) if len(latencies_ms) else (0.0, 0.0)
+    return BenchmarkResult(
+        name=name,
+        items=len(latencies_ms),
+        total_seconds=total,
+        throughput=len(latencies_ms) / total if total > 0 else 0.0,
+        mean_ms=float(latencies_ms.mean()) if len(latencies_ms) else 0.0,
+        p50_ms=float(p50),
+        p99_ms=float(p99),
+        peak_rss_mb=rss_after,
+        rss_growth_mb=rss_after - rss_before if rss_after is not None and rss_before is not None else None
+    )
+
+
+def environment() -> Dict[str, Any]:
+    """結果と共に保存する実行環境の情報"""
+    info = {
+        'timestamp': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'numpy': np.__version__,
+    }
+    try:
+        import spacy
+        info['spacy'] = spacy.__version__
+    except ImportError:
+        pass
+    return info
+
+
+def write_report(path: str,
+                 results: List[BenchmarkResult],
+                 skipped: Dict[str, str],
+                 metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    計測結果をJSONで保存する
+
+    Args:
+        path: 出力先
+        results: 計測結果
+        skipped: 実行しなかったスイートとその理由
+        metadata: 追加の情報（実行時の引数など）
+
+    Returns:
+        Dict[str, Any]: 保存した内容
+    """
+    report = {
+        'environment': environment(),
+        'metadata': metadata or {},
+        'skipped': skipped,
+        'results': {result.name: asdict(result) for result in results},
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    return report
+
+
+def load_report(path: str) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(results: Iterable[BenchmarkResult],
+            baseline: Dict[str, Any],
+            thresholds: Optional[Dict[str, float]] = None) -> List[Regression]:
+    """
+    ベースラインの結果と比較し、閾値を超えて悪化した指標を返す
+
+    Args:
+        results: 今回の計測結果
+        baseline: load_report で読み込んだベースライン
+        thresholds: 指標ごとの許容する変化率
+
+    Returns:
+        List[Regression]: 回帰の一覧（ベースラインに無いケースは比較しない）
+    """
+    thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    previous = baseline.get('results', {})
+    regressions = []
+    for result in results:
+        before = previous.get(result.name)
+        if before is None:
+            continue
+        for metric, threshold in thresholds.items():
+            old, new = before.get(metric), getattr(result, metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if metric in _LOWER_IS_WORSE else change
+            if worse > threshold:
+                regressions.append(Regression(result.name, metric, old, new, change))
+    return regressions
+
+
+def format_table(results: Iterable[BenchmarkResult]) -> str:
+    """計測結果を表形式の文字列にする"""
+    lines = [f"{'case':<40} {'items':>7} {'items/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'peak MB':>9}"]
+    for r in results:
+        rss = f"{r.peak_rss_mb:9.1f}" if r.peak_rss_mb is not None else f"{'-':>9}"
+        lines.append(f"{r.name:<40} {r.items:>7} {r.throughput:>10.1f} {r.p50_ms:>9.3f} {r.p99_ms:>9.3f} {rss}")
+    return '\n'.join(lines)
@@ -0,0 +1,89 @@
+from typing import Any, Callable, Dict, List, Optional
+import time
+
+from app.core.experiment_batch import evaluate_batch
+from app.core.experiment_engine import ExperimentEngine
+from app.core.logic_analyzer import LogicAnalyzer
+
+from . import corpora
+from .harness import BenchmarkResult, measure, measure_batch
+
+
+class SuiteSkipped(Exception):
+    """スイートを実行できない環境（spaCyモデルが無いなど）"""
+    pass
+
+
+def _load_spacy() -> Any:
+    """インストール済みの小さいspaCyモデルを読み込む（ネットワークには触れない）"""
+    try:
+        from app.core.nlp_engine import load_spacy_model
+        return load_spacy_model('en_core_web_sm')
+    except (ImportError, OSError) as e:
+        raise SuiteSkipped(f"spaCy model en_core_web_sm is not available: {e}")
+
+
+def nlp_suite(scale: float, repeat: int, metadata: Dict[str, Any]) -> List[BenchmarkResult]:
+    """NLPEngine の各解析（キャッシュなし）とバッチ解析"""
+    _load_spacy()
+    from app.core.nlp_engine import NLPEngine
+
+    started = time.perf_counter()
+    engine = NLPEngine(cache=None)
+    metadata['nlp_load_seconds'] = time.perf_counter() - started
+    metadata['nlp_warm_up_seconds'] = engine.warm_up()
+
+    results = []
+    for corpus, texts in corpora.text_corpora(scale).items():
+        for method in ('parse_text', 'extract_concepts', 'analyze_structure', 'analyze'):
+            results.append(measure(f'nlp.{method}.{corpus}', getattr(engine, method), texts, repeat=repeat))
+        results.append(measure_batch(f'nlp.analyze_batch.{corpus}', engine.analyze_batch, texts, repeat=repeat))
+    return results
+
+
+def logic_suite(scale: float, repeat: int, metadata: Dict[str, Any]) -> List[BenchmarkResult]:
+    """LogicAnalyzer.validate_logic（短い主張・長い論証・100前提の討論）"""
+    try:
+        nlp = _load_spacy()
+    except SuiteSkipped:
+        # 誤謬検出のトークン規則を除いて計測する（結果は metadata で区別する）
+        nlp = None
+    metadata['logic_uses_spacy'] = nlp is not None
+    analyzer = LogicAnalyzer(nlp=nlp)
+    cases = {
+        'fixture': corpora.to_logical_propositions(corpora.load_fixture()),
+        'short': corpora.to_logical_propositions(corpora.short_claims(max(1, int(500 * scale)))),
+        'long': corpora.to_logical_propositions(corpora.long_arguments(max(1, int(50 * scale)))),
+        'debate': corpora.debates(max(1, int(5 * scale)), premises=100),
+    }
+    return [
+        measure(f'logic.validate_logic.{name}', analyzer.validate_logic, propositions, repeat=repeat)
+        for name, propositions in cases.items()
+    ]
+
+
+def experiment_suite(scale: float, repeat: int, metadata: Dict[str, Any]) -> List[BenchmarkResult]:
+    """ExperimentEngine.evaluate_scenario と evaluate_batch"""
+    count = max(1, int(200 * scale))
+    cases = {
+        'small': corpora.scenarios(count, conditions=5),
+        'large': corpora.scenarios(count, conditions=50),
+        'templated': corpora.templated_scenarios(count, conditions=20),
+    }
+    results = []
+    for name, scenarios in cases.items():
+        # 条件の正規化キャッシュの影響を揃えるため、ケースごとにエンジンを作り直す
+        engine = ExperimentEngine()
+        results.append(measure(f'experiment.evaluate_scenario.{name}', engine.evaluate_scenario,
+                               scenarios, repeat=repeat))
+        engine = ExperimentEngine()
+        results.append(measure_batch(f'experiment.evaluate_batch.{name}',
+                                     lambda items: evaluate_batch(engine, items), scenarios, repeat=repeat))
+    return results
+
+
+SUITES: Dict[str, Callable[[float, int, Dict[str, Any]], List[BenchmarkResult]]] = {
+    'nlp': nlp_suite,
+    'logic': logic_suite,
+    'experiment': experiment_suite,
+}
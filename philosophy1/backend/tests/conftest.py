@@ -0,0 +1,5 @@
+import os
+import sys
+
+# backend ディレクトリから `python -m pytest` 以外の方法で実行しても app を import できるようにする
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,112 @@
+from collections import deque
+from typing import Dict, List, Optional, Set
+import random
+
+import pytest
+
+from app.core.concept_graph import BOTH, IN, OUT, ConceptGraph
+
+
+class _ReferenceGraph:
+    """辞書と集合で表した比較用のグラフ"""
+
+    def __init__(self):
+        self.out: Dict[str, Set[str]] = {}
+
+    def update(self, concept_id: str, related: List[str]) -> None:
+        self.out[concept_id] = set(related)
+        for related_id in related:
+            self.out.setdefault(related_id, set())
+
+    def remove(self, concept_id: str) -> None:
+        del self.out[concept_id]
+        for targets in self.out.values():
+            targets.discard(concept_id)
+
+    def neighbors(self, concept_id: str, direction: str) -> Set[str]:
+        found = set()
+        if direction in (OUT, BOTH):
+            found |= self.out[concept_id]
+        if direction in (IN, BOTH):
+            found |= {source for source, targets in self.out.items() if concept_id in targets}
+        return found
+
+    def bfs(self, start: str, direction: str, max_depth: Optional[int] = None) -> Dict[str, int]:
+        distances = {start: 0}
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            if max_depth is not None and distances[node] >= max_depth:
+                continue
+            for neighbor in self.neighbors(node, direction):
+                if neighbor not in distances:
+                    distances[neighbor] = distances[node] + 1
+                    queue.append(neighbor)
+        return distances
+
+
+def _random_graphs(seed: int, steps: int):
+    """同じ編集を適用した ConceptGraph と比較用のグラフを、編集のたびに返す"""
+    rng = random.Random(seed)
+    rows = [(f'c{i}', [f'c{rng.randrange(40)}' for _ in range(rng.randint(0, 3))]) for i in range(40)]
+    graph = ConceptGraph.from_rows(rows)
+    reference = _ReferenceGraph()
+    for concept_id, related in rows:
+        reference.update(concept_id, related)
+    yield graph, reference, rng
+
+    next_id = 40
+    for _ in range(steps):
+        present = list(reference.out)
+        if rng.random() < 0.15 and len(present) > 5:
+            concept_id = rng.choice(present)
+            graph.remove_concept(concept_id)
+            reference.remove(concept_id)
+        else:
+            concept_id = rng.choice(present) if rng.random() < 0.8 else f'c{next_id}'
+            next_id += 1
+            related = rng.sample(present, rng.randint(0, min(4, len(present))))
+            if rng.random() < 0.2:
+                related.append(f'c{next_id}')
+                next_id += 1
+            graph.update_concept(concept_id, related)
+            reference.update(concept_id, related)
+        yield graph, reference, rng
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('direction', [OUT, IN, BOTH])
+def test_k_hop_matches_bfs_after_random_edits(seed, direction):
+    for graph, reference, rng in _random_graphs(seed, steps=200):
+        start = rng.choice(list(reference.out))
+        k = rng.randint(0, 4)
+        assert graph.k_hop(start, k, direction) == reference.bfs(start, direction, k)
+        assert set(graph.neighbors(start, direction)) == reference.neighbors(start, direction)
+        assert graph.degree(start, direction) == len(reference.neighbors(start, direction))
+    assert len(graph) == len(reference.out)
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('direction', [OUT, BOTH])
+def test_shortest_path_is_a_shortest_walk_after_random_edits(seed, direction):
+    for graph, reference, rng in _random_graphs(seed, steps=200):
+        source, target = rng.choice(list(reference.out)), rng.choice(list(reference.out))
+        path = graph.shortest_path(source, target, direction)
+        distances = reference.bfs(source, direction)
+        if target not in distances:
+            assert path is None
+            continue
+        assert path[0] == source and path[-1] == target
+        assert len(path) - 1 == distances[target]
+        for a, b in zip(path, path[1:]):
+            assert b in reference.neighbors(a, direction)
+
+
+def test_removed_and_unknown_concepts_are_not_reachable():
+    graph = ConceptGraph.from_rows([('a', ['b']), ('b', ['c']), ('c', [])])
+    graph.remove_concept('b')
+    assert 'b' not in graph
+    assert graph.k_hop('a', 3) == {'a': 0}
+    assert graph.shortest_path('a', 'c') is None
+    assert graph.k_hop('missing', 2) == {}
+    assert graph.shortest_path('a', 'missing') is None
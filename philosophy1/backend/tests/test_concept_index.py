@@ -0,0 +1,97 @@
+import os
+
+import numpy as np
+import pytest
+
+from app.core.concept_index import ConceptVectorIndex, IndexLock
+
+
+def _clustered(count: int, dim: int = 32, clusters: int = 50, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    return (centers[rng.integers(clusters, size=count)] + 0.3 * rng.normal(size=(count, dim))).astype(np.float32)
+
+
+def _exact(vectors: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = queries @ normalized.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def _ids(count: int):
+    return [f'c{i}' for i in range(count)]
+
+
+def test_ivf_recall_against_exact_search():
+    vectors = _clustered(5000)
+    index = ConceptVectorIndex(dim=vectors.shape[1], nprobe=8)
+    index.add(_ids(len(vectors)), vectors)
+    assert index.is_trained
+
+    queries = _clustered(200, seed=1)
+    expected = _exact(vectors, queries, 10)
+    found = index.search_batch(queries, k=10)
+    recall = np.mean([
+        len({f'c{i}' for i in truth} & {concept_id for concept_id, _ in hits}) / 10
+        for truth, hits in zip(expected, found)
+    ])
+    assert recall >= 0.9
+
+
+def test_untrained_index_is_exact_and_handles_replacement_and_removal():
+    vectors = _clustered(100)
+    index = ConceptVectorIndex(dim=vectors.shape[1])
+    index.add(_ids(100), vectors)
+    assert not index.is_trained
+    assert [concept_id for concept_id, _ in index.search(vectors[7], k=1)] == ['c7']
+
+    index.add(['c7'], vectors[8:9])
+    index.remove('c8')
+    assert len(index) == 99
+    assert index.search(vectors[8], k=1)[0][0] == 'c7'
+    assert 'c8' not in {concept_id for concept_id, _ in index.search(vectors[8], k=100)}
+
+
+@pytest.mark.parametrize('count', [0, 10, 3000])
+def test_save_and_open_round_trip(tmp_path, count):
+    path = str(tmp_path / 'index')
+    vectors = _clustered(max(count, 1))[:count]
+    index = ConceptVectorIndex(dim=32, path=path)
+    if count:
+        index.add(_ids(count), vectors)
+        index.remove('c3')
+    index.save()
+
+    opened = ConceptVectorIndex.open(path)
+    assert len(opened) == len(index)
+    assert opened.is_trained == index.is_trained
+    assert set(opened.ids) == set(index.ids)
+    queries = _clustered(20, seed=2)
+    assert opened.search_batch(queries, k=5) == index.search_batch(queries, k=5)
+
+
+def test_changes_after_open_do_not_touch_the_saved_version(tmp_path):
+    path = str(tmp_path / 'index')
+    vectors = _clustered(50)
+    saved = ConceptVectorIndex(dim=32, path=path)
+    saved.add(_ids(50), vectors)
+    saved.save()
+
+    reader = ConceptVectorIndex.open(path)
+    writer = ConceptVectorIndex.open(path)
+    writer.add(['new'], vectors[:1] * -1)
+    writer.remove('c0')
+    # 保存するまではファイルも他のインスタンスも変わらない
+    assert len(ConceptVectorIndex.open(path)) == 50
+    assert not reader.changed_on_disk()
+
+    with IndexLock(path):
+        writer.save()
+    assert reader.changed_on_disk()
+    assert not writer.changed_on_disk()
+    # 置き換えられた版を削除しても、開いているインスタンスは検索できる
+    assert reader.search(vectors[0], k=1)[0][0] == 'c0'
+    reopened = ConceptVectorIndex.open(path)
+    assert 'new' in reopened and 'c0' not in reopened
+    versions = [name for name in os.listdir(path) if name != 'meta.json']
+    assert len(versions) == 1
@@ -0,0 +1,96 @@
+import json
+import os
+
+import pytest
+
+from app.core.concept_store import ConceptStore, convert_json, write_concept_store
+
+CONCEPTS = {
+    'justice': {'definition': 'fairness', 'related': ['law', 'virtue']},
+    'justification': {'definition': 'reason for belief'},
+    'law': {'definition': 'rule'},
+    '正義': {'definition': '正しい道理', 'related': ['法']},
+    'virtue': ['list', 'values', 1, None],
+    '': 'empty name',
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = str(tmp_path / 'concepts.bin')
+    assert write_concept_store(CONCEPTS, path) == len(CONCEPTS)
+    opened = ConceptStore(path)
+    yield opened
+    opened.close()
+
+
+def test_round_trip(store):
+    assert len(store) == len(CONCEPTS)
+    assert dict(store.items()) == CONCEPTS
+    # 名称は UTF-8 のバイト列の昇順に並ぶ
+    assert list(store) == sorted(CONCEPTS, key=lambda name: name.encode('utf-8'))
+    for name, value in CONCEPTS.items():
+        assert name in store
+        assert store[name] == value
+
+
+def test_missing_names_and_prefixes(store):
+    assert 'missing' not in store
+    assert 'jus' not in store
+    assert 1 not in store
+    with pytest.raises(KeyError):
+        store['zzz']
+    assert store.get('missing') is None
+    assert store.with_prefix('justi') == ['justice', 'justification']
+    assert store.with_prefix('正') == ['正義']
+    assert store.with_prefix('none') == []
+
+
+def test_empty_store(tmp_path):
+    path = str(tmp_path / 'empty.bin')
+    assert write_concept_store({}, path) == 0
+    store = ConceptStore(path)
+    try:
+        assert len(store) == 0
+        assert list(store) == []
+        assert 'anything' not in store
+        assert store.with_prefix('') == []
+    finally:
+        store.close()
+
+
+def test_list_input_and_json_conversion(tmp_path):
+    concepts = [{'name': name, 'definition': f'definition of {name}'} for name in ('b', 'a', 'c')]
+    json_path = tmp_path / 'concepts.json'
+    json_path.write_text(json.dumps(concepts), encoding='utf-8')
+    store_path = convert_json(str(json_path))
+    assert store_path == str(tmp_path / 'concepts.bin')
+    store = ConceptStore(store_path)
+    try:
+        assert store['a'] == concepts[1]
+        assert list(store) == ['a', 'b', 'c']
+    finally:
+        store.close()
+
+
+def test_rewrite_replaces_the_file_without_leaving_temporary_files(tmp_path):
+    path = str(tmp_path / 'concepts.bin')
+    write_concept_store(CONCEPTS, path)
+    first = ConceptStore(path)
+    write_concept_store({'only': 1}, path)
+    try:
+        # 置き換え前に開いたストアは元の内容を読み続ける
+        assert first['law'] == CONCEPTS['law']
+        second = ConceptStore(path)
+        assert dict(second.items()) == {'only': 1}
+        second.close()
+    finally:
+        first.close()
+    assert os.listdir(tmp_path) == ['concepts.bin']
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'\0' * 64)
+    with pytest.raises(ValueError):
+        ConceptStore(str(path))
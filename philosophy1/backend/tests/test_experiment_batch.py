@@ -0,0 +1,71 @@
+from datetime import datetime
+import random
+
+import numpy as np
+import pytest
+
+from app.core.experiment_batch import EvaluationColumns, _pairs_within_groups, evaluate_batch, find_contradictions
+from app.core.experiment_engine import ExperimentEngine, ExperimentScenario
+
+_SUBJECTS = ['socrates', 'the agent', 'every citizen', 'the robot']
+_PREDICATES = ['is mortal', 'acts freely', 'causes harm', 'follows the law', 'values justice']
+_PATTERNS = [
+    '{s} {p}',
+    'not {s} {p}',
+    'if {s} {p} then {s2} {p2}',
+    '{s} {p} and {s2} {p2}',
+    'either {s} {p} or {s2} {p2}',
+    '{s}は{p}',
+    '{s}は{p}ではない',
+]
+
+
+def _condition(rng: random.Random) -> str:
+    return rng.choice(_PATTERNS).format(s=rng.choice(_SUBJECTS), p=rng.choice(_PREDICATES),
+                                        s2=rng.choice(_SUBJECTS), p2=rng.choice(_PREDICATES))
+
+
+def _scenarios(count: int, seed: int) -> list:
+    rng = random.Random(seed)
+    now = datetime(2024, 1, 1)
+    shared = [_condition(rng) for _ in range(12)]
+    return [
+        ExperimentScenario(
+            id=f'scenario_{i}', title='', description='',
+            variables={f'var_{j}': rng.choice(['', 'value']) for j in range(rng.randint(0, 3))},
+            # 共有の条件と新しい条件を混ぜ、同じ条件文の重複も含める
+            conditions=[rng.choice(shared) if rng.random() < 0.5 else _condition(rng)
+                        for _ in range(rng.randint(0, 12))],
+            expected_outcomes=['outcome'] if rng.random() < 0.7 else [],
+            created_at=now, updated_at=now
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_batch_matches_scalar_evaluation(seed):
+    scenarios = _scenarios(60, seed)
+    expected = [ExperimentEngine().evaluate_scenario(s) for s in scenarios]
+    assert evaluate_batch(ExperimentEngine(), scenarios) == expected
+    assert any(result.logical_issues for result in expected)
+
+
+def test_contradictions_match_scalar_check():
+    engine = ExperimentEngine()
+    scenarios = _scenarios(40, seed=11)
+    assert find_contradictions(engine, scenarios) == [engine._check_logical_consistency(s) for s in scenarios]
+    assert find_contradictions(engine, []) == []
+
+
+def test_pairs_within_groups():
+    left, right = _pairs_within_groups(np.array([3, 3, 3, 5, 7, 7]))
+    assert list(zip(left.tolist(), right.tolist())) == [(0, 1), (0, 2), (1, 2), (4, 5)]
+
+
+def test_evaluation_columns_round_trip():
+    results = evaluate_batch(ExperimentEngine(), _scenarios(20, seed=3))
+    columns = EvaluationColumns(results)
+    assert list(columns) == results
+    assert columns[-1] == results[-1]
+    assert columns.issue_counts().tolist() == [len(r.logical_issues) for r in results]
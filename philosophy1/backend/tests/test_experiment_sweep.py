@@ -0,0 +1,82 @@
+import json
+import math
+import statistics
+
+import pytest
+
+from app.core.experiment_engine import EvaluationResult
+from app.core.experiment_sweep import ScenarioSweep, SweepStatistics
+
+
+def _result(score: float, is_valid: bool = True) -> EvaluationResult:
+    return EvaluationResult(is_valid=is_valid, consistency_score=score,
+                            logical_issues=[], suggestions=[], reasoning_path=[])
+
+
+@pytest.fixture
+def templates_path(tmp_path):
+    path = tmp_path / 'templates.json'
+    path.write_text(json.dumps({
+        'trolley': {
+            'title_template': 'Trolley',
+            'description_template': '',
+            'base_conditions': ['the agent acts freely', 'not the agent acts freely', 'the agent causes harm'],
+        }
+    }), encoding='utf-8')
+    return str(path)
+
+
+def test_statistics_match_two_pass_computation():
+    scores = [0.2, 0.9, 0.55, 1.0, 0.0, 0.35]
+    stats = SweepStatistics()
+    for i, score in enumerate(scores):
+        stats.add(_result(score, is_valid=i % 2 == 0))
+    summary = stats.to_dict()
+    assert summary['count'] == 6 and summary['valid_count'] == 3 and summary['valid_ratio'] == 0.5
+    assert summary['mean'] == pytest.approx(statistics.mean(scores))
+    assert summary['std'] == pytest.approx(statistics.stdev(scores))
+    assert (summary['min'], summary['max']) == (0.0, 1.0)
+
+
+def test_statistics_of_empty_and_single_runs():
+    assert SweepStatistics().to_dict() == {
+        'count': 0, 'valid_count': 0, 'valid_ratio': 0.0, 'mean': 0.0, 'std': 0.0, 'min': 0.0, 'max': 0.0
+    }
+    stats = SweepStatistics()
+    stats.add(_result(0.4))
+    assert (stats.variance, stats.to_dict()['min'], stats.to_dict()['max']) == (0.0, 0.4, 0.4)
+
+
+def test_sampled_assignments_are_distinct_grid_points():
+    grid = {'a': ['1', '2', '3'], 'b': ['x', 'y'], 'c': ['p', 'q', 'r', 's']}
+    sweep = ScenarioSweep('trolley', grid, samples=10, seed=7)
+    sampled = [tuple(assignment.items()) for assignment in sweep.assignments()]
+    assert len(sweep) == 10 and len(sampled) == 10 and len(set(sampled)) == 10
+    assert all(dict(assignment)[name] in values for assignment in sampled for name, values in grid.items())
+    # 同じシードでは同じ標本になる
+    assert sampled == [tuple(a.items()) for a in ScenarioSweep('trolley', grid, samples=10, seed=7).assignments()]
+
+    # 全組み合わせ数以上を指定した場合は全組み合わせを列挙する
+    exhaustive = ScenarioSweep('trolley', grid, samples=100)
+    assert len(exhaustive) == exhaustive.total == 24
+    assert len(list(exhaustive.assignments())) == 24
+
+
+def test_statistics_are_reset_per_run(templates_path):
+    sweep = ScenarioSweep('trolley', {'agent': ['a', 'b', 'c'], 'place': ['x', 'y']},
+                          complexity=2, templates_path=templates_path)
+    results = [result for _, result in sweep.run(max_workers=1, chunksize=4)]
+    assert len(results) == 6
+    first = sweep.statistics.to_dict()
+    assert first['count'] == 6
+    assert first['mean'] == pytest.approx(sum(r.consistency_score for r in results) / 6)
+
+    list(sweep.run(max_workers=1, chunksize=5))
+    assert sweep.statistics.to_dict() == first
+
+
+def test_unknown_category_is_reported_per_assignment(templates_path):
+    sweep = ScenarioSweep('unknown', {'agent': ['a', 'b']}, templates_path=templates_path)
+    results = [result for _, result in sweep.run(max_workers=1)]
+    assert [r.is_valid for r in results] == [False, False]
+    assert sweep.statistics.valid_count == 0 and math.isclose(sweep.statistics.mean, 0.0)
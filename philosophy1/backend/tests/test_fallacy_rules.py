@@ -0,0 +1,57 @@
+import pytest
+
+from app.core.fallacy_rules import AhoCorasick, ArgumentContext, FallacyRuleEngine
+from app.core.support_graph import SupportCycle
+
+
+def _context(premises, conclusion, **kwargs) -> ArgumentContext:
+    kwargs.setdefault('premise_formulas', [None] * len(premises))
+    kwargs.setdefault('conclusion_formula', None)
+    return ArgumentContext(premises=premises, conclusion=conclusion, **kwargs)
+
+
+def test_automaton_reports_overlapping_phrases_on_word_boundaries():
+    automaton = AhoCorasick({'after that': 'a', 'that': 'b', 'cause': 'c'})
+    text = 'Right AFTER THAT, the cause was clear; because it caused it.'
+    found = sorted(automaton.find(text))
+    assert found == [(6, 16, 'a'), (12, 16, 'b'), (22, 27, 'c')]
+    assert [text[start:end].lower() for start, end, _ in found] == ['after that', 'that', 'cause']
+
+
+@pytest.mark.parametrize('premises, conclusion, expected', [
+    (['What do you know about economics?'], 'The policy is right.', ['ad_hominem']),
+    (['So you are saying we should ban all cars.'], 'Your view is absurd.', ['straw_man']),
+    (['There are only two options here.'], 'We must act now.', ['false_dichotomy']),
+    (['The rooster crowed and then the sun rose.'], 'The rooster caused the sunrise.', ['post_hoc']),
+    (['My neighbor was rude to me.'], 'Every neighbor is rude.', ['hasty_generalization']),
+    (['All men are mortal.', 'Socrates is a man.'], 'Socrates is mortal.', []),
+])
+def test_lexical_rules(premises, conclusion, expected):
+    assert FallacyRuleEngine().detect(_context(premises, conclusion)) == expected
+
+
+def test_cues_must_appear_in_the_required_scope():
+    engine = FallacyRuleEngine()
+    # 原因の主張が結論ではなく前提にある場合は post hoc としない
+    assert engine.detect(_context(['The rooster crowed and then the sun rose, which caused joy.'],
+                                  'The sun rose.')) == []
+    # 全称表現が前提にあり、体験談が結論にある場合は早まった一般化としない
+    assert engine.detect(_context(['Every neighbor is rude.'], 'My neighbor was rude to me.')) == []
+
+
+def test_structural_rules():
+    engine = FallacyRuleEngine()
+    formula = object()
+    restated = _context(['Socrates is mortal.'], 'Socrates is mortal.',
+                        premise_formulas=[formula], conclusion_formula=formula)
+    assert engine.detect(restated) == ['circular_reasoning']
+
+    cycle = SupportCycle(claims=['he is honest', 'we can trust him'], premise_indices=[0])
+    cyclic = _context(['We can trust him because he is honest.'], 'He is honest because we can trust him.',
+                      support_cycles=[cycle])
+    assert engine.detect(cyclic) == ['circular_reasoning']
+
+
+def test_each_fallacy_is_reported_once_in_rule_order():
+    premises = ['People like you always lie.', 'Consider the source.', 'There is no middle ground.']
+    assert FallacyRuleEngine().detect(_context(premises, 'We win.')) == ['ad_hominem', 'false_dichotomy']
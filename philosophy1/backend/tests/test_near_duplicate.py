@@ -0,0 +1,108 @@
+import random
+
+import numpy as np
+import pytest
+
+from app.core.near_duplicate import LSHIndex, MinHasher, deduplicate, polarity_markers
+
+# 近似重複とみなす類似度（PropositionService の DUPLICATE_THRESHOLD の既定値）
+THRESHOLD = 0.9
+
+ARGUMENT = (
+    'every rational agent who reasons carefully about morality and the good life ought to keep '
+    'the promises that were freely made to friends neighbours and strangers alike because breaking '
+    'them would undermine the trust on which any community of free and equal citizens depends'
+)
+
+
+def _jaccard(first, second) -> float:
+    return len(first & second) / len(first | second)
+
+
+def test_shingles_are_normalized_bigrams():
+    hasher = MinHasher()
+    assert hasher.shingles(['The', 'mind', ',', 'is', 'free']) == {'the mind', 'mind is', 'is free'}
+    assert hasher.shingles(['Mind']) == {'mind'}
+    assert hasher.shingles(['.']) == set()
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_signature_similarity_estimates_jaccard(seed):
+    rng = random.Random(seed)
+    hasher = MinHasher(num_perm=256, shingle_size=1)
+    vocabulary = [f'w{i}' for i in range(400)]
+    first = set(rng.sample(vocabulary, 120))
+    second = set(rng.sample(sorted(first), 80)) | set(rng.sample(vocabulary, 40))
+    estimate = MinHasher.similarity(hasher.signature(sorted(first)), hasher.signature(sorted(second)))
+    assert abs(estimate - _jaccard(first, second)) < 0.1
+
+
+def test_signature_bytes_round_trip():
+    hasher = MinHasher()
+    signature = hasher.signature(ARGUMENT.split())
+    assert np.array_equal(hasher.from_bytes(hasher.to_bytes(signature)), signature)
+    assert np.array_equal(hasher.signature(ARGUMENT.upper().split()), signature)
+    with pytest.raises(ValueError):
+        MinHasher(num_perm=64).from_bytes(hasher.to_bytes(signature))
+
+
+def test_lsh_finds_near_duplicates_and_supports_replace_and_remove():
+    hasher = MinHasher()
+    words = ARGUMENT.split()
+    index = LSHIndex(num_perm=hasher.num_perm)
+    index.add('original', hasher.signature(words))
+    index.add('unrelated', hasher.signature('the soul perceives the world through the senses alone'.split()))
+
+    near = hasher.signature(words[:-1] + ['rests'])
+    hits = index.query(near, threshold=THRESHOLD)
+    assert [key for key, _ in hits] == ['original']
+    assert hits[0][1] >= THRESHOLD
+
+    index.add('original', hasher.signature('a completely different claim about beauty'.split()))
+    assert index.query(near, threshold=THRESHOLD) == []
+    index.remove('original')
+    index.remove('missing')
+    assert len(index) == 1 and 'original' not in index
+
+    with pytest.raises(ValueError):
+        LSHIndex(num_perm=128, bands=10)
+
+
+def test_deduplicate_maps_duplicates_to_the_first_representative():
+    words = ARGUMENT.split()
+    documents = [
+        (0, words),
+        (1, 'the soul perceives the world'.split()),
+        (2, words + ['today']),
+        (3, list(words)),
+    ]
+    assert deduplicate(documents, threshold=THRESHOLD) == {2: 0, 3: 0}
+
+
+def test_negated_near_duplicate_is_not_reused():
+    hasher = MinHasher()
+    negated = ARGUMENT.replace('ought to keep', 'ought not to keep')
+    index = LSHIndex(num_perm=hasher.num_perm)
+    index.add('original', hasher.signature(ARGUMENT.split()))
+
+    # 署名だけでは1語の否定を区別できず、閾値を超える近似重複として見つかる
+    hits = index.query(hasher.signature(negated.split()), threshold=THRESHOLD)
+    assert [key for key, _ in hits] == ['original']
+    # 否定語の一致を求めることで、反対の主張の分析結果は再利用されない
+    assert polarity_markers(negated) != polarity_markers(ARGUMENT)
+    assert polarity_markers(ARGUMENT + '.') == polarity_markers(ARGUMENT)
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('All men are mortal', ()),
+    ('Not all men are mortal', ('not',)),
+    ("Men don't die", ('not',)),
+    ('Men don’t die', ('not',)),
+    ('Men cannot die', ('not',)),
+    ('No man is an island, and nobody is never alone', ('never', 'no', 'nobody')),
+    ('人は死なない', ('ない',)),
+    ('人は死にません', ('ません',)),
+    ('人は死ぬ', ()),
+])
+def test_polarity_markers(text, expected):
+    assert polarity_markers(text) == expected
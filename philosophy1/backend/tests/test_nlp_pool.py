@@ -0,0 +1,89 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+# nlp_pool は NLPEngine（spaCy）を import するため、spaCy が無い環境では実行しない
+pytest.importorskip('spacy')
+
+from app.core import nlp_pool  # noqa: E402
+
+
+def _init_stub_worker() -> None:
+    """spaCyモデルを読み込まないワーカーの初期化"""
+
+
+def _run_stub_task(method: str, argument, interval=None):
+    """'sleep' は指定秒数だけ待機し、どのタスクも実行したプロセスIDを返す"""
+    if method == 'sleep':
+        time.sleep(float(argument))
+    return os.getpid(), [], None
+
+
+@pytest.fixture
+def stub_worker(monkeypatch):
+    # ワーカーに渡す関数はこのモジュールの関数として pickle される
+    monkeypatch.setattr(nlp_pool, '_init_worker', _init_stub_worker)
+    monkeypatch.setattr(nlp_pool, '_run_in_worker', _run_stub_task)
+
+
+async def _wait_until_idle(pool: nlp_pool.NLPWorkerPool) -> None:
+    for _ in range(100):
+        if pool._pending == 0 and not pool._retired:
+            return
+        await asyncio.sleep(0.05)
+
+
+def test_overloaded_pool_rejects_single_tasks(stub_worker):
+    async def scenario():
+        pool = nlp_pool.NLPWorkerPool(max_workers=2, max_pending=2, task_timeout=10)
+        try:
+            running = [asyncio.create_task(pool.submit('sleep', '0.5')) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            with pytest.raises(nlp_pool.PoolOverloadedError):
+                await pool.submit('echo', '')
+            # 一括分析のタスクは別の枠で受け付ける
+            assert await pool.submit('echo', '', batch=True)
+            await asyncio.gather(*running)
+            assert pool._pending == 0
+            assert await pool.submit('echo', '')
+        finally:
+            pool.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_timed_out_worker_is_replaced(stub_worker):
+    async def scenario():
+        pool = nlp_pool.NLPWorkerPool(max_workers=1, max_pending=4, task_timeout=0.5)
+        try:
+            before = await pool.submit('echo', '')
+            stuck = asyncio.create_task(pool.submit('sleep', '30'))
+            await asyncio.sleep(0.1)
+            # 停止するワーカーの後ろで待っていたタスクは新しいワーカーで実行し直す
+            pool.task_timeout = 10
+            queued = asyncio.create_task(pool.submit('echo', ''))
+            with pytest.raises(asyncio.TimeoutError):
+                await stuck
+            after = await queued
+            assert after != before
+            await _wait_until_idle(pool)
+            assert pool._pending == 0 and not pool._retired
+        finally:
+            pool.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_keyed_tasks_stay_on_one_worker(stub_worker):
+    async def scenario():
+        pool = nlp_pool.NLPWorkerPool(max_workers=3, task_timeout=10)
+        try:
+            for key in ['argument-1', 'argument-2', 'argument-3', 'argument-4']:
+                pids = {await pool.submit('echo', '', key=key) for _ in range(5)}
+                assert len(pids) == 1
+        finally:
+            pool.shutdown()
+
+    asyncio.run(scenario())
@@ -0,0 +1,48 @@
+from app.core.parse_cache import ParseCache, normalize_text
+
+
+def test_keys_ignore_whitespace_and_width_variants():
+    assert normalize_text('  Ｓｏｃｒａｔｅｓ\tis\n mortal ') == 'Socrates is mortal'
+    key = ParseCache.make_key('parsed', 'Socrates  is mortal', 'en_core_web_sm')
+    assert key == ParseCache.make_key('parsed', 'Ｓｏｃｒａｔｅｓ is mortal', 'en_core_web_sm')
+    assert key != ParseCache.make_key('concepts', 'Socrates is mortal', 'en_core_web_sm')
+    assert key != ParseCache.make_key('parsed', 'Socrates is mortal', 'ja_core_news_sm')
+
+
+def test_memory_layer_evicts_least_recently_used():
+    cache = ParseCache(max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    # 'a' を参照した直後なので、追い出されるのは 'b'
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    assert cache.stats() == {'hits': 3, 'misses': 1, 'evictions': 1, 'entries': 2}
+
+
+def test_values_are_copied_in_and_out():
+    cache = ParseCache()
+    value = {'tokens': ['a']}
+    cache.set('k', value)
+    value['tokens'].append('b')
+    cache.get('k')['tokens'].append('c')
+    assert cache.get('k') == {'tokens': ['a']}
+
+
+def test_entries_evicted_from_memory_are_read_back_from_sqlite(tmp_path):
+    db_path = str(tmp_path / 'parse_cache.db')
+    cache = ParseCache(max_entries=1, db_path=db_path)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.stats()['evictions'] == 1
+    # メモリ層から追い出されてもディスク層から読み戻し、メモリ層に載せ直す
+    assert cache.get('a') == 1
+    assert cache.stats() == {'hits': 1, 'misses': 0, 'evictions': 2, 'entries': 1}
+
+    # 別のインスタンス（別プロセス）からも同じファイルの結果を参照できる
+    assert ParseCache(db_path=db_path).get('b') == 2
+
+    cache.clear()
+    assert cache.get('a') is None
+    assert ParseCache(db_path=db_path).get('b') is None
@@ -0,0 +1,116 @@
+from typing import Dict, List
+import itertools
+import random
+
+import pytest
+
+from app.core.propositional import (
+    AND, ATOM, IFF, IMPLIES, NOT, OR,
+    Formula, IncrementalSolver, SATSolver, atom, conj, disj, entails, iff, implies, is_satisfiable, neg
+)
+
+
+def _brute_force_clauses(num_vars: int, clauses: List[List[int]]) -> bool:
+    for values in itertools.product((False, True), repeat=num_vars):
+        if all(any(values[abs(lit) - 1] == (lit > 0) for lit in clause) for clause in clauses):
+            return True
+    return False
+
+
+def _evaluate(formula: Formula, values: Dict[str, bool]) -> bool:
+    if formula.op == ATOM:
+        return values[formula.args[0]]
+    args = [_evaluate(arg, values) for arg in formula.args]
+    if formula.op == NOT:
+        return not args[0]
+    if formula.op == AND:
+        return all(args)
+    if formula.op == OR:
+        return any(args)
+    if formula.op == IMPLIES:
+        return not args[0] or args[1]
+    if formula.op == IFF:
+        return args[0] == args[1]
+    raise ValueError(formula.op)
+
+
+def _brute_force_formulas(formulas: List[Formula], names: List[str]) -> bool:
+    return any(all(_evaluate(f, dict(zip(names, values))) for f in formulas)
+               for values in itertools.product((False, True), repeat=len(names)))
+
+
+def _random_formula(rng: random.Random, names: List[str], depth: int) -> Formula:
+    if depth == 0 or rng.random() < 0.3:
+        formula = atom(rng.choice(names))
+        return neg(formula) if rng.random() < 0.5 else formula
+    make = rng.choice([conj, disj, implies, iff, lambda a, b: neg(conj(a, b))])
+    return make(_random_formula(rng, names, depth - 1), _random_formula(rng, names, depth - 1))
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_solver_matches_brute_force_on_random_cnf(seed):
+    rng = random.Random(seed)
+    num_vars = rng.randint(1, 8)
+    clauses = [
+        [rng.choice((-1, 1)) * rng.randint(1, num_vars) for _ in range(rng.randint(1, 3))]
+        for _ in range(rng.randint(1, 5 * num_vars))
+    ]
+    solver = SATSolver()
+    for _ in range(num_vars):
+        solver.new_var()
+    for clause in clauses:
+        solver.add_clause(clause)
+
+    result = solver.solve()
+    assert result == _brute_force_clauses(num_vars, clauses)
+    if result:
+        model = solver.model()
+        assert all(any(model.get(abs(lit), False) == (lit > 0) for lit in clause) for clause in clauses)
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_assumptions_match_brute_force_and_keep_solver_reusable(seed):
+    rng = random.Random(seed)
+    num_vars = 6
+    clauses = [[rng.choice((-1, 1)) * rng.randint(1, num_vars) for _ in range(3)] for _ in range(12)]
+    solver = SATSolver()
+    for _ in range(num_vars):
+        solver.new_var()
+    for clause in clauses:
+        solver.add_clause(clause)
+
+    # 同じソルバで仮定を変えながら繰り返し解いても、毎回全探索と一致する
+    for _ in range(10):
+        assumptions = [rng.choice((-1, 1)) * var for var in rng.sample(range(1, num_vars + 1), rng.randint(0, 3))]
+        expected = _brute_force_clauses(num_vars, clauses + [[lit] for lit in assumptions])
+        assert solver.solve(assumptions) == expected
+
+
+@pytest.mark.parametrize('seed', range(100))
+def test_formula_satisfiability_and_entailment_match_truth_tables(seed):
+    rng = random.Random(seed)
+    names = ['p', 'q', 'r', 's'][:rng.randint(2, 4)]
+    premises = [_random_formula(rng, names, 3) for _ in range(rng.randint(1, 4))]
+    conclusion = _random_formula(rng, names, 2)
+
+    assert is_satisfiable(premises) == _brute_force_formulas(premises, names)
+    assert entails(premises, conclusion) == (not _brute_force_formulas(premises + [neg(conclusion)], names))
+
+
+def test_incremental_solver_tracks_added_and_retracted_premises():
+    rng = random.Random(0)
+    names = ['p', 'q', 'r']
+    pool = [_random_formula(rng, names, 2) for _ in range(8)]
+    conclusion = _random_formula(rng, names, 2)
+    solver = IncrementalSolver()
+    active: List[Formula] = []
+    for _ in range(60):
+        formula = rng.choice(pool)
+        if formula in active:
+            solver.retract(formula)
+            active.remove(formula)
+        else:
+            solver.add(formula)
+            active.append(formula)
+        assert solver.is_consistent() == _brute_force_formulas(active, names)
+        assert solver.entails(conclusion) == (not _brute_force_formulas(active + [neg(conclusion)], names))
@@ -0,0 +1,129 @@
+from typing import Any, Awaitable, Callable, List
+import asyncio
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.models.proposition import Base
+from app.models.repository import PropositionRepository
+
+
+def _run(scenario: Callable[[PropositionRepository, List[str]], Awaitable[Any]]) -> Any:
+    """インメモリSQLite上のリポジトリでシナリオを実行する（実行したSQL文を記録する）"""
+    async def main():
+        engine = create_async_engine('sqlite+aiosqlite://', poolclass=StaticPool)
+        statements: List[str] = []
+        event.listen(engine.sync_engine, 'before_cursor_execute',
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        try:
+            async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+                return await scenario(PropositionRepository(session), statements)
+        finally:
+            await engine.dispose()
+    return asyncio.run(main())
+
+
+async def _populate(repository: PropositionRepository, count: int) -> None:
+    for i in range(3):
+        await repository.save_concept(name=f'concept{i}', definition=f'definition {i}')
+    for i in range(count):
+        proposition = await repository.add_proposition(
+            text=f'proposition {i}', structure={'subject': f's{i}'},
+            concept_names=[f'concept{i % 3}', f'concept{(i + 1) % 3}']
+        )
+        await repository.add_analyses([{'proposition_id': proposition.id, 'result': {'n': i}, 'method': 'nlp'}])
+    await repository.commit()
+
+
+@pytest.mark.parametrize('method', ['list_propositions', 'list_proposition_dicts'])
+def test_listing_uses_a_constant_number_of_queries(method):
+    def count_queries(size: int) -> int:
+        async def scenario(repository, statements):
+            await _populate(repository, size)
+            # 保存時に読み込んだオブジェクトを捨て、一覧の取得で発行されるクエリだけを数える
+            repository.session.expunge_all()
+            statements.clear()
+            rows = await getattr(repository, method)(limit=size)
+            assert len(rows) == size
+            return len(statements)
+        return _run(scenario)
+
+    assert count_queries(3) == count_queries(40)
+
+
+def test_projection_matches_orm_listing():
+    async def scenario(repository, statements):
+        await _populate(repository, 12)
+        repository.session.expunge_all()
+        orm = [proposition.to_dict() for proposition in await repository.list_propositions(limit=5, offset=3)]
+        projected = await repository.list_proposition_dicts(limit=5, offset=3)
+        return orm, projected
+
+    orm, projected = _run(scenario)
+    assert [row['id'] for row in projected] == [row['id'] for row in orm]
+    for expected, actual in zip(orm, projected):
+        key = lambda concept: concept['name']
+        assert sorted(actual['concepts'], key=key) == sorted(expected['concepts'], key=key)
+        assert {k: v for k, v in actual.items() if k != 'concepts'} == \
+            {k: v for k, v in expected.items() if k != 'concepts'}
+
+
+def test_bulk_insert_splits_large_batches():
+    async def scenario(repository, statements):
+        await _populate(repository, 1)
+        proposition_id = (await repository.list_proposition_dicts())[0]['id']
+        size = 2 * PropositionRepository.BULK_CHUNK_SIZE + 1
+        statements.clear()
+        ids = await repository.add_analyses([
+            {'proposition_id': proposition_id, 'result': {'n': i}, 'method': 'nlp'} for i in range(size)
+        ])
+        inserts = [s for s in statements if s.lstrip().upper().startswith('INSERT')]
+        await repository.commit()
+        return size, ids, inserts
+
+    size, ids, inserts = _run(scenario)
+    assert len(set(ids)) == size
+    assert len(inserts) == 3
+
+
+def test_concept_changes_are_read_through_the_updated_at_index():
+    async def scenario(repository, statements):
+        first = await repository.save_concept(name='first', definition='a')
+        await repository.commit()
+        since = await repository.latest_concept_update()
+        second = await repository.save_concept(name='second', definition='b', related_concepts=[first.id])
+        await repository.commit()
+        latest = await repository.latest_concept_update()
+        changed = await repository.list_concept_links(updated_since=latest)
+        plan = await repository.session.execute(text('EXPLAIN QUERY PLAN SELECT max(updated_at) FROM concepts'))
+        return first, second, since, latest, changed, ' '.join(str(row[-1]) for row in plan)
+
+    first, second, since, latest, changed, plan = _run(scenario)
+    assert since == first.updated_at and latest == second.updated_at
+    assert changed == [(second.id, [first.id])]
+    assert 'INDEX' in plan.upper()
+
+
+def test_new_minhashes_are_found_through_the_created_at_index():
+    async def scenario(repository, statements):
+        await repository.add_proposition(text='without signature', structure={})
+        first = await repository.add_proposition(text='first', structure={}, minhash=b'1')
+        await repository.commit()
+        since = await repository.latest_proposition_created()
+        second = await repository.add_proposition(text='second', structure={}, minhash=b'2')
+        await repository.commit()
+        latest = await repository.latest_proposition_created()
+        added = await repository.list_minhashes(created_since=latest)
+        plan = await repository.session.execute(text('EXPLAIN QUERY PLAN SELECT max(created_at) FROM propositions'))
+        return first, second, since, latest, added, await repository.count_minhashes(), \
+            ' '.join(str(row[-1]) for row in plan)
+
+    first, second, since, latest, added, count, plan = _run(scenario)
+    assert since == first.created_at and latest == second.created_at
+    assert added == [(second.id, b'2')]
+    assert count == 2
+    assert 'INDEX' in plan.upper()
@@ -0,0 +1,82 @@
+import pytest
+
+from app.core.search_index import PropositionSearchIndex, normalize_terms
+
+DOCUMENTS = {
+    'p1': ['all', 'man', 'be', 'mortal', '.'],
+    'p2': ['socrates', 'be', 'a', 'man'],
+    'p3': ['justice', 'be', 'a', 'virtue', 'of', 'the', 'state'],
+    'p4': ['Socrates', 'be', 'mortal'],
+}
+
+
+@pytest.fixture
+def index():
+    index = PropositionSearchIndex()
+    assert index.add_many(DOCUMENTS.items()) == len(DOCUMENTS)
+    yield index
+    index.close()
+
+
+def _ids(hits):
+    return {proposition_id for proposition_id, _ in hits}
+
+
+def test_normalize_terms_lowercases_and_drops_punctuation():
+    assert normalize_terms(['Socrates', '.', ',', 'is', '正義']) == ['socrates', 'is', '正義']
+
+
+def test_any_and_all_terms(index):
+    assert len(index) == 4
+    assert _ids(index.search(['mortal'])) == {'p1', 'p4'}
+    assert _ids(index.search(['Socrates', 'mortal'])) == {'p1', 'p2', 'p4'}
+    assert _ids(index.search(['socrates', 'mortal'], match_all=True)) == {'p4'}
+    assert index.search(['unknown']) == []
+    assert index.search(['.', '']) == []
+
+
+def test_results_are_ranked_and_limited(index):
+    hits = index.search(['socrates', 'mortal'])
+    # 両方の語を含む命題が最も高いスコアになる
+    assert hits[0][0] == 'p4'
+    assert [score for _, score in hits] == sorted((score for _, score in hits), reverse=True)
+    assert len(index.search(['be'], limit=2)) == 2
+
+
+def test_query_terms_are_not_interpreted_as_operators(index):
+    index.add('p5', ['not', 'or', 'near', 'and', 'say', '"quote"'])
+    assert _ids(index.search(['OR'])) == {'p5'}
+    assert _ids(index.search(['NOT', 'and'], match_all=True)) == {'p5'}
+    assert _ids(index.search(['"quote"'])) == {'p5'}
+
+
+def test_add_replaces_existing_document(index):
+    index.add('p1', ['all', 'god', 'be', 'immortal'])
+    assert len(index) == 4
+    assert _ids(index.search(['mortal'])) == {'p4'}
+    assert _ids(index.search(['immortal'])) == {'p1'}
+
+
+def test_remove(index):
+    index.remove('p4')
+    index.remove('missing')
+    assert len(index) == 3
+    assert _ids(index.search(['socrates'])) == {'p2'}
+    # 削除した命題を再登録できる
+    index.add('p4', ['plato', 'be', 'mortal'])
+    assert _ids(index.search(['plato'])) == {'p4'}
+    index.optimize()
+    assert _ids(index.search(['mortal'])) == {'p1', 'p4'}
+
+
+def test_persists_to_file(tmp_path):
+    path = str(tmp_path / 'search' / 'index.db')
+    index = PropositionSearchIndex(path)
+    index.add_many(DOCUMENTS.items())
+    index.close()
+    reopened = PropositionSearchIndex(path)
+    try:
+        assert len(reopened) == 4
+        assert _ids(reopened.search(['justice'])) == {'p3'}
+    finally:
+        reopened.close()
@@ -0,0 +1,95 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+import pytest
+
+from app.core.support_graph import SupportGraphBuilder
+
+
+class _Token:
+    def __init__(self, text: str):
+        self.lemma_ = text.strip('.,;').lower()
+        self.is_punct = not self.lemma_
+
+
+class _Span:
+    """埋め込みを語句ごとに与える spaCy の Span の代役"""
+
+    def __init__(self, doc: '_Doc', start: int, end: int):
+        self.doc = doc
+        self.start_char = start
+        self.text = doc.text[start:end]
+
+    def __iter__(self):
+        return iter(_Token(word) for word in self.text.split())
+
+    @property
+    def vector(self) -> np.ndarray:
+        return self.doc.vectors.get(self.text.lower(), np.zeros(3, dtype=np.float32))
+
+
+class _Doc:
+    def __init__(self, text: str, vectors: Dict[str, np.ndarray]):
+        self.text = text
+        self.vectors = vectors
+
+    def char_span(self, start: int, end: int, alignment_mode: str = 'strict') -> Optional[_Span]:
+        return _Span(self, start, end)
+
+
+def _parsed(sentences: List[str], vectors: Dict[str, np.ndarray]) -> List[_Span]:
+    return [_Doc(sentence, vectors).char_span(0, len(sentence)) for sentence in sentences]
+
+
+@pytest.mark.parametrize('premise', [
+    'It is raining so I take an umbrella.',
+    'We left early so that we could take an umbrella.',
+    'I am so tired that I take an umbrella.',
+])
+def test_bare_so_is_not_an_inference_marker(premise):
+    builder = SupportGraphBuilder()
+    assert builder._split_support(premise) is None
+    assert builder.find_cycles([premise], 'I take an umbrella.') == []
+
+
+@pytest.mark.parametrize('premise', [
+    'It is raining, so I take an umbrella.',
+    'It is raining; so, I take an umbrella.',
+])
+def test_clause_level_so_is_an_inference_marker(premise):
+    (source, _), (target, _), asserts_target = SupportGraphBuilder()._split_support(premise)
+    assert (source, target, asserts_target) == ('It is raining', 'I take an umbrella', True)
+
+
+def test_mutual_support_is_a_cycle():
+    cycles = SupportGraphBuilder().find_cycles(
+        ['We can trust him because he is honest.'],
+        'He is honest because we can trust him.'
+    )
+    assert [cycle.premise_indices for cycle in cycles] == [[0]]
+
+
+def test_claims_use_spans_of_the_parsed_sentences():
+    premises = ['We can trust him because he is honest.']
+    conclusion = 'He is honest because we can trust him.'
+    parsed = _parsed(premises + [conclusion], {})
+    assert SupportGraphBuilder(nlp=object()).find_cycles(premises, conclusion, parsed)[0].premise_indices == [0]
+
+
+def test_similar_claims_with_opposite_polarity_are_not_merged():
+    wages = np.array([1, 0, 0], dtype=np.float32)
+    vectors = {
+        'wages are high': wages,
+        'wages are not high': wages,
+        'taxes are low': np.array([0, 1, 0], dtype=np.float32),
+    }
+    premises = ['Taxes are low because wages are high.']
+    conclusion = 'Wages are not high because taxes are low.'
+    builder = SupportGraphBuilder(nlp=object())
+    assert builder.find_cycles(premises, conclusion, _parsed(premises + [conclusion], vectors)) == []
+
+    # 否定語を除けば同じ主張になる場合は、埋め込みの類似度で同一視して循環を検出する
+    vectors['wages are rising'] = wages
+    conclusion = 'Wages are rising because taxes are low.'
+    cycles = builder.find_cycles(premises, conclusion, _parsed(premises + [conclusion], vectors))
+    assert [cycle.premise_indices for cycle in cycles] == [[0]]
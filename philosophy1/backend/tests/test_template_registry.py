@@ -0,0 +1,93 @@
+import json
+import os
+import time
+
+from app.core.template_registry import TemplateRegistry, get_template_registry
+
+
+def _template(title: str, conditions: int, tags=()) -> dict:
+    return {
+        'title_template': title,
+        'description_template': '',
+        'base_conditions': [f'condition {i}' for i in range(conditions)],
+        'tags': list(tags),
+    }
+
+
+def _write(path, templates: dict) -> None:
+    path.write_text(json.dumps(templates), encoding='utf-8')
+
+
+def _touch_later(path) -> None:
+    # 更新時刻の粒度が粗いファイルシステムでも変更として検出させる
+    mtime = os.stat(path).st_mtime + 10
+    os.utime(path, (mtime, mtime))
+
+
+def test_templates_are_indexed_by_complexity_and_tag(tmp_path):
+    path = tmp_path / 'templates.json'
+    _write(path, {
+        'trolley': _template('Trolley', 3, ['ethics']),
+        'zombie': _template('Zombie', 1, ['mind', 'ethics']),
+    })
+    registry = TemplateRegistry(str(path))
+    assert registry.get('trolley')['title_template'] == 'Trolley'
+    assert [t['category'] for t in registry.list_templates()] == ['trolley', 'zombie']
+    assert [t['category'] for t in registry.find(complexity=2)] == ['trolley']
+    assert [t['category'] for t in registry.find(tag='mind')] == ['zombie']
+    assert [t['category'] for t in registry.find(complexity=1, tag='ethics')] == ['trolley', 'zombie']
+    assert registry.find(complexity=4) == []
+
+
+def test_jsonl_templates(tmp_path):
+    path = tmp_path / 'templates.jsonl'
+    lines = [dict(_template('Trolley', 2), category='trolley'), dict(_template('Zombie', 1), category='zombie')]
+    path.write_text('\n'.join(json.dumps(line) for line in lines) + '\n\n', encoding='utf-8')
+    assert list(TemplateRegistry(str(path)).templates) == ['trolley', 'zombie']
+
+
+def test_reload_replaces_the_snapshot(tmp_path):
+    path = tmp_path / 'templates.json'
+    _write(path, {'trolley': _template('Trolley', 1)})
+    registry = TemplateRegistry(str(path), check_interval=3600)
+    snapshot = registry.snapshot
+
+    _write(path, {'trolley': _template('Runaway trolley', 1), 'zombie': _template('Zombie', 1)})
+    _touch_later(path)
+    # 確認間隔内はファイルを読み直さない
+    assert registry.snapshot is snapshot
+    registry.reload()
+    assert registry.get('trolley')['title_template'] == 'Runaway trolley'
+    # 参照済みのスナップショットは変更されない
+    assert list(snapshot.templates) == ['trolley']
+
+
+def test_modified_file_is_reloaded_in_the_background(tmp_path):
+    path = tmp_path / 'templates.json'
+    _write(path, {'trolley': _template('Trolley', 1)})
+    registry = TemplateRegistry(str(path), check_interval=0)
+
+    _write(path, {'zombie': _template('Zombie', 1)})
+    _touch_later(path)
+    deadline = time.monotonic() + 5
+    while registry.get('zombie') is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert list(registry.templates) == ['zombie']
+
+
+def test_unreadable_file_keeps_the_current_snapshot(tmp_path):
+    path = tmp_path / 'templates.json'
+    _write(path, {'trolley': _template('Trolley', 1)})
+    registry = TemplateRegistry(str(path))
+    path.write_text('{"zombie": ', encoding='utf-8')
+    registry.reload()
+    assert list(registry.templates) == ['trolley']
+
+    missing = TemplateRegistry(str(tmp_path / 'missing.json'))
+    assert missing.templates == {}
+
+
+def test_registries_are_shared_per_path(tmp_path):
+    path = tmp_path / 'templates.json'
+    _write(path, {'trolley': _template('Trolley', 1)})
+    assert get_template_registry(str(path)) is get_template_registry(str(path))